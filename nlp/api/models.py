@@ -28,6 +28,19 @@ class ChatResponse(BaseModel):
     timestamp: str = Field(..., description="Timestamp of the response")
     suggestions: List[str] = Field(..., description="Suggested follow-up questions")
 
+class ChatTurnRequest(BaseModel):
+    """Delta chat request model carrying only the new turn."""
+    
+    message: str = Field(..., description="New user message for this turn")
+    session_id: str = Field(..., description="Session ID the conversation history is stored under")
+    history_version: int = Field(..., ge=0, description="History version the client last received")
+    service_category: str = Field(..., description="Service category for the query")
+
+class ChatTurnResponse(ChatResponse):
+    """Delta chat response model."""
+    
+    history_version: int = Field(..., description="History version after this turn was stored")
+
 class HealthResponse(BaseModel):
     """Health check response model."""
     
@@ -2,19 +2,24 @@
 API routes with enhanced context handling and full conversation history.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Header, status
 from fastapi.responses import JSONResponse
 from typing import Optional, List
 from uuid import uuid4
 from datetime import datetime
+import hmac
 import json
 import os
 from dotenv import load_dotenv
 
-from api.models import ChatRequest, ChatResponse, HealthResponse, ChatMessage
+from api.models import ChatRequest, ChatResponse, ChatTurnRequest, ChatTurnResponse, HealthResponse, ChatMessage
 from core.ai_service import LangChainService
 from core.document_qa import DocumentBasedAIService
-from core.enhanced_message_store import EnhancedMessageStore, extract_user_information_from_qa
+from core.embedding_cache import CachedEmbeddings
+from core.enhanced_message_store import EnhancedMessageStore, HistoryVersionConflict, extract_user_information_from_qa
+from core.context_builder import ContextBuilder
+from core.conversation_summarizer import ConversationSummarizer
+from core.prompt_assembly import PromptAssembler, prompt_cache_tracker
 from core.prompts import get_follow_up_suggestions
 from config.settings import settings
 from utils.logging_config import logger
@@ -28,9 +33,12 @@ router = APIRouter()
 # Initialize services with enhanced message store
 message_store = EnhancedMessageStore(
     max_pairs=3,  # Keep last 3 Q&A pairs
-    expiry_seconds=settings.MESSAGE_EXPIRY_SECONDS
+    expiry_seconds=settings.MESSAGE_EXPIRY_SECONDS,
+    keep_evicted_pairs=settings.ENABLE_CONVERSATION_SUMMARY  # Folded into rolling summaries
 )
 
+context_builder = ContextBuilder()
+
 # Dependencies (unchanged)
 async def get_langchain_service():
     """Dependency to get LangChain service."""
@@ -39,12 +47,44 @@ async def get_langchain_service():
     
     return LangChainService(api_key=settings.OPENAI_API_KEY)
 
+# Shared document-based AI service; created on first use so compiled chains persist across requests
+document_ai_service_instance: Optional[DocumentBasedAIService] = None
+
 async def get_document_ai_service():
     """Dependency to get document-based AI service."""
+    global document_ai_service_instance
+    
     if not settings.OPENAI_API_KEY:
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
     
-    return DocumentBasedAIService(api_key=settings.OPENAI_API_KEY)
+    if document_ai_service_instance is None:
+        document_ai_service_instance = DocumentBasedAIService(api_key=settings.OPENAI_API_KEY)
+    
+    return document_ai_service_instance
+
+# Rolling summarizer for evicted Q&A pairs; created on first use
+conversation_summarizer: Optional[ConversationSummarizer] = None
+
+def schedule_conversation_summary(background_tasks: BackgroundTasks, user_id: str) -> None:
+    """Fold any evicted pairs into the user's summary after the response is sent."""
+    global conversation_summarizer
+    
+    if not settings.ENABLE_CONVERSATION_SUMMARY or not settings.OPENAI_API_KEY:
+        return
+    
+    if conversation_summarizer is None:
+        conversation_summarizer = ConversationSummarizer(message_store)
+    
+    background_tasks.add_task(conversation_summarizer.summarize_evicted, user_id)
+
+# Customer-independent instructions that open every chat system prompt
+STATIC_CHAT_INSTRUCTIONS = """You are ALICE, Bank of Kigali's AI assistant.
+
+Be helpful, professional, and personalized when you have the customer's information.
+
+IMPORTANT INSTRUCTIONS:
+- When customer information is listed below, use their name naturally in your responses
+- Never claim you don't have access to information that's shown below"""
 
 def create_conversation_messages(user_id: str, current_user_message: str) -> List[ChatMessage]:
     """
@@ -59,39 +99,40 @@ def create_conversation_messages(user_id: str, current_user_message: str) -> Lis
     """
     messages = []
     
-    # Get user info and recent conversations
+    # Get user info and the recent conversations that fit the history token budget
     user_info = message_store.get_user_info(user_id)
-    recent_conversations = message_store.get_recent_conversations(user_id)
+    recent_conversations = context_builder.build(
+        budget=settings.HISTORY_TOKEN_BUDGET,
+        pairs=message_store.get_recent_conversations(user_id)
+    ).pairs
     
-    # Create system message with user context
-    system_context = []
-    system_context.append("You are ALICE, Bank of Kigali's AI assistant.")
-    system_context.append("")
+    # Assemble the system message from most static to most dynamic content so the
+    # leading instructions are byte-identical across customers and prompt-cacheable
+    assembler = PromptAssembler()
+    assembler.add(PromptAssembler.STATIC, STATIC_CHAT_INSTRUCTIONS)
     
     if user_info:
-        system_context.append("CUSTOMER INFORMATION:")
+        customer_lines = ["CUSTOMER INFORMATION:"]
         if "name" in user_info:
-            system_context.append(f"- Name: {user_info['name']}")
+            customer_lines.append(f"- Name: {user_info['name']}")
         if "account_number" in user_info:
-            system_context.append(f"- Account Number: {user_info['account_number']}")
+            customer_lines.append(f"- Account Number: {user_info['account_number']}")
         if "customer_id" in user_info:
-            system_context.append(f"- Customer ID: {user_info['customer_id']}")
-        system_context.append("")
-    
-    # Add critical instructions
-    if user_info and "name" in user_info:
-        system_context.append("IMPORTANT INSTRUCTIONS:")
-        system_context.append(f"- When the customer asks 'What is my name?', respond: 'Your name is {user_info['name']}.'")
-        system_context.append("- Use their name naturally in your responses")
-        system_context.append("- Never claim you don't have access to information that's shown above")
-        system_context.append("")
+            customer_lines.append(f"- Customer ID: {user_info['customer_id']}")
+        if "name" in user_info:
+            customer_lines.append("")
+            customer_lines.append(f"When the customer asks 'What is my name?', respond: 'Your name is {user_info['name']}.'")
+        assembler.add(PromptAssembler.USER, "\n".join(customer_lines))
     
-    system_context.append("Be helpful, professional, and personalized when you have the customer's information.")
+    # Earlier turns that no longer fit in the stored history, kept as a one-line summary
+    summary = message_store.get_conversation_summary(user_id)
+    if summary:
+        assembler.add(PromptAssembler.USER, f"CONVERSATION SUMMARY: {summary}")
     
     # Create system message
     system_message = ChatMessage(
         role="system",
-        content="\n".join(system_context)
+        content=assembler.render() + "\n"
     )
     messages.append(system_message)
     
@@ -121,6 +162,7 @@ def create_conversation_messages(user_id: str, current_user_message: str) -> Lis
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
+    background_tasks: BackgroundTasks,
     document_ai_service: DocumentBasedAIService = Depends(get_document_ai_service)
 ):
     try:
@@ -185,6 +227,7 @@ async def chat(
             answer=ai_response,
             detected_user_info=detected_user_info
         )
+        schedule_conversation_summary(background_tasks, user_id)
         
         # Check state after storing
         logger.info(f"[CHAT] State after storing Q&A:")
@@ -209,6 +252,76 @@ async def chat(
         logger.error(f"[CHAT] Error in chat endpoint: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+def history_conflict_response(user_id: str, expected_version: int, current_version: int) -> HTTPException:
+    """Build the 409 error returned when a client's history version is stale."""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "message": "Conversation history has changed; resync before sending a new turn",
+            "session_id": user_id,
+            "expected_version": expected_version,
+            "current_version": current_version
+        }
+    )
+
+@router.post("/v2/chat", response_model=ChatTurnResponse)
+async def chat_v2(
+    request: ChatTurnRequest,
+    background_tasks: BackgroundTasks,
+    document_ai_service: DocumentBasedAIService = Depends(get_document_ai_service)
+):
+    """
+    Delta chat endpoint: the client sends only the new message and the history
+    version it last saw; the conversation history lives server-side.
+    """
+    user_id = request.session_id
+    try:
+        current_version = message_store.get_history_version(user_id)
+        if request.history_version != current_version:
+            logger.info(f"[CHAT_V2] Version conflict for {user_id}: client {request.history_version}, server {current_version}")
+            raise history_conflict_response(user_id, request.history_version, current_version)
+        
+        user_message = request.message or "Hello"
+        logger.info(f"[CHAT_V2] Chat turn for user {user_id} at history version {current_version}")
+        
+        messages_for_ai = create_conversation_messages(user_id, user_message)
+        
+        result = await document_ai_service.generate_response(
+            service_category=request.service_category,
+            messages=messages_for_ai
+        )
+        ai_response = result["response"]
+        
+        detected_user_info = extract_user_information_from_qa(user_message, ai_response)
+        
+        # Store the pair only if no other turn landed while we were generating
+        new_version = message_store.add_qa_pair(
+            user_id=user_id,
+            question=user_message,
+            answer=ai_response,
+            detected_user_info=detected_user_info,
+            expected_version=request.history_version
+        )
+        schedule_conversation_summary(background_tasks, user_id)
+        
+        return ChatTurnResponse(
+            response=ai_response,
+            conversation_id=str(uuid4()),
+            service_category=request.service_category,
+            timestamp=datetime.now().isoformat(),
+            suggestions=get_follow_up_suggestions(request.service_category),
+            history_version=new_version
+        )
+        
+    except HTTPException:
+        raise
+    except HistoryVersionConflict as e:
+        logger.info(f"[CHAT_V2] Concurrent turn detected for {user_id}: {e}")
+        raise history_conflict_response(user_id, e.expected_version, e.current_version)
+    except Exception as e:
+        logger.error(f"[CHAT_V2] Error in chat endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
 # Debugging endpoint to check conversation state
 @router.get("/debug/conversations/{user_id}")
 async def debug_conversations(user_id: str):
@@ -271,6 +384,7 @@ async def clear_chat_history(user_id: str):
             "status": "success",
             "message": "Conversation history cleared successfully",
             "user_id": user_id,
+            "history_version": message_store.get_history_version(user_id),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -291,6 +405,7 @@ async def get_user_context(user_id: str):
         return {
             "user_id": user_id,
             "user_info": user_info,
+            "history_version": message_store.get_history_version(user_id),
             "conversation_count": len(conversations),
             "stored_conversations": [
                 {
@@ -313,6 +428,65 @@ async def get_user_context(user_id: str):
         logger.error(f"Error getting chat context for user {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting conversation context: {str(e)}")
 
+# Prompt cache metrics endpoint
+@router.get("/metrics/prompt-cache")
+async def prompt_cache_metrics():
+    """Report provider-side cached prompt tokens per service category."""
+    return {
+        "categories": prompt_cache_tracker.report(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Answer cache metrics endpoint
+@router.get("/metrics/cache")
+async def cache_metrics():
+    """Report answer, retrieval and embedding cache, batching, reranking and request coalescing statistics."""
+    service = document_ai_service_instance
+    answer_cache = service.product_qa.answer_cache if service else None
+    embeddings = service.document_processor.embeddings if service else None
+    
+    return {
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "retrieval_cache": service.document_processor.retrieval_cache.stats() if service else None,
+        "embedding_cache": embeddings.stats() if isinstance(embeddings, CachedEmbeddings) else None,
+        "embedding_batcher": service.document_processor.query_embeddings.stats() if service else None,
+        "reranker": service.document_processor.reranker.stats() if service else None,
+        "single_flight": service.single_flight.stats() if service else None,
+        "timestamp": datetime.now().isoformat()
+    }
+
+def require_admin(x_admin_key: Optional[str] = Header(default=None)):
+    """Dependency guarding admin endpoints; they stay closed until ADMIN_API_KEY is configured."""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin endpoints are disabled: ADMIN_API_KEY is not set")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key.encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin key")
+
+# Background re-index endpoints
+@router.post("/admin/reindex", status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(require_admin)])
+async def start_reindex(
+    full: bool = False,
+    document_ai_service: DocumentBasedAIService = Depends(get_document_ai_service)
+):
+    """Rebuild the product document index in the background (only changed PDFs unless full=true) and swap it in."""
+    if not document_ai_service.reindexer.start(full=full):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A re-index is already running")
+    
+    logger.info(f"Background {'full ' if full else ''}re-index started")
+    return {
+        **document_ai_service.reindexer.status(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("/admin/reindex", dependencies=[Depends(require_admin)])
+async def reindex_status():
+    """Report re-index progress and the live index version."""
+    service = document_ai_service_instance
+    return {
+        **(service.reindexer.status() if service else {"state": "idle", "active_index": None}),
+        "timestamp": datetime.now().isoformat()
+    }
+
 # Health check endpoint
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
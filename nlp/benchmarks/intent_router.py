@@ -0,0 +1,87 @@
+"""
+Microbenchmark: legacy keyword scans versus the compiled intent router, with accuracy on the labelled set.
+Run from the nlp directory: python -m benchmarks.intent_router
+"""
+
+import json
+import os
+import time
+
+from core.intent_router import IntentRouter
+
+ITERATIONS = 200
+CASES_PATH = os.path.join(os.path.dirname(__file__), "intent_cases.json")
+
+LEGACY_PRODUCT_KEYWORDS = [
+    "product", "service", "account", "loan", "credit", "card", "mortgage",
+    "interest", "rate", "fee", "charge", "term", "deposit", "savings",
+    "checking", "investment", "insurance", "sme", "semi", "corporate", "retail",
+    "institutional", "agribusiness", "agri", "business", "banking", "offer",
+    "application", "apply", "eligibility", "requirement", "qualify", "benefit",
+    "feature", "package", "plan", "program", "promotion", "special", "discount",
+    "financing", "fund", "money", "payment", "transaction", "transfer", "borrow"
+]
+
+LEGACY_QUESTION_INDICATORS = [
+    "how", "what", "where", "when", "who", "which", "why", "can", "do", "does",
+    "tell me about", "explain", "describe", "information on", "details about",
+    "i want", "i need", "show me", "find", "looking for"
+]
+
+
+def legacy_is_product_question(message: str) -> bool:
+    """The former DocumentBasedAIService.is_product_question substring scans."""
+    message_lower = message.lower()
+    has_product_keyword = any(keyword in message_lower for keyword in LEGACY_PRODUCT_KEYWORDS)
+    has_question_about_product = any(
+        indicator in message_lower and any(
+            keyword in message_lower[message_lower.find(indicator):]
+            for keyword in LEGACY_PRODUCT_KEYWORDS
+        )
+        for indicator in LEGACY_QUESTION_INDICATORS
+    )
+    return has_product_keyword or has_question_about_product
+
+
+def time_per_message(func, messages, iterations: int = ITERATIONS) -> float:
+    """Average wall time of func(message) in microseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            func(message)
+    return (time.perf_counter() - start) / (iterations * len(messages)) * 1e6
+
+
+def accuracy(func, cases) -> float:
+    """Share of labelled cases whose product flag is predicted correctly."""
+    return sum(func(case["message"]) == case["is_product"] for case in cases) / len(cases)
+
+
+def run_benchmark():
+    """Run the benchmark and print a comparison table."""
+    with open(CASES_PATH, encoding="utf-8") as f:
+        cases = json.load(f)
+    messages = [case["message"] for case in cases]
+    router = IntentRouter()
+
+    results = [
+        ("legacy keyword scans", legacy_is_product_question),
+        ("compiled router (is_product_question)", router.is_product_question),
+        ("compiled router (classify)", lambda message: router.classify(message).is_product),
+    ]
+
+    print(f"=== Intent routing ({len(cases)} labelled messages x {ITERATIONS} iterations) ===\n")
+    print(f"{'router':<40} {'us/message':>12} {'accuracy':>10}")
+    print("-" * 64)
+    for name, func in results:
+        print(f"{name:<40} {time_per_message(func, messages):>12.2f} {accuracy(func, cases):>10.1%}")
+
+    misrouted = [m for m in messages if legacy_is_product_question(m) != router.is_product_question(m)]
+    if misrouted:
+        print("\nMessages routed differently by the legacy scans:")
+        for message in misrouted:
+            print(f"  {message}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,85 @@
+"""
+Benchmark: query latency and recall of IVF-partitioned search versus brute force as the corpus grows.
+Run from the nlp directory: python -m benchmarks.ivf [largest_corpus]
+"""
+
+import sys
+import time
+from typing import List, Set
+
+import numpy as np
+
+from config.settings import settings
+from benchmarks.vector_store import CATEGORIES, LookupEmbeddings
+from core.numpy_vector_store import NumpyVectorStore
+
+DIMENSIONS = 256  # Smaller than production so the 100x corpus fits in memory; the scaling is what matters
+BASE_CORPUS = 2000
+GROWTH = [1, 10, 100]
+NUM_TOPICS = 500
+NUM_QUERIES = 100
+K = 7
+NPROBES = [4, 8, 16]
+
+
+def make_corpus(num_chunks: int, rng: np.random.Generator):
+    """Chunks clustered around topics, plus noisy copies of random chunks as queries."""
+    topics = rng.standard_normal((NUM_TOPICS, DIMENSIONS)).astype(np.float32)
+    vectors = topics[rng.integers(0, NUM_TOPICS, num_chunks)] + 0.7 * rng.standard_normal((num_chunks, DIMENSIONS)).astype(np.float32)
+    queries = vectors[rng.integers(0, num_chunks, NUM_QUERIES)] + 0.5 * rng.standard_normal((NUM_QUERIES, DIMENSIONS)).astype(np.float32)
+    texts = [f"chunk {i}" for i in range(num_chunks)]
+    metadatas = [{"category": CATEGORIES[i % len(CATEGORIES)]} for i in range(num_chunks)]
+    return texts, metadatas, vectors, queries.tolist()
+
+
+def timed_search(store: NumpyVectorStore, queries: List[List[float]], **kwargs):
+    """Top-k ids per query and the p50 latency in milliseconds."""
+    results: List[Set[str]] = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        docs = store.similarity_search_by_vector(query, k=K, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({doc.page_content for doc in docs})
+    return results, float(np.percentile(latencies, 50))
+
+
+def run_benchmark(largest: int = BASE_CORPUS * GROWTH[-1]):
+    """Run the benchmark and print latency and recall per corpus size."""
+    rng = np.random.default_rng(11)
+    sizes = sorted({min(largest, BASE_CORPUS * factor) for factor in GROWTH})
+    # Partition every corpus in this run, however small
+    settings.IVF_MIN_VECTORS = 0
+
+    print(f"=== IVF: {DIMENSIONS} dims, {NUM_QUERIES} queries, k={K}, sqrt(n) partitions ===\n")
+    header = f"{'chunks':>8} {'lists':>6} {'train s':>8} {'brute ms':>9}"
+    for nprobe in NPROBES:
+        header += f" {f'p{nprobe} ms':>8} {f'p{nprobe} rec':>8}"
+    print(header)
+    print("-" * len(header))
+
+    for size in sizes:
+        texts, metadatas, vectors, queries = make_corpus(size, rng)
+        embeddings = LookupEmbeddings({})
+
+        brute = NumpyVectorStore(embedding_function=embeddings, ivf_enabled=False)
+        brute.add_embeddings(texts, vectors, metadatas)
+        truth, brute_ms = timed_search(brute, queries)
+
+        start = time.perf_counter()
+        partitioned = NumpyVectorStore(embedding_function=embeddings, ivf_enabled=True)
+        partitioned.add_embeddings(texts, vectors, metadatas)
+        train_seconds = time.perf_counter() - start
+
+        line = f"{size:>8} {partitioned._ivf.n_lists:>6} {train_seconds:>8.2f} {brute_ms:>9.3f}"
+        for nprobe in NPROBES:
+            found, ivf_ms = timed_search(partitioned, queries, nprobe=nprobe)
+            recall = np.mean([len(f & t) / K for f, t in zip(found, truth)])
+            line += f" {ivf_ms:>8.3f} {recall:>8.3f}"
+        print(line)
+
+    print("\nrec is recall@k against brute force. Partitions grow with sqrt(n), so a fixed nprobe scans about sqrt(n) * nprobe rows.")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else BASE_CORPUS * GROWTH[-1])
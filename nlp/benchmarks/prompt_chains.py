@@ -0,0 +1,120 @@
+"""
+Microbenchmark: per-request prompt/chain construction versus the precompiled chain registry.
+Run from the nlp directory: python -m benchmarks.prompt_chains
+"""
+
+import time
+from typing import List
+
+from langchain.chains import LLMChain, RetrievalQA
+from langchain.chains.question_answering import load_qa_chain
+from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.retrievers import BaseRetriever
+
+from core.chain_registry import ChainRegistry
+from core.prompts import PRODUCT_QA_SYSTEM_TEMPLATE, get_system_prompt
+
+ITERATIONS = 2000
+CATEGORIES = ["general", "upselling", "personalized_banking"]
+USER_INFO = {"name": "Jane Smith", "account_number": "1234567890"}
+CONVERSATION_CONTEXT = "User: What savings accounts do you have?\nAssistant: We offer several savings accounts..."
+
+
+class StaticRetriever(BaseRetriever):
+    """Retriever returning a fixed document list, so only construction cost is measured."""
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [Document(page_content="Sample product text", metadata={"category": "retail"})]
+
+
+def legacy_product_chain(llm, retriever, user_info, conversation_context):
+    """Per-request construction as done by the former ProductQAService.create_qa_chain."""
+    system_template = "You are ALICE, Bank of Kigali's AI assistant specializing in product information."
+    if conversation_context:
+        system_template += f"\n\nCONVERSATION CONTEXT:\n{conversation_context}\n"
+    if user_info and "name" in user_info:
+        system_template += f"\nThe customer's name is {user_info['name']}.\n"
+    system_template += "\nImportant guidelines: ...\n\n{context}\n"
+
+    prompt = ChatPromptTemplate.from_messages([
+        SystemMessagePromptTemplate.from_template(system_template),
+        HumanMessagePromptTemplate.from_template("{question}")
+    ])
+    return RetrievalQA.from_chain_type(
+        llm=llm,
+        chain_type="stuff",
+        retriever=retriever,
+        chain_type_kwargs={"prompt": prompt},
+        return_source_documents=True
+    )
+
+
+def legacy_conversation_chain(llm, service_category):
+    """Per-request construction as done by the former LangChainService.generate_response."""
+    prompt = ChatPromptTemplate.from_messages([
+        SystemMessagePromptTemplate.from_template(get_system_prompt(service_category)),
+        HumanMessagePromptTemplate.from_template("{input}")
+    ])
+    return LLMChain(llm=llm, prompt=prompt)
+
+
+def build_product_chain(llm):
+    """Registry builder mirroring ProductQAService._build_qa_chain."""
+    def builder():
+        prompt = ChatPromptTemplate.from_messages([
+            SystemMessagePromptTemplate.from_template(PRODUCT_QA_SYSTEM_TEMPLATE),
+            HumanMessagePromptTemplate.from_template("{question}")
+        ])
+        return load_qa_chain(llm, chain_type="stuff", prompt=prompt)
+    return builder
+
+
+def time_per_call(func, iterations: int = ITERATIONS) -> float:
+    """Average wall time of func() in microseconds."""
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run_benchmark():
+    """Run the benchmark and print a comparison table."""
+    llm = FakeListChatModel(responses=["ok"])
+    retriever = StaticRetriever()
+    registry = ChainRegistry()
+    product_builder = build_product_chain(llm)
+
+    results = [
+        (
+            "product QA: build per request",
+            time_per_call(lambda i: legacy_product_chain(llm, retriever, USER_INFO, CONVERSATION_CONTEXT))
+        ),
+        (
+            "product QA: registry lookup",
+            time_per_call(lambda i: registry.get("product_qa", None, product_builder))
+        ),
+        (
+            "conversation: build per request",
+            time_per_call(lambda i: legacy_conversation_chain(llm, CATEGORIES[i % len(CATEGORIES)]))
+        ),
+        (
+            "conversation: registry lookup",
+            time_per_call(lambda i: registry.get(
+                "conversation", CATEGORIES[i % len(CATEGORIES)],
+                lambda category: legacy_conversation_chain(llm, category)
+            ))
+        ),
+    ]
+
+    print(f"=== Chain construction overhead ({ITERATIONS} iterations) ===\n")
+    print(f"{'scenario':<36} {'us/request':>12}")
+    print("-" * 49)
+    for name, micros in results:
+        print(f"{name:<36} {micros:>12.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,85 @@
+"""
+Benchmark: recall and memory of float16 and int8 scans in the NumPy vector index against exact float32 search.
+Run from the nlp directory: python -m benchmarks.quantization [num_chunks]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import List, Set
+
+import numpy as np
+
+from benchmarks.vector_store import CATEGORIES, DIMENSIONS, LookupEmbeddings, directory_size
+from core.numpy_vector_store import NumpyVectorStore
+
+NUM_CHUNKS = 20000
+NUM_QUERIES = 200
+NUM_TOPICS = 400
+K = 7
+CONFIGURATIONS = [("float32", 1), ("float16", 1), ("float16", 4), ("int8", 1), ("int8", 4), ("int8", 8)]
+
+
+def make_corpus(num_chunks: int):
+    """Chunks clustered around topics, so near neighbours are close like real product text; queries are noisy chunks."""
+    rng = np.random.default_rng(7)
+    topics = rng.standard_normal((NUM_TOPICS, DIMENSIONS)).astype(np.float32)
+    vectors = topics[rng.integers(0, NUM_TOPICS, num_chunks)] + 0.6 * rng.standard_normal((num_chunks, DIMENSIONS)).astype(np.float32)
+    queries = vectors[rng.integers(0, num_chunks, NUM_QUERIES)] + 0.4 * rng.standard_normal((NUM_QUERIES, DIMENSIONS)).astype(np.float32)
+
+    texts = [f"chunk {i}" for i in range(num_chunks)]
+    metadatas = [{"category": CATEGORIES[i % len(CATEGORIES)]} for i in range(num_chunks)]
+    lookup = dict(zip(texts, vectors.tolist()))
+    return texts, metadatas, vectors, queries.tolist(), lookup
+
+
+def top_ids(store: NumpyVectorStore, query: List[float]) -> Set[str]:
+    return {doc.page_content for doc in store.similarity_search_by_vector(query, k=K)}
+
+
+def run_benchmark(num_chunks: int = NUM_CHUNKS):
+    """Run the benchmark and print a recall-versus-memory table."""
+    texts, metadatas, vectors, queries, lookup = make_corpus(num_chunks)
+    embeddings = LookupEmbeddings(lookup)
+    directory = tempfile.mkdtemp(prefix="bench_quantization_")
+
+    try:
+        NumpyVectorStore(embedding_function=embeddings, persist_directory=directory).add_embeddings(
+            texts, vectors, metadatas
+        )
+        exact = NumpyVectorStore(embedding_function=embeddings, persist_directory=directory)
+        truth = [top_ids(exact, query) for query in queries]
+
+        print(f"=== Quantization: {num_chunks} chunks x {DIMENSIONS} dims, {NUM_QUERIES} queries, k={K} ===\n")
+        print(f"{'scan':<8} {'rescore':>7} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8} {'scan MB':>8} {'ratio':>6}")
+        print("-" * 60)
+        full_bytes = exact.scan_bytes()
+        for quantization, rescore_factor in CONFIGURATIONS:
+            # Opening with a new quantization derives its compact copy from the float32 vectors
+            store = NumpyVectorStore(
+                embedding_function=embeddings, persist_directory=directory,
+                quantization=quantization, rescore_factor=rescore_factor
+            )
+            latencies, recalls = [], []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                found = top_ids(store, query)
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(len(found & expected) / K)
+
+            print(
+                f"{quantization:<8} {rescore_factor:>7} {np.mean(recalls):>9.3f} {np.percentile(latencies, 50):>8.2f} "
+                f"{np.percentile(latencies, 99):>8.2f} {store.scan_bytes() / 2**20:>8.1f} {store.scan_bytes() / full_bytes:>6.2f}"
+            )
+
+        print(f"\nOn disk with all copies: {directory_size(directory) / 2**20:.1f} MB in {len(os.listdir(directory))} files.")
+        print("scan MB is what every query reads, so it is the index's resident working set per host;")
+        print("the float32 file is only read for the k * rescore candidates.")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_CHUNKS)
@@ -0,0 +1,220 @@
+"""
+Benchmark: retrieval quality, latency and index size per chunking, dedup, index and reranking configuration.
+Runs offline on the labelled sample corpus with a deterministic hashing embedder in place of OpenAI.
+Run from the nlp directory: python -m benchmarks.retrieval [distractor_pages]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import mmh3
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from core.chunking import make_text_splitter, split_pages
+from core.context_builder import default_token_counter
+from core.dedup import NearDuplicateDetector
+from core.lexical_index import tokenize
+from core.numpy_vector_store import NumpyVectorStore
+from core.reranker import LocalReranker
+
+CASES_PATH = os.path.join(os.path.dirname(__file__), "retrieval_cases.json")
+DIMENSIONS = 512
+DISTRACTOR_PAGES = 300  # Generated pages that make the index larger than the nine sample products
+ROUNDS = 5  # Passes over the question set, for stable latency percentiles
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic stand-in for OpenAI embeddings: signed feature hashing of word unigrams and bigrams."""
+
+    def __init__(self, dimensions: int = DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        words = tokenize(text)
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = mmh3.hash(feature, signed=False)
+            vector[digest % self.dimensions] += 1.0 if digest >> 31 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def get_cached(self, texts: List[str]) -> List[List[float]]:
+        # Every vector is computed locally, so the reranker's cosine score always applies
+        return self.embed_documents(texts)
+
+
+@dataclass
+class Configuration:
+    """One retrieval pipeline setup to measure."""
+
+    name: str
+    chunking: str = "tokens"  # "tokens" (current splitter) or "chars" (the previous character splitter)
+    chunk_size: int = settings.CHUNK_SIZE
+    chunk_overlap: int = settings.CHUNK_OVERLAP
+    dedup: bool = False
+    k: int = settings.RETRIEVAL_K
+    rerank: bool = False
+    adaptive_k: bool = False
+    quantization: str = "float32"
+    ivf: bool = False
+    nprobe: int = settings.IVF_NPROBE
+
+
+CONFIGURATIONS = [
+    Configuration("chars 1500/300", chunking="chars", chunk_size=1500, chunk_overlap=300),
+    Configuration(f"tokens {settings.CHUNK_SIZE}/{settings.CHUNK_OVERLAP}"),
+    Configuration("+ dedup", dedup=True),
+    Configuration("+ rerank", dedup=True, rerank=True),
+    Configuration("+ adaptive k", dedup=True, rerank=True, adaptive_k=True),
+    Configuration("+ int8 scan", dedup=True, rerank=True, adaptive_k=True, quantization="int8"),
+    Configuration("+ ivf", dedup=True, rerank=True, adaptive_k=True, ivf=True),
+]
+
+
+def load_cases(distractor_pages: int):
+    """Sample product pages plus generated distractor pages, and the labelled questions."""
+    with open(CASES_PATH, encoding="utf-8") as f:
+        cases = json.load(f)
+
+    pages = [
+        Document(page_content=text, metadata={"category": doc["category"], "filename": doc["filename"], "page": i})
+        for doc in cases["documents"] for i, text in enumerate(doc["pages"])
+    ]
+    # Distractors reuse the corpus vocabulary so they compete for the same terms
+    rng = np.random.default_rng(5)
+    vocabulary = sorted({word for page in pages for word in page.page_content.split()})
+    categories = sorted({doc["category"] for doc in cases["documents"]})
+    for i in range(distractor_pages):
+        words = rng.choice(vocabulary, 250)
+        pages.append(Document(
+            page_content=" ".join(words),
+            metadata={"category": categories[i % len(categories)], "filename": f"distractor_{i}.pdf", "page": 0}
+        ))
+    return pages, cases["questions"]
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def chunk_pages(pages: List[Document], config: Configuration) -> List[Document]:
+    """Chunk pages as ingestion would for the configuration, dropping near-duplicates if enabled."""
+    if config.chunking == "chars":
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=config.chunk_size, chunk_overlap=config.chunk_overlap, separators=["\n\n", "\n", ". ", " ", ""]
+        )
+        chunks = splitter.split_documents(pages)
+    else:
+        chunks = split_pages(pages, make_text_splitter(config.chunk_size, config.chunk_overlap))
+    for chunk in chunks:
+        chunk.metadata["token_count"] = default_token_counter.count(chunk.page_content)
+
+    if config.dedup:
+        canonical = NearDuplicateDetector().find_duplicates(
+            [chunk.page_content for chunk in chunks], groups=[chunk.metadata["category"] for chunk in chunks]
+        )
+        chunks = [chunk for chunk, target in zip(chunks, canonical) if target is None]
+    return chunks
+
+
+@contextmanager
+def overridden(**values):
+    """Temporarily change settings read at query time."""
+    previous = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+def first_relevant_rank(docs: List[Document], answer: str) -> Optional[int]:
+    """1-based rank of the first chunk containing the labelled answer."""
+    expected = normalize(answer)
+    for rank, doc in enumerate(docs, 1):
+        if expected in normalize(doc.page_content):
+            return rank
+    return None
+
+
+def evaluate(config: Configuration, pages: List[Document], questions: List[Dict], embeddings: HashingEmbeddings) -> Dict:
+    """Build the index for a configuration and measure it on the question set."""
+    chunks = chunk_pages(pages, config)
+    texts = [chunk.page_content for chunk in chunks]
+    with overridden(IVF_MIN_VECTORS=0, ADAPTIVE_K_ENABLED=config.adaptive_k):
+        store = NumpyVectorStore(embedding_function=embeddings, quantization=config.quantization, ivf_enabled=config.ivf)
+        store.add_embeddings(texts, embeddings.embed_documents(texts), [chunk.metadata for chunk in chunks])
+        reranker = LocalReranker(embeddings, top_n=min(settings.RERANK_TOP_N, config.k))
+        fetch_k = settings.RERANK_CANDIDATES if config.rerank else config.k
+        search_kwargs = {"nprobe": config.nprobe} if config.ivf else {}
+
+        query_vectors = [embeddings.embed_query(case["question"]) for case in questions]
+        latencies, ranks, returned, tokens = [], [], [], []
+        for round_number in range(ROUNDS):
+            for case, vector in zip(questions, query_vectors):
+                start = time.perf_counter()
+                docs = store.similarity_search_by_vector(vector, k=fetch_k, **search_kwargs)
+                if config.rerank:
+                    docs = reranker.rerank(case["question"], docs, vector).documents
+                latencies.append((time.perf_counter() - start) * 1000)
+                if round_number == 0:
+                    ranks.append(first_relevant_rank(docs, case["answer"]))
+                    returned.append(len(docs))
+                    tokens.append(sum(doc.metadata["token_count"] for doc in docs))
+
+    return {
+        "chunks": len(chunks),
+        "index_kb": store.scan_bytes() / 1024,
+        "chunks_per_query": float(np.mean(returned)),
+        "context_tokens": float(np.mean(tokens)),
+        "recall": float(np.mean([rank is not None for rank in ranks])),
+        "mrr": float(np.mean([1 / rank if rank else 0.0 for rank in ranks])),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def run_benchmark(distractor_pages: int = DISTRACTOR_PAGES):
+    """Run every configuration and print a comparison table."""
+    pages, questions = load_cases(distractor_pages)
+    embeddings = HashingEmbeddings()
+
+    print(f"=== Retrieval: {len(pages)} pages ({distractor_pages} distractors), {len(questions)} questions ===\n")
+    header = (
+        f"{'configuration':<18} {'chunks':>7} {'index KB':>9} {'ctx tokens':>10} {'k used':>7} "
+        f"{'recall@k':>9} {'MRR':>6} {'p50 ms':>7} {'p99 ms':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for config in CONFIGURATIONS:
+        result = evaluate(config, pages, questions, embeddings)
+        print(
+            f"{config.name:<18} {result['chunks']:>7} {result['index_kb']:>9.1f} {result['context_tokens']:>10.0f} "
+            f"{result['chunks_per_query']:>7.1f} {result['recall']:>9.3f} {result['mrr']:>6.3f} "
+            f"{result['p50_ms']:>7.3f} {result['p99_ms']:>7.3f}"
+        )
+
+    print("\nrecall@k: questions whose labelled answer appears in a returned chunk (k = chunks returned).")
+    print("Latency covers search and reranking; query embedding is excluded. Searches are unfiltered.")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else DISTRACTOR_PAGES)
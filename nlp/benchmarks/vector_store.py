@@ -0,0 +1,120 @@
+"""
+Benchmark: query latency and memory of the NumPy vector index versus Chroma on a synthetic corpus.
+Run from the nlp directory: python -m benchmarks.vector_store [num_chunks]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.numpy_vector_store import NumpyVectorStore
+
+DIMENSIONS = 1536
+NUM_CHUNKS = 5000
+NUM_QUERIES = 200
+K = 7
+CATEGORIES = ["sme", "retail", "corporate", "institutional", "agribusiness"]
+
+
+class LookupEmbeddings(Embeddings):
+    """Returns precomputed random vectors so only the store itself is measured."""
+
+    def __init__(self, vectors: Dict[str, List[float]]):
+        self.vectors = vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors[text]
+
+
+def make_corpus(num_chunks: int):
+    """Random unit vectors with chunk texts and category metadata."""
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((num_chunks + NUM_QUERIES, DIMENSIONS)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    texts = [f"chunk {i}" for i in range(num_chunks)]
+    metadatas = [{"category": CATEGORIES[i % len(CATEGORIES)], "page": i % 20} for i in range(num_chunks)]
+    queries = [f"query {i}" for i in range(NUM_QUERIES)]
+    lookup = dict(zip(texts + queries, vectors.tolist()))
+    return texts, metadatas, queries, lookup
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def measure(name: str, build, embeddings: Embeddings, queries: List[str], persist_directory: str):
+    """Build, reopen and query a store, reporting latency percentiles and memory."""
+    start = time.perf_counter()
+    build(persist_directory)
+    build_seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    store = build.reopen(persist_directory)
+    query_vectors = [embeddings.embed_query(query) for query in queries]
+    latencies = []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        store.similarity_search_by_vector(vector, k=K)
+        latencies.append((time.perf_counter() - start) * 1000)
+    filtered = []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        store.similarity_search_by_vector(vector, k=K, filter={"category": "sme"})
+        filtered.append((time.perf_counter() - start) * 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:<8} {build_seconds:>9.2f} {np.percentile(latencies, 50):>9.3f} {np.percentile(latencies, 99):>9.3f} "
+        f"{np.percentile(filtered, 50):>12.3f} {peak / 2**20:>13.1f} {directory_size(persist_directory) / 2**20:>10.1f}"
+    )
+
+
+def run_benchmark(num_chunks: int = NUM_CHUNKS):
+    """Run the benchmark and print a comparison table."""
+    texts, metadatas, queries, lookup = make_corpus(num_chunks)
+    embeddings = LookupEmbeddings(lookup)
+
+    def build_numpy(path):
+        NumpyVectorStore.from_texts(texts, embeddings, metadatas, persist_directory=path)
+    build_numpy.reopen = lambda path: NumpyVectorStore(embedding_function=embeddings, persist_directory=path)
+
+    backends = [("numpy", build_numpy)]
+
+    try:
+        import chromadb  # noqa: F401
+        from langchain_community.vectorstores import Chroma
+
+        def build_chroma(path):
+            Chroma.from_texts(texts, embeddings, metadatas, persist_directory=path)
+        build_chroma.reopen = lambda path: Chroma(embedding_function=embeddings, persist_directory=path)
+        backends.append(("chroma", build_chroma))
+    except ImportError:
+        print("chromadb is not installed; reporting the NumPy index only\n")
+
+    print(f"=== Vector store: {num_chunks} chunks x {DIMENSIONS} dims, {NUM_QUERIES} queries, k={K} ===\n")
+    print(f"{'backend':<8} {'build s':>9} {'p50 ms':>9} {'p99 ms':>9} {'filtered p50':>12} {'heap peak MB':>13} {'disk MB':>10}")
+    print("-" * 76)
+    for name, build in backends:
+        directory = tempfile.mkdtemp(prefix=f"bench_{name}_")
+        try:
+            measure(name, build, embeddings, queries, directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    print("\nheap peak counts Python/NumPy allocations after reopening; memory-mapped vectors live in the page cache.")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_CHUNKS)
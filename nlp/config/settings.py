@@ -33,7 +33,76 @@ class Settings(BaseSettings):
     
     # Conversation memory settings
     ENABLE_CONVERSATION_SUMMARY: bool = True
-    CONVERSATION_SUMMARY_LENGTH: int = 200
+    CONVERSATION_SUMMARY_LENGTH: int = 200  # Maximum words in a rolling summary
+    CONVERSATION_SUMMARY_MODEL: str = "gpt-4o-mini"  # Cheap model used off the hot path
+    
+    # Prompt token budgets (counted with tiktoken)
+    CONTEXT_TOKEN_BUDGET: int = 3000  # Retrieved chunks plus customer/conversation context per product prompt
+    CONTEXT_SECTION_SHARE: float = 0.4  # Most of the context budget customer/conversation sections may take
+    HISTORY_TOKEN_BUDGET: int = 1500  # Stored Q&A pairs replayed into the chat prompt
+    
+    # Semantic answer cache for personalization-free product answers
+    SEMANTIC_CACHE_ENABLED: bool = os.environ.get("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000  # Per tier (similarity tier: per service category)
+    SEMANTIC_CACHE_TTL_SECONDS: int = 3600
+    SEMANTIC_CACHE_SIMILARITY_THRESHOLD: float = 0.95  # Cosine similarity between question embeddings
+    
+    # Product document retrieval
+    VECTOR_STORE_BACKEND: str = os.environ.get("VECTOR_STORE_BACKEND", "chroma")  # "chroma" or "numpy" (memory-mapped in-process index)
+    VECTOR_QUANTIZATION: str = os.environ.get("VECTOR_QUANTIZATION", "float32")  # NumPy index scan precision: "float32", "float16" or "int8"
+    VECTOR_RESCORE_FACTOR: int = 4  # Quantized scans re-score k * factor candidates in float32
+    VECTOR_IVF_ENABLED: bool = os.environ.get("VECTOR_IVF_ENABLED", "false").lower() == "true"  # Partitioned (IVF) search in the NumPy index
+    IVF_MIN_VECTORS: int = 20000  # Below this, brute force is fast enough and exact
+    IVF_LISTS: int = 0  # k-means partitions (0: square root of the vector count)
+    IVF_NPROBE: int = 8  # Partitions scanned per query; higher is slower and more accurate
+    IVF_RETRAIN_GROWTH: float = 4.0  # Retrain centroids once the index grows by this factor
+    RETRIEVAL_K: int = 7  # Chunks returned per similarity search
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = 2000  # Memoized searches, cleared when the index is rebuilt
+    RETRIEVAL_CACHE_TTL_SECONDS: int = 3600
+    HYBRID_RETRIEVAL_ENABLED: bool = os.environ.get("HYBRID_RETRIEVAL_ENABLED", "true").lower() == "true"
+    RRF_K: int = 60  # Reciprocal rank fusion damping constant for BM25 + vector results
+    LEXICAL_FAST_PATH_ENABLED: bool = True  # Answer from BM25 alone, without embedding, when it is confident
+    LEXICAL_FAST_PATH_MIN_COVERAGE: float = 0.9  # Share of the query's IDF weight the top BM25 hit must contain
+    LEXICAL_FAST_PATH_MIN_MARGIN: float = 1.5  # Top BM25 score over the runner-up
+    SEGMENT_ROUTING_ENABLED: bool = True  # Restrict retrieval to the segments named by the question or service category
+    SEGMENT_CENTROID_MARGIN: float = 0.03  # Lead the closest category centroid needs to pick a segment on its own
+    RETRIEVAL_MIN_PARTITION_HITS: int = 3  # Widen to a global search when a segment search returns fewer chunks
+    RETRIEVAL_FALLBACK_MIN_SCORE: float = 0.5  # ...or when its best chunk scores below this (reranker relevance, 0-1)
+    RERANK_ENABLED: bool = os.environ.get("RERANK_ENABLED", "true").lower() == "true"  # Over-fetch, rerank locally and keep the best chunks
+    RERANK_CANDIDATES: int = 10  # Chunks fetched for reranking
+    RERANK_TOP_N: int = 4  # Most chunks kept for the prompt
+    RERANK_MIN_SCORE: float = 0.25  # Reranked chunks below this score are dropped
+    RERANK_MIN_KEEP: int = 2  # Chunks kept even below the score threshold
+    RERANK_TERM_WEIGHT: float = 0.2  # Weight of query term coverage against cosine similarity
+    ADAPTIVE_K_ENABLED: bool = os.environ.get("ADAPTIVE_K_ENABLED", "false").lower() == "true"  # Cut reranked chunks where their scores fall away (off: no gain on benchmarks.retrieval)
+    ADAPTIVE_K_RELATIVE_SCORE: float = 0.6  # Drop chunks scoring below this share of the best chunk
+    ADAPTIVE_K_MIN_GAP: float = 0.15  # Cut at the largest score drop when it is at least this large
+    CENTROID_BLOCK_ROWS: int = 4096  # Chunk embeddings read per page when building the routing centroids
+    INTENT_CENTROID_THRESHOLD: float = 0.80  # Centroid similarity needed to pick the segment of a keyword-flagged product question
+    
+    # Document ingestion
+    CHUNK_SIZE: int = 350  # Tokens per chunk; changing it re-chunks from the extracted-text cache
+    CHUNK_OVERLAP: int = 30  # Tokens repeated between neighbouring chunks
+    DEDUP_ENABLED: bool = True  # Drop near-duplicate chunks (shared boilerplate) at ingestion
+    DEDUP_THRESHOLD: float = 0.85  # Estimated Jaccard similarity of word 5-gram sets that marks a duplicate
+    INGEST_WORKERS: int = int(os.environ.get("INGEST_WORKERS", os.cpu_count() or 1))  # Processes parsing PDFs in parallel
+    INGEST_EMBED_BATCH_SIZE: int = 256  # Chunks per embedding request
+    INGEST_EMBED_BATCH_MAX_TOKENS: int = 100000  # Tokens per embedding request (provider limit is higher)
+    INGEST_EMBED_CONCURRENCY: int = 4  # Embedding requests in flight during ingestion
+    INGEST_EMBED_MAX_RETRIES: int = 6  # Retries per batch, with exponential backoff
+    EMBEDDING_TOKENS_PER_MINUTE: int = int(os.environ.get("EMBEDDING_TOKENS_PER_MINUTE", 1000000))  # Provider TPM limit for the embedding model
+    INGEST_WRITE_BATCH_SIZE: int = 5000  # Vectors per vector store write
+    REINDEX_DRAIN_TIMEOUT_SECONDS: float = 120.0  # Wait for queries on a swapped-out index before deleting its files
+    ADMIN_API_KEY: str = os.environ.get("ADMIN_API_KEY", "")  # Required in X-Admin-Key for /admin endpoints, which are disabled while it is unset
+    
+    # Persistent embedding cache (SQLite, keyed by model name and text hash)
+    EMBEDDING_CACHE_ENABLED: bool = os.environ.get("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH: str = os.environ.get("EMBEDDING_CACHE_PATH", "data/products/embedding_cache.sqlite")
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 5000  # Vectors kept in the in-memory LRU front
+    
+    # Micro-batching of concurrent query embeddings
+    EMBEDDING_BATCH_MAX_SIZE: int = 64  # Flush as soon as this many queries are queued
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # Longest a query waits for others to join its batch
     
     # Redis settings (for future use)
     REDIS_ENABLED: bool = os.environ.get("REDIS_ENABLED", "false").lower() == "true"
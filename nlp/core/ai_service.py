@@ -7,6 +7,8 @@ from langchain.chat_models import ChatOpenAI
 from langchain.chains import LLMChain
 from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
 from config.settings import settings
+from core.chain_registry import ChainRegistry
+from core.prompt_assembly import prompt_cache_tracker
 from core.prompts import get_system_prompt
 from utils.logging_config import logger
 
@@ -26,46 +28,60 @@ class LangChainService:
             temperature=settings.OPENAI_TEMPERATURE,
             max_tokens=settings.OPENAI_MAX_TOKENS
         )
+        self.chain_registry = ChainRegistry()
         logger.info(f"LangChain service initialized with model {settings.OPENAI_MODEL}")
     
-    def prepare_messages(self, service_category: str, messages: List[Any]) -> List[Dict]:
+    def _build_chain(self, service_category: str) -> LLMChain:
         """
-        Prepare messages for LangChain.
+        Compile the prompt template and chain for a service category.
         
         Args:
             service_category: Service category for the prompt
-            messages: List of message objects
             
         Returns:
-            Formatted message history for LangChain
+            LLMChain taking "context" and "input" variables
         """
-        system_prompt = get_system_prompt(service_category)
+        # Escape braces so the static prompt text is never parsed as a variable
+        system_prompt = get_system_prompt(service_category).replace("{", "{{").replace("}", "}}")
         
-        # Start with the system prompt template
-        messages_for_template = [
-            SystemMessagePromptTemplate.from_template(system_prompt)
-        ]
+        chat_prompt = ChatPromptTemplate.from_messages([
+            SystemMessagePromptTemplate.from_template(system_prompt + "{context}"),
+            HumanMessagePromptTemplate.from_template("{input}")
+        ])
         
-        # Extract conversation history
+        return LLMChain(llm=self.llm, prompt=chat_prompt)
+    
+    def get_chain(self, service_category: str) -> LLMChain:
+        """Get the precompiled chain for a service category."""
+        return self.chain_registry.get("conversation", service_category, self._build_chain)
+    
+    def prepare_inputs(self, messages: List[Any]) -> Dict[str, str]:
+        """
+        Prepare template variables for the compiled chain.
+        
+        Args:
+            messages: List of message objects
+            
+        Returns:
+            Values for the "context" and "input" template variables
+        """
+        context_parts = []
         human_messages = []
-        for i, m in enumerate(messages):
+        for m in messages:
             if hasattr(m, 'role') and hasattr(m, 'content'):
-                if m.role == "user":
+                if m.role == "system":
+                    context_parts.append(m.content)
+                elif m.role == "user":
                     human_messages.append(m.content)
         
-        # If there are human messages, add them to the template
-        if human_messages:
-            human_message = " ".join(human_messages)
-            messages_for_template.append(
-                HumanMessagePromptTemplate.from_template("{input}")
-            )
-            return messages_for_template, {"input": human_message}
+        context = ""
+        if context_parts:
+            context = "\n\n" + "\n\n".join(context_parts)
         
-        # Default empty input if no human messages found
-        messages_for_template.append(
-            HumanMessagePromptTemplate.from_template("{input}")
-        )
-        return messages_for_template, {"input": "Hello"}
+        # Default input if no human messages found
+        human_message = " ".join(human_messages) if human_messages else "Hello"
+        
+        return {"context": context, "input": human_message}
     
     async def generate_response(self, service_category: str, messages: List[Any]) -> str:
         """
@@ -79,21 +95,19 @@ class LangChainService:
             Response from the LLM
         """
         try:
-            message_templates, input_values = self.prepare_messages(service_category, messages)
-            
-            # Create a chat prompt template
-            chat_prompt = ChatPromptTemplate.from_messages(message_templates)
-            
-            # Create an LLM chain
-            chain = LLMChain(llm=self.llm, prompt=chat_prompt)
+            chain = self.get_chain(service_category)
+            input_values = self.prepare_inputs(messages)
             
             logger.debug(f"Sending request to LangChain with {len(messages)} messages")
             
-            # Run the chain
-            response = chain.run(**input_values)
+            # Run the chain without blocking the event loop
+            result = await chain.ainvoke(
+                input_values,
+                config={"callbacks": [prompt_cache_tracker.handler(service_category)]}
+            )
             
-            return response
+            return result["text"]
             
         except Exception as e:
             logger.error(f"Error generating response with LangChain: {e}")
-            raise
\ No newline at end of file
+            raise
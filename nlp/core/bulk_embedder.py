@@ -0,0 +1,182 @@
+"""
+Rate-limited bulk embedding of document chunks for the Bank of Kigali AI Assistant.
+Large batches are sent concurrently under a tokens-per-minute budget and retried with
+backoff; with a CachedEmbeddings model every finished batch is a checkpoint.
+"""
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from core.context_builder import default_token_counter
+from core.embedding_cache import CachedEmbeddings
+from utils.logging_config import logger
+
+class TokenBucket:
+    """Async token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, tokens_per_minute: int):
+        """
+        Initialize a full bucket.
+
+        Args:
+            tokens_per_minute: Budget per minute, which is also the burst capacity
+        """
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until the budget allows spending tokens (requests above capacity wait for a full bucket)."""
+        tokens = min(float(tokens), self.capacity)
+        # Callers queue on the lock so a large batch is not starved by smaller ones
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                delay = (tokens - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self.tokens -= tokens
+
+class BulkEmbedder:
+    """Embeds many texts in concurrent, token-budgeted batches with retry and backoff."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = settings.INGEST_EMBED_BATCH_SIZE,
+        batch_max_tokens: int = settings.INGEST_EMBED_BATCH_MAX_TOKENS,
+        concurrency: int = settings.INGEST_EMBED_CONCURRENCY,
+        tokens_per_minute: int = settings.EMBEDDING_TOKENS_PER_MINUTE,
+        max_retries: int = settings.INGEST_EMBED_MAX_RETRIES,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0
+    ):
+        """
+        Initialize the embedder.
+
+        Args:
+            embeddings: Embeddings model (a CachedEmbeddings model makes finished batches resumable)
+            batch_size: Maximum texts per request
+            batch_max_tokens: Maximum tokens per request
+            concurrency: Requests in flight at once
+            tokens_per_minute: Provider token budget
+            max_retries: Retries per batch before the run fails
+            backoff_seconds: First retry delay, doubled on each attempt
+            max_backoff_seconds: Longest retry delay
+        """
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.batch_max_tokens = batch_max_tokens
+        self.concurrency = concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.last_run: Dict[str, Any] = {}
+        self.progress: Dict[str, int] = {"batches_done": 0, "batches_total": 0}
+
+    def make_batches(self, indexes: Sequence[int], token_counts: Sequence[int]) -> List[List[int]]:
+        """Group text indexes into batches bounded by count and tokens."""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for i in indexes:
+            if current and (len(current) >= self.batch_size or current_tokens + token_counts[i] > self.batch_max_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += token_counts[i]
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch(self, texts: List[str], tokens: int, bucket: TokenBucket, semaphore: asyncio.Semaphore) -> List[List[float]]:
+        """Embed one batch, retrying with exponential backoff and jitter."""
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire(tokens)
+            async with semaphore:
+                try:
+                    return await self.embeddings.aembed_documents(texts)
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+                    delay *= 0.5 + random.random() / 2
+                    logger.warning(f"Embedding batch of {len(texts)} failed ({e}), retry {attempt + 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def aembed_documents(self, texts: List[str], token_counts: Optional[Sequence[int]] = None) -> List[List[float]]:
+        """
+        Embed texts in concurrent batches.
+
+        Args:
+            texts: Texts to embed
+            token_counts: Token count per text (counted with tiktoken if omitted)
+
+        Returns:
+            One vector per text, in order
+        """
+        started = time.perf_counter()
+        if token_counts is None:
+            token_counts = [default_token_counter.count(text) for text in texts]
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+
+        # Vectors checkpointed by an earlier (possibly failed) run cost no budget
+        if isinstance(self.embeddings, CachedEmbeddings):
+            for i, vector in enumerate(self.embeddings.get_cached(texts)):
+                vectors[i] = vector
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        batches = self.make_batches(missing, token_counts)
+        bucket = TokenBucket(self.tokens_per_minute)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self.progress = {"batches_done": 0, "batches_total": len(batches)}
+
+        async def run(batch: List[int]) -> None:
+            result = await self._embed_batch(
+                [texts[i] for i in batch], sum(token_counts[i] for i in batch), bucket, semaphore
+            )
+            for i, vector in zip(batch, result):
+                vectors[i] = vector
+            self.progress["batches_done"] += 1
+            done = self.progress["batches_done"]
+            if done % 10 == 0 or done == len(batches):
+                logger.info(f"Embedded {done}/{len(batches)} batches")
+
+        await asyncio.gather(*(run(batch) for batch in batches))
+
+        self.last_run = {
+            "texts": len(texts),
+            "resumed": len(texts) - len(missing),
+            "embedded": len(missing),
+            "batches": len(batches),
+            "tokens": sum(token_counts[i] for i in missing),
+            "rate_limit_wait_seconds": round(bucket.waited, 2),
+            "seconds": round(time.perf_counter() - started, 2)
+        }
+        logger.info(f"Bulk embedding: {self.last_run}")
+        return vectors
+
+    def embed_documents(self, texts: List[str], token_counts: Optional[Sequence[int]] = None) -> List[List[float]]:
+        """Sync version of aembed_documents; runs on a private event loop if one is already running."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.aembed_documents(texts, token_counts))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.aembed_documents(texts, token_counts)).result()
@@ -0,0 +1,62 @@
+"""
+Registry of precompiled prompt templates and chains for the Bank of Kigali AI Assistant.
+Chains are compiled once (per service category when their prompt depends on it); per-request
+data is passed as template variables.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.logging_config import logger
+
+class ChainRegistry:
+    """
+    Thread-safe cache of compiled chains keyed by chain name and, for chains whose
+    prompt depends on it, service category.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._chains: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, service_category: Optional[str], builder: Callable[..., Any]) -> Any:
+        """
+        Get a compiled chain, building it on first use.
+
+        Args:
+            name: Name of the chain family (e.g. "product_qa")
+            service_category: Service category the chain is compiled for, or None for a
+                chain shared by all categories
+            builder: Callable that compiles the chain; it receives the service category
+                unless that is None
+
+        Returns:
+            The compiled chain
+        """
+        key = (name, service_category)
+        chain = self._chains.get(key)
+        if chain is not None:
+            return chain
+
+        with self._lock:
+            chain = self._chains.get(key)
+            if chain is None:
+                chain = builder(service_category) if service_category is not None else builder()
+                self._chains[key] = chain
+                if service_category is None:
+                    logger.info(f"Compiled '{name}' chain")
+                else:
+                    logger.info(f"Compiled '{name}' chain for service category '{service_category}'")
+
+        return chain
+
+    def compiled(self) -> List[Tuple[str, Optional[str]]]:
+        """List the (chain name, service category or None) pairs compiled so far."""
+        with self._lock:
+            return list(self._chains.keys())
+
+    def clear(self) -> None:
+        """Drop all compiled chains so they are rebuilt on next use."""
+        with self._lock:
+            self._chains.clear()
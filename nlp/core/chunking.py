@@ -0,0 +1,132 @@
+"""
+Token-aware chunking of product document pages for the Bank of Kigali AI Assistant.
+Chunks are sized in tokens and split at headings first, then paragraphs, keeping table rows together.
+"""
+
+import re
+from typing import List, Optional
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+from config.settings import settings
+from core.context_builder import TokenCounter, default_token_counter
+
+# A heading line: numbered ("2.1 Eligibility", "A. Fees") or short and upper case ("INTEREST RATES:")
+HEADING_LINE = r"(?:(?:\d+(?:\.\d+)*\.?|[A-Z]\.)[ \t]+[A-Z][^\n]{0,80}|[A-Z][A-Z0-9 &/,()'\-]{2,80}:?)[ \t]*(?=\n|$)"
+HEADING_PATTERN = re.compile(rf"^{HEADING_LINE}", re.MULTILINE)
+
+# A table row as PDF text extraction renders it: cells separated by tabs, pipes or runs of spaces
+TABLE_ROW = r"[^\n]*(?:\t|\||\S {2,}\S)[^\n]*"
+
+# Tried in order, so a chunk breaks at a heading before a paragraph, a paragraph before a line,
+# and never between two table rows unless a single table is larger than a chunk
+CHUNK_SEPARATORS = [
+    rf"\n+(?={HEADING_LINE})",
+    r"\n[ \t]*\n",
+    rf"\n(?!{TABLE_ROW})",
+    r"\n",
+    r"(?<=[.!?])\s+",
+    r"\s+",
+    ""
+]
+
+def make_text_splitter(
+    chunk_tokens: int = settings.CHUNK_SIZE,
+    overlap_tokens: int = settings.CHUNK_OVERLAP,
+    token_counter: Optional[TokenCounter] = None
+) -> RecursiveCharacterTextSplitter:
+    """
+    Splitter that measures chunks in prompt tokens and prefers structural boundaries.
+
+    Args:
+        chunk_tokens: Maximum tokens per chunk
+        overlap_tokens: Tokens repeated between neighbouring chunks
+        token_counter: Counter to use (defaults to the shared counter)
+
+    Returns:
+        RecursiveCharacterTextSplitter (split_pages records where each chunk starts)
+    """
+    counter = token_counter or default_token_counter
+    # No add_start_index: LangChain locates chunks by stepping back chunk_overlap characters,
+    # which with a token length function misses chunks; split_pages finds offsets itself
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens,
+        chunk_overlap=overlap_tokens,
+        length_function=counter.count,
+        separators=CHUNK_SEPARATORS,
+        is_separator_regex=True,
+        keep_separator="start"
+    )
+
+def chunk_offsets(text: str, chunks: List[str]) -> List[int]:
+    """
+    Character offset of each chunk in the text it was split from.
+
+    Chunks come in order and each starts after the previous one; one that overlaps its
+    predecessor starts no earlier than len(chunk) before the predecessor ends.
+
+    Args:
+        text: The split text
+        chunks: Its chunks, in order
+
+    Returns:
+        Offset per chunk, or -1 for a chunk not found verbatim
+    """
+    offsets: List[int] = []
+    start, end = -1, 0
+    for chunk in chunks:
+        position = text.find(chunk, max(start + 1, end - len(chunk)))
+        if position < 0:
+            position = text.find(chunk)
+        offsets.append(position)
+        if position >= 0:
+            start, end = position, position + len(chunk)
+    return offsets
+
+def section_at(text: str, position: int) -> Optional[str]:
+    """The last heading in the text starting at or before a position, if any."""
+    section = None
+    for match in HEADING_PATTERN.finditer(text):
+        if match.start() > position:
+            break
+        section = match.group(0).strip().rstrip(":")
+    return section
+
+def split_pages(pages: List[Document], splitter: Optional[RecursiveCharacterTextSplitter] = None) -> List[Document]:
+    """
+    Split page documents into chunks tagged with the section heading they fall under.
+
+    Args:
+        pages: One document per PDF page
+        splitter: Splitter to use (defaults to make_text_splitter())
+
+    Returns:
+        Chunks with section (when the page has a heading above them) and start_index metadata
+    """
+    splitter = splitter or make_text_splitter()
+    chunks: List[Document] = []
+    for page in pages:
+        heading: Optional[Document] = None
+        page_chunks = splitter.split_documents([page])
+        offsets = chunk_offsets(page.page_content, [chunk.page_content for chunk in page_chunks])
+        for chunk, offset in zip(page_chunks, offsets):
+            if offset >= 0:
+                chunk.metadata["start_index"] = offset
+            # A heading split off from a long section opens the section's first chunk instead
+            if HEADING_PATTERN.fullmatch(chunk.page_content):
+                if heading is not None:
+                    chunks.append(heading)
+                heading = chunk
+                continue
+            if heading is not None:
+                chunk.page_content = f"{heading.page_content}\n{chunk.page_content}"
+                chunk.metadata["start_index"] = heading.metadata.get("start_index", 0)
+                heading = None
+            section = section_at(page.page_content, chunk.metadata.get("start_index", 0))
+            if section:
+                chunk.metadata["section"] = section
+            chunks.append(chunk)
+        if heading is not None:
+            chunks.append(heading)
+    return chunks
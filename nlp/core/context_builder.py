@@ -0,0 +1,201 @@
+"""
+Token-budgeted context builder for the Bank of Kigali AI Assistant.
+Counts tokens with tiktoken and packs customer info, conversation history and
+retrieved chunks into a fixed budget by priority.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from config.settings import settings
+from utils.logging_config import logger
+
+class TokenCounter:
+    """Counts prompt tokens with tiktoken, caching counts per text."""
+
+    # Rough characters-per-token ratio used when tiktoken encodings are unavailable
+    FALLBACK_CHARS_PER_TOKEN = 4
+
+    def __init__(self, model_name: str = settings.OPENAI_MODEL, cache_size: int = 10000):
+        """
+        Initialize the token counter.
+
+        Args:
+            model_name: Model whose tokenizer should be used
+            cache_size: Maximum number of distinct texts whose counts are cached
+        """
+        self.model_name = model_name
+        self._encoding = None
+        self._encoding_loaded = False
+        self._count_cached = lru_cache(maxsize=cache_size)(self._count)
+
+    def _get_encoding(self):
+        """Load the tiktoken encoding on first use; None if it cannot be loaded."""
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            try:
+                import tiktoken
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model_name)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                logger.warning(f"tiktoken encoding unavailable, estimating token counts: {e}")
+                self._encoding = None
+        return self._encoding
+
+    def _count(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is None:
+            return (len(text) + self.FALLBACK_CHARS_PER_TOKEN - 1) // self.FALLBACK_CHARS_PER_TOKEN
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def count(self, text: Optional[str]) -> int:
+        """Count the tokens in a text."""
+        if not text:
+            return 0
+        return self._count_cached(text)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """The longest start of a text that fits in max_tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        encoding = self._get_encoding()
+        if encoding is None:
+            return text[:max_tokens * self.FALLBACK_CHARS_PER_TOKEN]
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+    def count_pair(self, pair: Any) -> int:
+        """Count the tokens of a stored Q&A pair, caching the result on the pair."""
+        if getattr(pair, "token_count", None) is None:
+            pair.token_count = self.count(pair.question) + self.count(pair.answer)
+        return pair.token_count
+
+    def count_document(self, doc: Any) -> int:
+        """Count the tokens of a retrieved chunk, preferring the count stored at ingestion."""
+        token_count = doc.metadata.get("token_count")
+        if token_count is None:
+            token_count = self.count(doc.page_content)
+        return token_count
+
+@dataclass
+class PackedContext:
+    """Result of packing context into a token budget."""
+
+    sections: List[str] = field(default_factory=list)
+    pairs: List[Any] = field(default_factory=list)
+    chunks: List[Any] = field(default_factory=list)
+    used_tokens: int = 0
+    budget: int = 0
+    dropped_pairs: int = 0
+    dropped_chunks: int = 0
+    trimmed_sections: int = 0
+
+class ContextBuilder:
+    """
+    Packs prompt context into a token budget by priority:
+    fixed sections (customer info, conversation context) up to their own cap, the top
+    retrieved chunk, the latest Q&A pair, the other chunks in rank order, then older
+    Q&A pairs newest first.
+    """
+
+    def __init__(self, token_counter: Optional[TokenCounter] = None):
+        """
+        Initialize the context builder.
+
+        Args:
+            token_counter: Counter to use (defaults to the shared counter)
+        """
+        self.token_counter = token_counter or default_token_counter
+
+    def build(
+        self,
+        budget: int,
+        sections: Optional[List[str]] = None,
+        pairs: Optional[List[Any]] = None,
+        chunks: Optional[List[Any]] = None,
+        section_share: float = settings.CONTEXT_SECTION_SHARE
+    ) -> PackedContext:
+        """
+        Select the context that fits in the budget.
+
+        Sections are kept, but together they may use at most section_share of the
+        budget, and never so much that the top chunk no longer fits; past that,
+        later sections are cut short first.
+
+        Args:
+            budget: Maximum number of tokens for the packed context
+            sections: Fixed text sections in priority order
+            pairs: Stored Q&A pairs in chronological order
+            chunks: Retrieved documents in rank order
+            section_share: Share of the budget the sections may take
+
+        Returns:
+            PackedContext with the selected items in their original order; sections
+            keep their positions (empty or trimmed) so callers can map them back
+        """
+        sections = list(sections or [])
+        pairs = pairs or []
+        chunks = chunks or []
+
+        chunk_tokens = [self.token_counter.count_document(doc) for doc in chunks]
+        section_cap = int(budget * section_share)
+        if chunk_tokens:
+            section_cap = max(0, min(section_cap, budget - chunk_tokens[0]))
+        used = 0
+        trimmed = 0
+        for i, section in enumerate(sections):
+            tokens = self.token_counter.count(section)
+            if used + tokens > section_cap:
+                sections[i] = self.token_counter.truncate(section, section_cap - used)
+                tokens = self.token_counter.count(sections[i])
+                trimmed += 1
+            used += tokens
+
+        # Candidates in priority order: (kind, index, tokens)
+        candidates = []
+        if chunks:
+            candidates.append(("chunk", 0, chunk_tokens[0]))
+        if pairs:
+            candidates.append(("pair", len(pairs) - 1, self.token_counter.count_pair(pairs[-1])))
+        for i in range(1, len(chunks)):
+            candidates.append(("chunk", i, chunk_tokens[i]))
+        for i in range(len(pairs) - 2, -1, -1):
+            candidates.append(("pair", i, self.token_counter.count_pair(pairs[i])))
+
+        kept_pairs, kept_chunks = set(), set()
+        history_full = False
+        for kind, index, tokens in candidates:
+            if kind == "pair" and history_full:
+                continue
+            if used + tokens > budget:
+                # Never leave a gap in the history: once a pair is dropped, so are older ones
+                history_full = history_full or kind == "pair"
+                continue
+            used += tokens
+            (kept_pairs if kind == "pair" else kept_chunks).add(index)
+
+        packed = PackedContext(
+            sections=sections,
+            pairs=[p for i, p in enumerate(pairs) if i in kept_pairs],
+            chunks=[d for i, d in enumerate(chunks) if i in kept_chunks],
+            used_tokens=used,
+            budget=budget,
+            dropped_pairs=len(pairs) - len(kept_pairs),
+            dropped_chunks=len(chunks) - len(kept_chunks),
+            trimmed_sections=trimmed
+        )
+
+        if packed.dropped_pairs or packed.dropped_chunks or packed.trimmed_sections:
+            logger.debug(
+                f"Context packed to {used}/{budget} tokens, dropped {packed.dropped_pairs} pairs "
+                f"and {packed.dropped_chunks} chunks, trimmed {packed.trimmed_sections} sections"
+            )
+
+        return packed
+
+# Shared counter so cached counts are reused across services
+default_token_counter = TokenCounter()
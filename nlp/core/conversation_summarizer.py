@@ -0,0 +1,118 @@
+"""
+Incremental rolling conversation summaries for the Bank of Kigali AI Assistant.
+Pairs evicted from the message store are folded into a per-user summary after the response is sent.
+"""
+
+import asyncio
+from typing import Dict, List
+
+from langchain.chains import LLMChain
+from langchain_community.chat_models import ChatOpenAI
+from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
+
+from config.settings import settings
+from core.prompts import CONVERSATION_SUMMARY_TEMPLATE
+from utils.logging_config import logger
+
+class ConversationSummarizer:
+    """Folds evicted conversation pairs into a compact rolling summary using a cheap model."""
+
+    def __init__(
+        self,
+        message_store,
+        api_key: str = settings.OPENAI_API_KEY,
+        model_name: str = settings.CONVERSATION_SUMMARY_MODEL,
+        max_words: int = settings.CONVERSATION_SUMMARY_LENGTH
+    ):
+        """
+        Initialize the summarizer.
+
+        Args:
+            message_store: EnhancedMessageStore holding evicted pairs and summaries
+            api_key: OpenAI API key
+            model_name: Model used for summarization
+            max_words: Maximum number of words in a summary
+        """
+        self.message_store = message_store
+        self.max_words = max_words
+        self.llm = ChatOpenAI(
+            openai_api_key=api_key,
+            model_name=model_name,
+            temperature=0,
+            max_tokens=max_words * 2
+        )
+        self.chain = LLMChain(
+            llm=self.llm,
+            prompt=ChatPromptTemplate.from_messages([
+                HumanMessagePromptTemplate.from_template(CONVERSATION_SUMMARY_TEMPLATE)
+            ])
+        )
+        self._user_locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}  # Tasks holding or waiting for each user's lock
+
+        logger.info(f"Conversation summarizer initialized with model {model_name}")
+
+    def _format_pairs(self, pairs: List) -> str:
+        """Format evicted pairs as a transcript."""
+        lines = []
+        for pair in pairs:
+            lines.append(f"User: {pair.question}")
+            lines.append(f"Assistant: {pair.answer}")
+        return "\n".join(lines)
+
+    def _normalize(self, summary: str) -> str:
+        """Collapse the summary to one line within the word limit."""
+        words = summary.split()
+        if len(words) > self.max_words:
+            words = words[:self.max_words]
+        return " ".join(words)
+
+    async def summarize_evicted(self, user_id: str) -> None:
+        """
+        Fold any pairs evicted for a user into their rolling summary.
+        Intended to run as a background task after the response has been sent.
+
+        Args:
+            user_id: Unique identifier for the user
+        """
+        lock = self._user_locks.setdefault(user_id, asyncio.Lock())
+        self._lock_users[user_id] = self._lock_users.get(user_id, 0) + 1
+
+        try:
+            # Serialize per user so concurrent evictions build on each other's summary
+            async with lock:
+                await self._fold_evicted(user_id)
+        finally:
+            # Drop idle locks so the dict does not grow with every user ever seen
+            self._lock_users[user_id] -= 1
+            if not self._lock_users[user_id]:
+                del self._lock_users[user_id]
+                self._user_locks.pop(user_id, None)
+
+    async def _fold_evicted(self, user_id: str) -> None:
+        """Summarize a user's evicted pairs; on failure they are put back for the next run."""
+        pairs = self.message_store.pop_evicted_pairs(user_id)
+        if not pairs:
+            return
+
+        previous_summary = self.message_store.get_conversation_summary(user_id) or "(none yet)"
+
+        try:
+            result = await self.chain.ainvoke({
+                "previous_summary": previous_summary,
+                "new_turns": self._format_pairs(pairs),
+                "max_words": self.max_words
+            })
+            summary = self._normalize(result.get("text", ""))
+        except Exception as e:
+            logger.error(f"Error summarizing conversation for user {user_id}, keeping {len(pairs)} pairs for retry: {e}")
+            self.message_store.restore_evicted_pairs(user_id, pairs)
+            return
+
+        if not summary:
+            logger.warning(f"Empty conversation summary for user {user_id}, keeping {len(pairs)} pairs for retry")
+            self.message_store.restore_evicted_pairs(user_id, pairs)
+            return
+
+        self.message_store.set_conversation_summary(user_id, summary)
+        logger.info(f"Updated conversation summary for user {user_id} with {len(pairs)} evicted pairs")
@@ -0,0 +1,143 @@
+"""
+Near-duplicate chunk detection for the Bank of Kigali AI Assistant.
+Chunks are compared by MinHash signatures of their word shingles, with LSH banding so
+each chunk is only checked against the few canonical chunks that share a band (and category) with it.
+"""
+
+import re
+from collections import defaultdict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import mmh3
+import numpy as np
+
+from config.settings import settings
+
+WORD_PATTERN = re.compile(r"\w+")
+MERSENNE_PRIME = (1 << 31) - 1  # Keeps a * h + b below 2**62, so uint64 never overflows
+
+def shingles(text: str, size: int = 5) -> List[str]:
+    """Overlapping word n-grams of a lowercased text; short texts give a single shingle."""
+    words = WORD_PATTERN.findall((text or "").lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+class NearDuplicateDetector:
+    """Maps each chunk to an earlier chunk it nearly duplicates, by estimated Jaccard similarity."""
+
+    def __init__(
+        self,
+        threshold: float = settings.DEDUP_THRESHOLD,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1
+    ):
+        """
+        Initialize the detector.
+
+        Args:
+            threshold: Estimated Jaccard similarity of shingle sets at which chunks are duplicates
+            num_perm: MinHash signature length
+            bands: LSH bands; num_perm / bands rows each (16 x 8 finds 0.85-similar pairs >99% of the time)
+            shingle_size: Words per shingle
+            seed: Seed for the hash permutations, fixed so signatures are reproducible
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text, or None if it has no words."""
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return None
+        hashes = np.fromiter((mmh3.hash(gram, signed=False) for gram in grams), dtype=np.uint64, count=len(grams))
+        hashes %= MERSENNE_PRIME
+        return ((self._a * hashes[None, :] + self._b) % MERSENNE_PRIME).min(axis=1)
+
+    def find_duplicates(
+        self,
+        texts: Sequence[str],
+        existing_texts: Sequence[str] = (),
+        groups: Optional[Sequence[Hashable]] = None,
+        existing_groups: Optional[Sequence[Hashable]] = None
+    ) -> List[Optional[int]]:
+        """
+        Find the canonical chunk each new chunk duplicates.
+
+        Existing chunks are always canonical; new chunks are taken in order, so the first
+        of a group of duplicates is kept. Duplicates are only matched against canonical
+        chunks, so similarity never chains across a group.
+
+        Args:
+            texts: New chunk texts
+            existing_texts: Texts already in the index
+            groups: Per new text, a key (such as its category) that a canonical chunk must share
+            existing_groups: The same key per existing text
+
+        Returns:
+            Per new text, the index of its canonical chunk in existing_texts + texts, or None
+        """
+        buckets: List[Dict[Tuple[Hashable, bytes], List[int]]] = [defaultdict(list) for _ in range(self.bands)]
+        signatures: Dict[int, np.ndarray] = {}
+
+        def band_keys(signature: np.ndarray, group: Hashable) -> List[Tuple[Hashable, bytes]]:
+            return [(group, signature[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(self.bands)]
+
+        def register(index: int, signature: np.ndarray, group: Hashable) -> None:
+            signatures[index] = signature
+            for band, key in enumerate(band_keys(signature, group)):
+                buckets[band][key].append(index)
+
+        for index, text in enumerate(existing_texts):
+            signature = self.signature(text)
+            if signature is not None:
+                register(index, signature, existing_groups[index] if existing_groups is not None else None)
+
+        canonical: List[Optional[int]] = []
+        offset = len(existing_texts)
+        for position, text in enumerate(texts):
+            signature = self.signature(text)
+            if signature is None:
+                canonical.append(None)
+                continue
+            group = groups[position] if groups is not None else None
+            candidates = {
+                other for band, key in enumerate(band_keys(signature, group)) for other in buckets[band].get(key, ())
+            }
+            best: Tuple[float, Optional[int]] = (0.0, None)
+            for other in sorted(candidates):
+                similarity = float(np.mean(signatures[other] == signature))
+                if similarity >= self.threshold and similarity > best[0]:
+                    best = (similarity, other)
+            canonical.append(best[1])
+            if best[1] is None:
+                register(offset + position, signature, group)
+        return canonical
+
+def merge_duplicate_metadata(canonical: Dict[str, Any], duplicate: Dict[str, Any]) -> None:
+    """
+    Record a dropped duplicate on its canonical chunk's metadata.
+
+    Sources are kept as a comma-separated string because Chroma metadata values
+    must be scalars. Duplicates share the canonical chunk's category, so category
+    filters still find the kept copy.
+
+    Args:
+        canonical: Metadata of the kept chunk, updated in place
+        duplicate: Metadata of the dropped chunk
+    """
+    canonical["duplicate_count"] = canonical.get("duplicate_count", 0) + 1
+    value = duplicate.get("filename")
+    merged = [item for item in canonical.get("duplicate_sources", "").split(", ") if item]
+    if value and value != canonical.get("filename") and value not in merged:
+        canonical["duplicate_sources"] = ", ".join(merged + [value])
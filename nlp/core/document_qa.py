@@ -3,24 +3,79 @@ Enhanced Document-Based AI Service with improved personalization and context han
 """
 
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
-from langchain.chains import RetrievalQA
+from langchain.chains.combine_documents.stuff import StuffDocumentsChain
+from langchain.chains.question_answering import load_qa_chain
 from langchain_community.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
+from langchain_core.documents import Document
 
 # Import existing components
 from config.settings import settings
 from utils.logging_config import logger
-from core.prompts import get_system_prompt
+from core.ai_service import LangChainService
+from core.chain_registry import ChainRegistry
+from core.intent_router import CentroidRouter, intent_router
+from core.embedding_batcher import EmbeddingMicroBatcher
+from core.bulk_embedder import BulkEmbedder
+from core.embedding_cache import CachedEmbeddings
+from core.context_builder import ContextBuilder, default_token_counter
+from core.chunking import split_pages
+from core.dedup import NearDuplicateDetector, merge_duplicate_metadata
+from core.prompt_assembly import prompt_cache_tracker
+from core.numpy_vector_store import NumpyVectorStore
+from core.reindex import ReindexManager, active_index_directory
+from core.reranker import LocalReranker
+from core.ingestion import (
+    MANIFEST_FILE, ExtractedTextCache, IngestionManifest, IngestionReport, SourceFile,
+    chunk_ids_for, extract_pages, scan_source_files
+)
+from core.lexical_index import BM25Index, LexicalResult
+from core.retrieval import (
+    CachedRetriever, RetrievalCache, choose_segments, metadata_matches, reciprocal_rank_fusion, segment_filter
+)
+from core.semantic_cache import CachedAnswer, SemanticAnswerCache
+from core.single_flight import SingleFlight
+from utils.text_utils import normalize_question
+from core.prompts import PRODUCT_QA_SYSTEM_TEMPLATE
 from api.models import ChatMessage
 
 
+def personalize_response(
+    response: str,
+    user_info: Optional[Dict[str, str]],
+    default_greeting: str = "Hello",
+    opening_greetings: Tuple[str, ...] = ("Hello", "Hi", "Good", "Welcome")
+) -> str:
+    """Make sure a response addresses the customer by name when it is known."""
+    if not user_info or not user_info.get("name"):
+        return response
+    
+    name = user_info["name"]
+    # If name isn't used in the response, add it appropriately
+    if name.lower() in response.lower():
+        return response
+    
+    # Add greeting with name if response doesn't start with one
+    if not any(response.startswith(greeting) for greeting in opening_greetings):
+        return f"{default_greeting} {name}, " + response
+    
+    # Insert name into existing greeting
+    for greeting in ["Hello", "Hi"]:
+        if response.startswith(greeting):
+            return response.replace(greeting, f"{greeting} {name}", 1)
+    
+    return response
+
+
 class ProductQAService:
     """Enhanced Question answering service for Bank of Kigali product information."""
     
@@ -33,86 +88,149 @@ class ProductQAService:
             temperature=0.7,
             max_tokens=settings.OPENAI_MAX_TOKENS
         )
+        self.chain_registry = ChainRegistry()
+        self.context_builder = ContextBuilder()
+        self.answer_cache = SemanticAnswerCache() if settings.SEMANTIC_CACHE_ENABLED else None
         
         logger.info("Product QA service initialized")
     
-    def create_qa_chain(self, user_info=None, conversation_context=None) -> RetrievalQA:
-        """Create a QA chain for product queries with enhanced context."""
-        retriever = self.document_processor.get_retriever()
+    def _build_qa_chain(self) -> StuffDocumentsChain:
+        """Compile the stuff-documents QA chain (its prompt is the same for every service category)."""
+        prompt = ChatPromptTemplate.from_messages([
+            SystemMessagePromptTemplate.from_template(PRODUCT_QA_SYSTEM_TEMPLATE),
+            HumanMessagePromptTemplate.from_template("{question}")
+        ])
         
-        system_template = """You are ALICE, Bank of Kigali's AI assistant specializing in product information.
-
-Use the following pieces of context to answer the customer's question about Bank of Kigali products and services.
-Always be helpful, professional, and personalized when possible.
-IMPORTANT: When you have customer information (name, account, etc.) from the conversation context, use it naturally in your responses. Do not claim you don't have access to information that is clearly provided in the context."""
-
-        # Add conversation context if available
+        return load_qa_chain(self.llm, chain_type="stuff", prompt=prompt)
+    
+    def get_qa_chain(self) -> StuffDocumentsChain:
+        """Get the precompiled QA chain, shared by all service categories."""
+        return self.chain_registry.get("product_qa", None, self._build_qa_chain)
+    
+    def build_prompt_variables(self, user_info=None, conversation_context=None) -> Dict[str, str]:
+        """Format the per-request parts of the QA prompt as template variables."""
+        conversation_section = ""
         if conversation_context:
-            system_template += f"\n\nCONVERSATION CONTEXT:\n{conversation_context}\n"
+            conversation_section = f"\n\nCONVERSATION CONTEXT:\n{conversation_context}\n"
         
-        # Add personalization
+        customer_lines = []
         if user_info:
             if "name" in user_info:
-                system_template += f"\nThe customer's name is {user_info['name']}. Address them by name naturally throughout your response.\n"
+                customer_lines.append(f"The customer's name is {user_info['name']}. Address them by name naturally throughout your response.")
             
             if "account_number" in user_info:
-                system_template += f"Account number: {user_info['account_number']}\n"
+                customer_lines.append(f"Account number: {user_info['account_number']}")
             
             if "customer_id" in user_info:
-                system_template += f"Customer ID: {user_info['customer_id']}\n"
-        
-        system_template += """
-Important guidelines:
-1. Reference the conversation context to maintain continuity
-2. Use the customer's name naturally when responding
-3. Connect your answer to their previous questions when relevant
-4. Be specific about product features and requirements
-5. Suggest related products when appropriate
-6. Always be warm and professional
-
-If you don't have specific information, be honest but offer to help find alternatives or connect them with a specialist.
-
-{context}
-"""
+                customer_lines.append(f"Customer ID: {user_info['customer_id']}")
         
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessagePromptTemplate.from_template(system_template),
-            HumanMessagePromptTemplate.from_template("{question}")
-        ])
+        customer_section = ""
+        if customer_lines:
+            customer_section = "\nCUSTOMER INFORMATION:\n" + "\n".join(customer_lines) + "\n"
         
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=retriever,
-            chain_type_kwargs={"prompt": prompt},
-            return_source_documents=True
-        )
+        return {
+            "conversation_section": conversation_section,
+            "customer_section": customer_section
+        }
+    
+    async def _lookup_cached_answer(self, question: str, service_category: str, query_vector=None, embed: bool = True):
+        """Look up a cached answer, exact match first, then by question embedding unless embedding is disallowed."""
+        self.answer_cache.check_index_version(self.document_processor.index_version)
+        
+        cached = self.answer_cache.get_exact(service_category, question)
+        if cached is not None:
+            return cached, query_vector
+        
+        if query_vector is None:
+            if not embed:
+                return None, None
+            try:
+                query_vector = await self.document_processor.query_embeddings.aembed_query(question)
+            except Exception as e:
+                logger.warning(f"Could not embed question for answer cache lookup: {e}")
+                return None, None
+        
+        return self.answer_cache.get_similar(service_category, query_vector), query_vector
     
-        return qa_chain
+    def _needs_global_fallback(self, question: str, docs: List[Document], query_vector=None) -> bool:
+        """Whether segment-restricted results are too few or too weak to answer from."""
+        if len(docs) < settings.RETRIEVAL_MIN_PARTITION_HITS:
+            return True
+        # Score only the leading chunks: confidence comes from the best of them
+        best = max(self.document_processor.reranker.score(question, docs[:3], query_vector))
+        return best < settings.RETRIEVAL_FALLBACK_MIN_SCORE
     
-    async def answer_product_question(self, question: str, user_info=None, conversation_context=None) -> Dict[str, Any]:
-        """Answer a product-related question with enhanced personalization."""
-        qa_chain = self.create_qa_chain(user_info, conversation_context)
+    async def answer_product_question(
+        self,
+        question: str,
+        user_info=None,
+        conversation_context=None,
+        service_category: str = "general",
+        query_vector=None,
+        retrieved_docs=None,
+        search_filter=None
+    ) -> Dict[str, Any]:
+        """
+        Answer a product-related question with enhanced personalization.
+        
+        The query_vector computed earlier in the turn is reused for the answer cache
+        and the vector search, so the question is embedded at most once. When
+        retrieved_docs come from the lexical fast path, nothing is embedded.
+        search_filter restricts retrieval to the customer segments chosen by routing.
+        """
+        qa_chain = self.get_qa_chain()
+        
+        # Only answers that do not depend on the customer are shared through the cache
+        cacheable = self.answer_cache is not None and not user_info and not conversation_context
+        
+        if cacheable:
+            cached, query_vector = await self._lookup_cached_answer(
+                question, service_category, query_vector, embed=retrieved_docs is None
+            )
+            if cached is not None:
+                return {
+                    "answer": cached.answer,
+                    "sources": cached.sources
+                }
         
         try:
-            result = qa_chain({"query": question})
-            answer = result.get("result", "")
-            source_docs = result.get("source_documents", [])
+            if retrieved_docs is None:
+                # Over-fetch when reranking; the reranker keeps only the best few
+                fetch_k = settings.RERANK_CANDIDATES if settings.RERANK_ENABLED else settings.RETRIEVAL_K
+                retrieved_docs = await self.document_processor.asearch(
+                    question, k=fetch_k, search_filter=search_filter, query_vector=query_vector
+                )
+                if search_filter and self._needs_global_fallback(question, retrieved_docs, query_vector):
+                    # Too little, or nothing relevant, in the chosen segments: widen to the whole store
+                    logger.debug(f"Weak results for {search_filter}, falling back to global search")
+                    global_docs = await self.document_processor.asearch(question, k=fetch_k, query_vector=query_vector)
+                    retrieved_docs = reciprocal_rank_fusion([retrieved_docs, global_docs], limit=fetch_k)
+            if settings.RERANK_ENABLED:
+                retrieved_docs = self.document_processor.reranker.rerank(question, retrieved_docs, query_vector).documents
+            prompt_variables = self.build_prompt_variables(user_info, conversation_context)
+            
+            # Keep the question and customer and conversation context (capped so the top chunk
+            # always fits, conversation context trimmed first), then fill the budget with chunks by rank
+            packed = self.context_builder.build(
+                budget=settings.CONTEXT_TOKEN_BUDGET,
+                sections=[question, prompt_variables["customer_section"], prompt_variables["conversation_section"]],
+                chunks=retrieved_docs
+            )
+            _, prompt_variables["customer_section"], prompt_variables["conversation_section"] = packed.sections
+            source_docs = packed.chunks
+            
+            result = await qa_chain.ainvoke(
+                {
+                    "input_documents": source_docs,
+                    "question": question,
+                    **prompt_variables
+                },
+                config={"callbacks": [prompt_cache_tracker.handler(service_category)]}
+            )
+            answer = result.get("output_text", "")
             
             # Ensure personalization is applied
-            if user_info and "name" in user_info and user_info["name"]:
-                name = user_info["name"]
-                # If name isn't used in the response, add it appropriately
-                if name.lower() not in answer.lower():
-                    # Add greeting with name if response doesn't start with one
-                    if not any(answer.startswith(greeting) for greeting in ["Hello", "Hi", "Good", "Welcome"]):
-                        answer = f"Hello {name}, " + answer
-                    else:
-                        # Insert name into existing greeting
-                        for greeting in ["Hello", "Hi"]:
-                            if answer.startswith(greeting):
-                                answer = answer.replace(greeting, f"{greeting} {name}", 1)
-                                break
+            answer = personalize_response(answer, user_info)
             
             # Format source information
             sources = []
@@ -124,6 +242,14 @@ If you don't have specific information, be honest but offer to help find alterna
                     "page": doc.metadata.get("page", 0) + 1
                 })
             
+            if cacheable:
+                self.answer_cache.put(
+                    service_category,
+                    question,
+                    CachedAnswer(answer=answer, sources=sources, question=question),
+                    query_vector=query_vector
+                )
+            
             return {
                 "answer": answer,
                 "sources": sources
@@ -147,12 +273,17 @@ class DocumentBasedAIService:
     
     def __init__(self, api_key: str = settings.OPENAI_API_KEY):
         """Initialize the document-based AI service."""
-        # Initialize document processor
-        self.document_processor = DocumentProcessor()
-        self.document_processor.setup()
+        # Document processor and its product QA service, swapped together as one reference
+        document_processor = DocumentProcessor()
+        document_processor.setup()
+        self._documents = (document_processor, ProductQAService(document_processor))
+        self.reindexer = ReindexManager(self)
+        
+        # General conversation service, reused so its compiled chains persist
+        self.langchain_service = LangChainService(api_key=api_key)
         
-        # Initialize product QA service
-        self.product_qa = ProductQAService(self.document_processor)
+        # Coalesces identical concurrent non-personalized product questions
+        self.single_flight = SingleFlight()
         
         # Initialize LLM
         self.llm = ChatOpenAI(
@@ -164,10 +295,33 @@ class DocumentBasedAIService:
         
         logger.info("Document-based AI service initialized")
     
+    @property
+    def document_processor(self) -> "DocumentProcessor":
+        return self._documents[0]
+    
+    @property
+    def product_qa(self) -> ProductQAService:
+        return self._documents[1]
+    
+    def swap_document_processor(self, document_processor: "DocumentProcessor") -> "DocumentProcessor":
+        """
+        Atomically replace the live document processor; queries already running keep the old one.
+        
+        Args:
+            document_processor: Processor with a ready vector store
+            
+        Returns:
+            The processor that was replaced
+        """
+        previous = self._documents[0]
+        self._documents = (document_processor, ProductQAService(document_processor))
+        return previous
+    
     def extract_user_context(self, messages: List[Any]) -> Dict[str, Any]:
         """Extract both user information and conversation context from messages."""
         user_info = {}
         conversation_context = ""
+        conversation_summary = ""
         recent_messages = []
         
         for msg in messages:
@@ -202,8 +356,8 @@ class DocumentBasedAIService:
                         summary_start = content.find("CONVERSATION SUMMARY:") + len("CONVERSATION SUMMARY:")
                         summary_end = content.find("\n", summary_start)
                         if summary_end != -1:
-                            conversation_context = content[summary_start:summary_end].strip()
-                    elif "RECENT CONVERSATION:" in content:
+                            conversation_summary = content[summary_start:summary_end].strip()
+                    if "RECENT CONVERSATION:" in content:
                         context_start = content.find("RECENT CONVERSATION:")
                         context_end = content.find("\nPERSONALIZATION RULES:", context_start)
                         if context_end != -1:
@@ -222,47 +376,49 @@ class DocumentBasedAIService:
                 context_lines.append(f"{prefix}: {content}")
             conversation_context = "\n".join(context_lines)
         
+        # Prepend the rolling summary of turns no longer in the recent history
+        if conversation_summary:
+            conversation_context = f"Earlier in the conversation: {conversation_summary}\n{conversation_context}".strip()
+        
         return {
             "user_info": user_info,
-            "conversation_context": conversation_context
+            "conversation_context": conversation_context,
+            # True when anything beyond the current user message shapes the context
+            "has_history": len(recent_messages) > 1 or bool(conversation_summary)
         }
     
     def is_product_question(self, message: str) -> bool:
         """Determine if a message is asking about products."""
-        product_keywords = [
-            "product", "service", "account", "loan", "credit", "card", "mortgage",
-            "interest", "rate", "fee", "charge", "term", "deposit", "savings",
-            "checking", "investment", "insurance", "sme", "semi", "corporate", "retail",
-            "institutional", "agribusiness", "agri", "business", "banking", "offer",
-            "application", "apply", "eligibility", "requirement", "qualify", "benefit",
-            "feature", "package", "plan", "program", "promotion", "special", "discount",
-            "financing", "fund", "money", "payment", "transaction", "transfer", "borrow"
-        ]
-        
-        question_indicators = [
-            "how", "what", "where", "when", "who", "which", "why", "can", "do", "does",
-            "tell me about", "explain", "describe", "information on", "details about",
-            "i want", "i need", "show me", "find", "looking for"
-        ]
-        
-        message_lower = message.lower()
-        
-        # Check for direct product mentions
-        has_product_keyword = any(keyword in message_lower for keyword in product_keywords)
-        
-        # Check for questions about products
-        has_question_about_product = any(
-            indicator in message_lower and any(
-                keyword in message_lower[message_lower.find(indicator):] 
-                for keyword in product_keywords
-            )
-            for indicator in question_indicators
-        )
-        
-        return has_product_keyword or has_question_about_product
+        return intent_router.is_product_question(message)
+    
+    def retrieval_filter(self, detected_segments: List[str], service_category: str) -> Optional[Dict[str, Any]]:
+        """Metadata filter for the segments to search, or None for a global search."""
+        if not settings.SEGMENT_ROUTING_ENABLED:
+            return None
+        return segment_filter(choose_segments(detected_segments, service_category))
+    
+    async def embed_query(self, message: str, document_processor: Optional["DocumentProcessor"] = None) -> Optional[List[float]]:
+        """Embed the user's message for this turn; None if embedding fails."""
+        try:
+            return await (document_processor or self.document_processor).query_embeddings.aembed_query(message)
+        except Exception as e:
+            logger.warning(f"Could not embed message, falling back to keyword routing: {e}")
+            return None
     
     async def generate_response(self, service_category: str, messages: List[Any]) -> Dict[str, Any]:
         """Generate a response using document-based QA or LangChain with full context."""
+        # One index version per turn, even if a re-index swaps it mid-request
+        document_processor, product_qa = self._documents
+        with document_processor.lease():
+            return await self._generate_response(service_category, messages, document_processor, product_qa)
+    
+    async def _generate_response(
+        self,
+        service_category: str,
+        messages: List[Any],
+        document_processor: "DocumentProcessor",
+        product_qa: ProductQAService
+    ) -> Dict[str, Any]:
         try:
             # Extract user context
             context_data = self.extract_user_context(messages)
@@ -279,14 +435,55 @@ class DocumentBasedAIService:
             if not last_user_message:
                 last_user_message = "Hello"
             
-            # Check if it's a product question
-            if self.is_product_question(last_user_message):
-                # Use product QA with full context
-                result = await self.product_qa.answer_product_question(
-                    last_user_message, 
-                    user_info=user_info,
-                    conversation_context=conversation_context
+            # Keyword routing first: a decisive lexical match is answered without any embedding call
+            intent = intent_router.classify(last_user_message)
+            lexical_docs = None
+            if intent.is_product:
+                lexical_docs = document_processor.lexical_fast_path(
+                    last_user_message, search_filter=self.retrieval_filter(intent.categories, service_category)
+                )
+            
+            # Otherwise embed a product question once; segment routing, the answer cache and
+            # retrieval all reuse the vector (other messages never need one)
+            query_vector = None
+            if intent.is_product and lexical_docs is None:
+                query_vector = await self.embed_query(last_user_message, document_processor)
+                intent = intent_router.classify(
+                    last_user_message,
+                    query_vector=query_vector,
+                    centroid_router=document_processor.get_centroid_router() if query_vector is not None else None
                 )
+            
+            if intent.is_product:
+                search_filter = self.retrieval_filter(intent.categories, service_category)
+                logger.debug(f"Product question matched {intent.terms}, searching {search_filter or 'all segments'}")
+                # Only answers that depend on nothing but the question may be shared between callers
+                personalized = context_data["has_history"] or bool(user_info)
+                if personalized:
+                    # Use product QA with full context
+                    result = await product_qa.answer_product_question(
+                        last_user_message, 
+                        user_info=user_info,
+                        conversation_context=conversation_context,
+                        service_category=service_category,
+                        query_vector=query_vector,
+                        retrieved_docs=lexical_docs,
+                        search_filter=search_filter
+                    )
+                else:
+                    # Without prior turns or customer details, identical concurrent questions
+                    # share one retrieval and LLM call
+                    coalescing_key = (service_category, normalize_question(last_user_message))
+                    result = await self.single_flight.do(
+                        coalescing_key,
+                        lambda: product_qa.answer_product_question(
+                            last_user_message,
+                            service_category=service_category,
+                            query_vector=query_vector,
+                            retrieved_docs=lexical_docs,
+                            search_filter=search_filter
+                        )
+                    )
                 
                 return {
                     "response": result["answer"],
@@ -294,13 +491,10 @@ class DocumentBasedAIService:
                 }
             else:
                 # Use existing LangChain service with enhanced context
-                from core.ai_service import LangChainService
-                langchain_service = LangChainService()
-                
-                # Create an enhanced message list with context
-                enhanced_messages = []
+                # Original messages first: their system prompt opens with static text
+                enhanced_messages = list(messages)
                 
-                # Add a system message with context
+                # Append the per-customer context last so it does not break the cacheable prefix
                 if user_info or conversation_context:
                     context_parts = []
                     
@@ -316,26 +510,17 @@ class DocumentBasedAIService:
                     )
                     enhanced_messages.append(enhanced_system_msg)
                 
-                # Add original messages
-                enhanced_messages.extend(messages)
-                
-                ai_response = await langchain_service.generate_response(
+                ai_response = await self.langchain_service.generate_response(
                     service_category=service_category,
                     messages=enhanced_messages
                 )
                 
                 # Ensure personalization in non-product responses
-                if user_info and "name" in user_info and user_info["name"]:
-                    name = user_info["name"]
-                    if name.lower() not in ai_response.lower():
-                        # Add name appropriately
-                        if not any(ai_response.startswith(greeting) for greeting in ["Hello", "Hi", "Good"]):
-                            ai_response = f"Hi {name}, " + ai_response
-                        else:
-                            for greeting in ["Hello", "Hi"]:
-                                if ai_response.startswith(greeting):
-                                    ai_response = ai_response.replace(greeting, f"{greeting} {name}", 1)
-                                    break
+                ai_response = personalize_response(
+                    ai_response, user_info,
+                    default_greeting="Hi",
+                    opening_greetings=("Hello", "Hi", "Good")
+                )
                 
                 return {
                     "response": ai_response,
@@ -351,50 +536,90 @@ class DocumentBasedAIService:
 class DocumentProcessor:
     """Processes PDF documents, creates embeddings, and builds a searchable vector store."""
     
-    def __init__(self, documents_base_path: str = "data/products"):
-        """Initialize the document processor."""
+    def __init__(self, documents_base_path: str = "data/products", persist_directory: Optional[str] = None):
+        """
+        Initialize the document processor.
+        
+        Args:
+            documents_base_path: Folder holding the category folders of product PDFs
+            persist_directory: Index directory (defaults to the active index version)
+        """
         self.documents_base_path = documents_base_path
         self.categories = ["sme", "retail", "corporate", "institutional", "agribusiness"]
         self.embeddings = OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY)
+        if settings.EMBEDDING_CACHE_ENABLED:
+            # Query and chunk embeddings are reused across requests and re-ingestion
+            self.embeddings = CachedEmbeddings(self.embeddings)
+        # Concurrent query embeddings are merged into batched API calls
+        self.query_embeddings = EmbeddingMicroBatcher(self.embeddings)
+        # Ingestion embeds in concurrent, rate-limited batches; cached vectors make reruns resume
+        self.bulk_embedder = BulkEmbedder(self.embeddings)
+        # Cached chunk vectors give the reranker a cosine score without extra API calls
+        self.reranker = LocalReranker(self.embeddings)
+        # Shared boilerplate (terms, contact details, disclaimers) is indexed once
+        self.deduplicator = NearDuplicateDetector()
         self.vector_store = None
+        self.index_version = 0  # Bumped whenever the index is (re)built; invalidates answer caches
+        self.retrieval_cache = RetrievalCache()
+        self._default_retriever = None
+        self._centroid_router = None
+        self._centroid_version = None
+        self._lexical_index = None
+        self._lexical_version = None
+        self.last_ingestion_report: Optional[IngestionReport] = None
+        self.ingestion_stage: Optional[str] = None
+        # Fixed for the processor's lifetime; a re-index builds a new processor in a new directory
+        self.persist_directory = persist_directory or active_index_directory(self._vector_store_backend()[1])
+        self.active_queries = 0  # Queries holding a lease; a swapped-out processor drains to zero
+        self._idle = threading.Condition()  # Notified when the last lease is released
+        # Page text per PDF content hash; re-chunking reads it instead of re-parsing
+        self.text_cache = ExtractedTextCache(os.path.join(documents_base_path, "extracted_text"))
         
         logger.info(f"Document processor initialized with base path: {documents_base_path}")
     
-    def load_documents(self) -> List[Dict[str, Any]]:
-        """Load all PDF documents from the product categories."""
-        all_documents = []
+    def _load_files(self, sources: List[SourceFile]) -> Tuple[Dict[str, List[Document]], Dict[str, str]]:
+        """
+        Load the pages of PDFs with product metadata.
+        
+        Page text comes from the extracted-text cache; misses are parsed across a process pool.
         
-        for category in self.categories:
-            category_path = os.path.join(self.documents_base_path, category)
+        Args:
+            sources: Files to load
             
-            if not os.path.exists(category_path):
-                logger.warning(f"Category path does not exist: {category_path}")
+        Returns:
+            Page documents keyed by relative path, and error messages for files that failed
+        """
+        pages_by_path, errors = extract_pages(sources, self.text_cache, settings.INGEST_WORKERS)
+        
+        documents: Dict[str, List[Document]] = {}
+        for source in sources:
+            if source.path not in pages_by_path:
                 continue
-            
-            logger.info(f"Loading documents from {category_path}")
-            
-            loader = DirectoryLoader(
-                category_path,
-                glob="**/*.pdf",
-                loader_cls=PyPDFLoader
-            )
-            
-            try:
-                category_docs = loader.load()
-                
-                for doc in category_docs:
-                    filename = os.path.basename(doc.metadata.get("source", "unknown"))
-                    doc.metadata.update({
-                        "category": category,
-                        "filename": filename,
-                        "product_type": self._extract_product_type(filename)
-                    })
-                
-                all_documents.extend(category_docs)
-                logger.info(f"Loaded {len(category_docs)} documents from {category}")
-                
-            except Exception as e:
-                logger.error(f"Error loading documents from {category}: {e}")
+            filename = os.path.basename(source.absolute_path)
+            metadata = {
+                "source": source.absolute_path,
+                "category": source.category,
+                "filename": filename,
+                "product_type": self._extract_product_type(filename)
+            }
+            documents[source.path] = [
+                Document(page_content=page["text"], metadata={**metadata, "page": page["page"]})
+                for page in pages_by_path[source.path]
+            ]
+        
+        return documents, errors
+    
+    def load_documents(self) -> List[Dict[str, Any]]:
+        """Load all PDF documents from the product categories."""
+        files, missing = scan_source_files(self.documents_base_path, self.categories)
+        
+        for category in missing:
+            logger.warning(f"Category path does not exist: {os.path.join(self.documents_base_path, category)}")
+        
+        documents, errors = self._load_files(files)
+        for path, error in errors.items():
+            logger.error(f"Error loading document {path}: {error}")
+        all_documents = [doc for source in files for doc in documents.get(source.path, [])]
         
         logger.info(f"Total documents loaded: {len(all_documents)}")
         return all_documents
@@ -406,42 +631,84 @@ class DocumentProcessor:
     
     def process_documents(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Process documents by splitting into chunks."""
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1500,
-            chunk_overlap=300,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
+        # Token-sized chunks that break at headings and keep table rows together
+        document_chunks = split_pages(documents)
         
-        document_chunks = text_splitter.split_documents(documents)
+        # Store token counts so query-time context packing does not re-tokenize chunks
+        for chunk in document_chunks:
+            chunk.metadata["token_count"] = default_token_counter.count(chunk.page_content)
         
         logger.info(f"Created {len(document_chunks)} document chunks from {len(documents)} documents")
         return document_chunks
     
+    def _vector_store_backend(self):
+        """Vector store class and default persist directory for the configured backend."""
+        if settings.VECTOR_STORE_BACKEND == "numpy":
+            return NumpyVectorStore, os.path.join(self.documents_base_path, "numpy_index")
+        return Chroma, os.path.join(self.documents_base_path, "chroma_db")
+    
+    def add_chunks(self, chunks: List[Document], ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Embed chunks with the bulk embedder and write them to the vector store in large batches.
+        
+        Args:
+            chunks: Document chunks (token_count metadata is used for rate limiting when present)
+            ids: Chunk ids (generated if omitted)
+            
+        Returns:
+            Ids of the written chunks
+        """
+        self._check_ready()
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in chunks]
+        if not chunks:
+            return ids
+        
+        texts = [chunk.page_content for chunk in chunks]
+        metadatas = [chunk.metadata for chunk in chunks]
+        token_counts = [
+            chunk.metadata.get("token_count") or default_token_counter.count(chunk.page_content) for chunk in chunks
+        ]
+        vectors = self.bulk_embedder.embed_documents(texts, token_counts)
+        
+        if isinstance(self.vector_store, NumpyVectorStore):
+            # Each write rewrites the index files, so write once
+            self.vector_store.add_embeddings(texts, vectors, metadatas, ids)
+        else:
+            step = settings.INGEST_WRITE_BATCH_SIZE
+            for start in range(0, len(chunks), step):
+                end = start + step
+                self.vector_store._collection.upsert(
+                    ids=ids[start:end],
+                    embeddings=vectors[start:end],
+                    metadatas=metadatas[start:end],
+                    documents=texts[start:end]
+                )
+        return ids
+    
     def create_vector_store(self, document_chunks: List[Dict[str, Any]]) -> None:
         """Create a vector store from document chunks."""
-        self.vector_store = Chroma.from_documents(
-            documents=document_chunks,
-            embedding=self.embeddings,
-            persist_directory=os.path.join(self.documents_base_path, "chroma_db")
-        )
+        self.vector_store = self._open_vector_store()
+        self.add_chunks(document_chunks)
         
         try:
             self.vector_store.persist()
         except:
             logger.info("Vector store auto-persisted")
         
+        self.index_version += 1
+        if settings.HYBRID_RETRIEVAL_ENABLED:
+            # Build the lexical index from the chunks in hand instead of reading them back
+            self._lexical_index = BM25Index(document_chunks)
+            self._lexical_version = self.index_version
         logger.info(f"Created vector store with {len(document_chunks)} document chunks")
     
     def load_vector_store(self) -> bool:
         """Load an existing vector store if available."""
-        persist_directory = os.path.join(self.documents_base_path, "chroma_db")
+        persist_directory = self.persist_directory
         
         if os.path.exists(persist_directory):
             try:
-                self.vector_store = Chroma(
-                    persist_directory=persist_directory,
-                    embedding_function=self.embeddings
-                )
+                self.vector_store = self._open_vector_store()
                 logger.info(f"Loaded existing vector store from {persist_directory}")
                 return True
             except Exception as e:
@@ -450,19 +717,384 @@ class DocumentProcessor:
         logger.warning("No existing vector store found")
         return False
     
+    def _open_vector_store(self):
+        """Open the configured vector store, creating an empty one if needed."""
+        store_class, _ = self._vector_store_backend()
+        return store_class(
+            persist_directory=self.persist_directory,
+            embedding_function=self.embeddings
+        )
+    
+    def sync_documents(self) -> IngestionReport:
+        """
+        Bring the vector store in line with the PDFs on disk using the ingestion manifest.
+        
+        Only added or changed files are parsed and embedded, and chunks of deleted
+        files are removed. Without a manifest the index is rebuilt from scratch. When
+        the chunking settings change, every file is re-chunked from the extracted-text
+        cache without re-parsing.
+        
+        Returns:
+            IngestionReport describing the work done
+        """
+        self._check_ready()
+        started = time.perf_counter()
+        self.ingestion_stage = "scanning"
+        manifest = IngestionManifest(os.path.join(self.persist_directory, MANIFEST_FILE))
+        report = IngestionReport()
+        
+        files, missing = scan_source_files(self.documents_base_path, self.categories)
+        for category in missing:
+            logger.warning(f"Category path does not exist: {os.path.join(self.documents_base_path, category)}")
+        
+        if not files:
+            # Never empty a working index because the source folders are unavailable
+            logger.warning(f"No PDFs found under {self.documents_base_path}, keeping the existing index")
+            return report
+        
+        if not manifest.exists:
+            # Nothing records which chunks came from which file, so start from an empty index
+            report.full_rebuild = True
+            existing_ids = self.vector_store.get(include=[])["ids"]
+            if existing_ids:
+                self.vector_store.delete(ids=existing_ids)
+                report.chunks_deleted += len(existing_ids)
+        
+        chunking = {
+            "unit": "tokens", "chunk_size": settings.CHUNK_SIZE, "chunk_overlap": settings.CHUNK_OVERLAP,
+            "dedup_threshold": settings.DEDUP_THRESHOLD if settings.DEDUP_ENABLED else None
+        }
+        rechunk = bool(manifest.exists and manifest.chunking and manifest.chunking != chunking)
+        if rechunk:
+            logger.info(f"Chunking changed from {manifest.chunking} to {chunking}, re-chunking all documents")
+        manifest.chunking = chunking
+        
+        plan = manifest.plan(files, rechunk=rechunk)
+        report.unchanged = len(plan.unchanged)
+        
+        # Split each file on its own so one bad PDF does not block the rest
+        self.ingestion_stage = "parsing"
+        pending = plan.changed + plan.added
+        documents, errors = self._load_files(pending)
+        ingested = []
+        for source in pending:
+            try:
+                if source.path in errors:
+                    raise ValueError(errors[source.path])
+                ingested.append((source, self.process_documents(documents[source.path])))
+            except Exception as e:
+                logger.error(f"Error ingesting {source.path}: {e}")
+                report.failed.append(source.path)
+        
+        stale_ids = [chunk_id for name in plan.deleted for chunk_id in manifest.chunk_ids(name)]
+        stale_ids += [chunk_id for source, _ in ingested for chunk_id in manifest.chunk_ids(source.path)]
+        if stale_ids:
+            self.vector_store.delete(ids=stale_ids)
+            report.chunks_deleted += len(stale_ids)
+        for name in plan.deleted:
+            manifest.remove(name)
+            report.deleted.append(name)
+        
+        merged_into: Dict[str, List[str]] = {}
+        if settings.DEDUP_ENABLED and ingested:
+            self.ingestion_stage = "deduplicating"
+            ingested, merged_into, report.dedup = self.deduplicate_chunks(ingested, manifest)
+        ingested = [(source, chunks, chunk_ids_for(source, len(chunks))) for source, chunks in ingested]
+        
+        # One bulk embed-and-write for all new chunks; if it fails, the unsaved manifest
+        # makes the next run retry and the embedding cache supplies finished batches
+        new_chunks = [chunk for _, chunks, _ in ingested for chunk in chunks]
+        new_ids = [chunk_id for _, _, ids in ingested for chunk_id in ids]
+        if new_chunks:
+            self.ingestion_stage = "embedding"
+            self.add_chunks(new_chunks, new_ids)
+            report.embedding = dict(self.bulk_embedder.last_run)
+            report.chunks_added = len(new_chunks)
+        
+        changed_paths = {source.path for source in plan.changed}
+        for source, _, ids in ingested:
+            manifest.record(source, ids, merged_into.get(source.path))
+            (report.changed if source.path in changed_paths else report.added).append(source.path)
+        
+        if stale_ids or new_chunks:
+            try:
+                self.vector_store.persist()
+            except Exception:
+                pass
+            self.index_version += 1
+        manifest.save()
+        self.text_cache.prune(entry.sha256 for entry in manifest.entries.values())
+        
+        report.seconds = time.perf_counter() - started
+        self.last_ingestion_report = report
+        self.ingestion_stage = "done"
+        logger.info(f"Document ingestion: {report.summary()}")
+        return report
+    
+    def deduplicate_chunks(
+        self,
+        ingested: List[Tuple[SourceFile, List[Document]]],
+        manifest: IngestionManifest
+    ) -> Tuple[List[Tuple[SourceFile, List[Document]]], Dict[str, List[str]], Dict[str, Any]]:
+        """
+        Drop new chunks that nearly duplicate an indexed chunk or an earlier new chunk of the same category.
+        
+        Chunks are only matched within a category, so segment-filtered searches still find every
+        category's copy. The kept chunk records the dropped copies' sources in its metadata;
+        duplicates of chunks already in the index are dropped without rewriting those.
+        
+        Args:
+            ingested: New chunks per source file, in ingestion order
+            manifest: Manifest mapping indexed chunk ids to their files
+            
+        Returns:
+            Tuple of the kept chunks per source file, the files each source's duplicates
+            were merged into, and statistics for the ingestion report
+        """
+        existing = self.vector_store.get(include=["documents", "metadatas"])
+        file_by_chunk_id = {chunk_id: name for name, entry in manifest.entries.items() for chunk_id in entry.chunk_ids}
+        owners = [file_by_chunk_id.get(chunk_id) for chunk_id in existing["ids"]]
+        new_chunks = []
+        for source, chunks in ingested:
+            owners.extend(source.path for _ in chunks)
+            new_chunks.extend(chunks)
+        
+        started = time.perf_counter()
+        canonical = self.deduplicator.find_duplicates(
+            [chunk.page_content for chunk in new_chunks],
+            existing["documents"] or [],
+            groups=[chunk.metadata.get("category") for chunk in new_chunks],
+            existing_groups=[(metadata or {}).get("category") for metadata in existing.get("metadatas") or []]
+        )
+        offset = len(existing["ids"])
+        
+        dropped = set()
+        merged_into: Dict[str, set] = {}
+        for position, target in enumerate(canonical):
+            if target is None:
+                continue
+            dropped.add(position)
+            if target >= offset:
+                merge_duplicate_metadata(new_chunks[target - offset].metadata, new_chunks[position].metadata)
+            owner, target_owner = owners[offset + position], owners[target]
+            if target_owner and target_owner != owner:
+                merged_into.setdefault(owner, set()).add(target_owner)
+        
+        kept = []
+        position = 0
+        for source, chunks in ingested:
+            kept.append((source, [chunk for i, chunk in enumerate(chunks, position) if i not in dropped]))
+            position += len(chunks)
+        
+        stats = {
+            "chunks": len(new_chunks),
+            "duplicates": len(dropped),
+            "of_indexed_chunks": sum(1 for target in canonical if target is not None and target < offset),
+            "tokens_saved": sum(new_chunks[i].metadata.get("token_count", 0) for i in dropped),
+            "shrink_percent": round(100 * len(dropped) / len(new_chunks), 1) if new_chunks else 0.0,
+            "seconds": round(time.perf_counter() - started, 2)
+        }
+        logger.info(f"Near-duplicate elimination: {stats}")
+        return kept, {name: sorted(files) for name, files in merged_into.items()}, stats
+    
     def setup(self) -> None:
-        """Set up the document processor by loading or creating a vector store."""
+        """Set up the document processor: open the vector store and ingest new, changed or deleted PDFs."""
         if not self.load_vector_store():
-            documents = self.load_documents()
-            document_chunks = self.process_documents(documents)
-            self.create_vector_store(document_chunks)
+            self.vector_store = self._open_vector_store()
+        self.sync_documents()
+    
+    @contextmanager
+    def lease(self):
+        """Count a query as using this processor for the duration of the block."""
+        with self._idle:
+            self.active_queries += 1
+        try:
+            yield self
+        finally:
+            with self._idle:
+                self.active_queries -= 1
+                if not self.active_queries:
+                    self._idle.notify_all()
+    
+    def drain(self, timeout_seconds: float) -> bool:
+        """Wait until no query holds a lease; returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self.active_queries == 0, timeout_seconds)
     
-    def get_retriever(self):
-        """Get a retriever for the vector store."""
-        if not self.vector_store:
+    def _check_ready(self) -> None:
+        if self.vector_store is None:
             raise ValueError("Vector store not initialized. Call setup() first.")
+    
+    def search(
+        self,
+        query: str,
+        k: int = settings.RETRIEVAL_K,
+        search_filter: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """
+        Similarity search through the retrieval cache.
+        
+        Args:
+            query: Search query
+            k: Number of chunks to return
+            search_filter: Optional metadata filter
+            
+        Returns:
+            Matching document chunks in rank order
+        """
+        self._check_ready()
+        self.retrieval_cache.check_index_version(self.index_version)
+        key = self.retrieval_cache.make_key(query, k, search_filter)
+        
+        docs = self.retrieval_cache.get(key)
+        if docs is None:
+            docs = self.vector_store.similarity_search(query, k=k, filter=search_filter)
+            docs = self._fuse_lexical(query, docs, k, search_filter)
+            self.retrieval_cache.put(key, docs)
+        return docs
+    
+    async def asearch(
+        self,
+        query: str,
+        k: int = settings.RETRIEVAL_K,
+        search_filter: Optional[Dict[str, Any]] = None,
+        query_vector: Optional[List[float]] = None
+    ) -> List[Any]:
+        """Async version of search; query_vector avoids re-embedding a query embedded earlier in the turn."""
+        self._check_ready()
+        self.retrieval_cache.check_index_version(self.index_version)
+        key = self.retrieval_cache.make_key(query, k, search_filter)
+        
+        docs = self.retrieval_cache.get(key)
+        if docs is None:
+            if query_vector is None:
+                query_vector = await self.query_embeddings.aembed_query(query)
+            docs = await self.vector_store.asimilarity_search_by_vector(query_vector, k=k, filter=search_filter)
+            docs = self._fuse_lexical(query, docs, k, search_filter)
+            self.retrieval_cache.put(key, docs)
+        return docs
+    
+    def get_lexical_index(self) -> Optional[BM25Index]:
+        """Get the BM25 index over the stored chunks, rebuilt when the index changes."""
+        if not settings.HYBRID_RETRIEVAL_ENABLED or self.vector_store is None:
+            return None
+        
+        if self._lexical_version != self.index_version:
+            self._lexical_version = self.index_version
+            self._lexical_index = None
+            try:
+                stored = self.vector_store.get(include=["documents", "metadatas"])
+                chunks = [
+                    Document(page_content=text, metadata=metadata or {})
+                    for text, metadata in zip(stored.get("documents") or [], stored.get("metadatas") or [])
+                ]
+                if chunks:
+                    self._lexical_index = BM25Index(chunks)
+            except Exception as e:
+                logger.warning(f"Could not build lexical index: {e}")
+        
+        return self._lexical_index
+    
+    def lexical_search(
+        self,
+        query: str,
+        k: int = settings.RETRIEVAL_K,
+        search_filter: Optional[Dict[str, Any]] = None
+    ) -> LexicalResult:
+        """BM25 search over the stored chunks; empty when hybrid retrieval is disabled."""
+        index = self.get_lexical_index()
+        if index is None:
+            return LexicalResult()
+        predicate = (lambda metadata: metadata_matches(metadata, search_filter)) if search_filter else None
+        return index.search(query, k, predicate)
+    
+    def lexical_fast_path(
+        self,
+        query: str,
+        k: int = settings.RETRIEVAL_K,
+        search_filter: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[Any]]:
+        """
+        Return BM25 results alone when the lexical match is decisive, so no embedding is needed.
+        
+        Args:
+            query: Search query
+            k: Number of chunks to return
+            search_filter: Optional metadata filter
+            
+        Returns:
+            Matching chunks, or None when vector search is still needed
+        """
+        if not settings.LEXICAL_FAST_PATH_ENABLED:
+            return None
+        
+        result = self.lexical_search(query, k, search_filter)
+        if (
+            result.hits
+            and result.coverage >= settings.LEXICAL_FAST_PATH_MIN_COVERAGE
+            and result.margin >= settings.LEXICAL_FAST_PATH_MIN_MARGIN
+        ):
+            logger.debug(f"Lexical fast path for {query!r} (coverage {result.coverage:.2f}, margin {result.margin:.2f})")
+            return result.documents
+        return None
+    
+    def _fuse_lexical(
+        self,
+        query: str,
+        vector_docs: List[Any],
+        k: int,
+        search_filter: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """Fuse vector results with BM25 results by reciprocal rank."""
+        lexical_docs = self.lexical_search(query, k, search_filter).documents
+        if not lexical_docs:
+            return vector_docs
+        return reciprocal_rank_fusion([vector_docs, lexical_docs], limit=k)
+    
+    def _embedding_pages(self, page_size: int):
+        """Yield (embeddings, categories) for the stored chunks, page_size chunks at a time."""
+        offset = 0
+        while True:
+            stored = self.vector_store.get(include=["embeddings", "metadatas"], limit=page_size, offset=offset)
+            vectors = stored.get("embeddings")
+            if vectors is None or not len(vectors):
+                return
+            yield vectors, [(metadata or {}).get("category", "unknown") for metadata in stored.get("metadatas") or []]
+            if len(vectors) < page_size:
+                return
+            offset += page_size
+    
+    def get_centroid_router(self) -> Optional[CentroidRouter]:
+        """Get per-category centroids of the stored chunk embeddings, rebuilt when the index changes."""
+        if self.vector_store is None:
+            return None
+        
+        if self._centroid_version != self.index_version:
+            self._centroid_version = self.index_version
+            self._centroid_router = None
+            try:
+                # Streamed in pages so the full embedding matrix is never copied into memory
+                self._centroid_router = CentroidRouter.from_blocks(self._embedding_pages(settings.CENTROID_BLOCK_ROWS))
+                if self._centroid_router is not None:
+                    logger.info(f"Built routing centroids for {len(self._centroid_router.categories)} categories")
+            except Exception as e:
+                logger.warning(f"Could not build routing centroids: {e}")
+        
+        return self._centroid_router
+    
+    def get_retriever(
+        self,
+        k: int = settings.RETRIEVAL_K,
+        search_filter: Optional[Dict[str, Any]] = None,
+        rerank: bool = settings.RERANK_ENABLED
+    ):
+        """Get a caching retriever for the vector store; with rerank it returns at most k locally reranked chunks."""
+        self._check_ready()
+        
+        if k == settings.RETRIEVAL_K and search_filter is None and rerank == settings.RERANK_ENABLED:
+            # The default retriever is shared instead of being rebuilt per chain
+            if self._default_retriever is None:
+                self._default_retriever = CachedRetriever(document_processor=self, rerank=rerank)
+            return self._default_retriever
         
-        return self.vector_store.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 7}
-        )
\ No newline at end of file
+        return CachedRetriever(document_processor=self, k=k, search_filter=search_filter, rerank=rerank)
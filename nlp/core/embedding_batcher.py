@@ -0,0 +1,120 @@
+"""
+Async micro-batching of query embeddings for the Bank of Kigali AI Assistant.
+Concurrent query embeddings are collected for a few milliseconds and sent as one batch request.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from utils.logging_config import logger
+
+class EmbeddingMicroBatcher(Embeddings):
+    """
+    Embeddings wrapper that merges concurrent aembed_query calls into single
+    aembed_documents calls on the underlying model. Sync calls pass straight through.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        max_batch_size: int = settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms: float = settings.EMBEDDING_BATCH_MAX_WAIT_MS
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            underlying: Embeddings model that receives the batches
+            max_batch_size: Number of queued queries that triggers an immediate flush
+            max_wait_ms: Longest time the first queued query waits for others to join
+        """
+        self.underlying = underlying
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+        self.texts_sent = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.underlying.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.underlying.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Queue a query for the next batch and wait for its vector.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Embedding of the query
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.requests += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Send everything queued so far as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            # Keep a reference so the task is not garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Embed a batch and scatter the vectors back to the waiting callers."""
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        self.texts_sent += len(texts)
+
+        try:
+            vectors = await self.underlying.aembed_documents(texts)
+        except Exception as e:
+            logger.error(f"Error embedding batch of {len(texts)} queries: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(texts, vectors))
+        for text, future in batch:
+            # Callers that were cancelled while waiting are skipped
+            if not future.done():
+                future.set_result(by_text[text])
+
+        if len(batch) > 1:
+            logger.debug(f"Embedded {len(batch)} queued queries in one request ({len(texts)} unique)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get batching statistics."""
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts_sent": self.texts_sent,
+            "pending": len(self._pending),
+            "average_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,205 @@
+"""
+Persistent embedding cache for the Bank of Kigali AI Assistant.
+Wraps an embeddings model with an in-memory LRU backed by a local SQLite store,
+keyed by model name plus a hash of the text.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from utils.logging_config import logger
+from utils.lru_cache import LRUCache
+
+class SQLiteEmbeddingStore:
+    """Key-value store of float32 embedding vectors in a single SQLite table."""
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: SQLite database file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Get the stored vectors for the given keys; missing keys are omitted."""
+        found = {}
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", list(batch)
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items: Sequence[Tuple[str, Sequence[float]]]) -> None:
+        """Store vectors, replacing existing entries."""
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only calls the underlying model for texts it has never seen.
+    Lookups go to the in-memory LRU first, then the persistent store.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        path: str = settings.EMBEDDING_CACHE_PATH,
+        memory_entries: int = settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+        model_name: Optional[str] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            underlying: Embeddings model used on a cache miss
+            path: SQLite database file for persistent entries
+            memory_entries: Maximum number of vectors kept in memory
+            model_name: Name used in cache keys (defaults to the underlying model's name)
+        """
+        self.underlying = underlying
+        self.model_name = model_name or getattr(underlying, "model", None) or type(underlying).__name__
+        self.store = SQLiteEmbeddingStore(path)
+        self.memory = LRUCache(memory_entries)
+        self._lock = threading.Lock()
+        self.store_hits = 0
+        self.computed = 0
+
+        logger.info(f"Embedding cache for {self.model_name} at {path} ({len(self.store)} stored vectors)")
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, texts: Sequence[str]) -> Tuple[List[str], List[Optional[List[float]]], List[int]]:
+        """Resolve texts from memory and the store; returns keys, vectors and the indexes still missing."""
+        keys = [self._key(text) for text in texts]
+        vectors: List[Optional[List[float]]] = [self.memory.get(key) for key in keys]
+
+        pending = [i for i, vector in enumerate(vectors) if vector is None]
+        if pending:
+            stored = self.store.get_many(list({keys[i] for i in pending}))
+            for i in pending:
+                vector = stored.get(keys[i])
+                if vector is not None:
+                    vectors[i] = vector
+                    self.memory.set(keys[i], vector)
+            with self._lock:
+                self.store_hits += sum(1 for i in pending if vectors[i] is not None)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        return keys, vectors, missing
+
+    def get_cached(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Get cached vectors without computing anything; None for texts never embedded."""
+        return self._lookup(texts)[1]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, computing only the cache misses in one batch."""
+        keys, vectors, missing = self._lookup(texts)
+        if not missing:
+            return vectors
+
+        unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+        computed = self.underlying.embed_documents(unique_texts)
+        return self._store_computed(texts, keys, vectors, missing, unique_texts, computed)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async version of embed_documents."""
+        keys, vectors, missing = self._lookup(texts)
+        if not missing:
+            return vectors
+
+        unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+        computed = await self.underlying.aembed_documents(unique_texts)
+        return self._store_computed(texts, keys, vectors, missing, unique_texts, computed)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query through the cache."""
+        keys, vectors, missing = self._lookup([text])
+        if not missing:
+            return vectors[0]
+        computed = [self.underlying.embed_query(text)]
+        return self._store_computed([text], keys, vectors, missing, [text], computed)[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async version of embed_query."""
+        keys, vectors, missing = self._lookup([text])
+        if not missing:
+            return vectors[0]
+        computed = [await self.underlying.aembed_query(text)]
+        return self._store_computed([text], keys, vectors, missing, [text], computed)[0]
+
+    def _store_computed(
+        self,
+        texts: Sequence[str],
+        keys: List[str],
+        vectors: List[Optional[List[float]]],
+        missing: List[int],
+        unique_texts: List[str],
+        computed: List[List[float]]
+    ) -> List[List[float]]:
+        """Store newly computed vectors and fill them into the result."""
+        by_text = dict(zip(unique_texts, computed))
+        new_entries = {}
+        for i in missing:
+            vectors[i] = by_text[texts[i]]
+            new_entries[keys[i]] = vectors[i]
+
+        self.store.put_many(list(new_entries.items()))
+        for key, vector in new_entries.items():
+            self.memory.set(key, vector)
+
+        with self._lock:
+            self.computed += len(unique_texts)
+        return vectors
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit-rate statistics across the memory and persistent tiers."""
+        memory_stats = self.memory.stats()
+        with self._lock:
+            lookups = memory_stats["hits"] + memory_stats["misses"]
+            hits = memory_stats["hits"] + self.store_hits
+            return {
+                "model": self.model_name,
+                "memory": memory_stats,
+                "store_hits": self.store_hits,
+                "computed": self.computed,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+            }
@@ -18,6 +18,7 @@ class ConversationPair:
         self.answer = answer
         self.timestamp = timestamp
         self.user_info = {}  # Store user info extracted from this conversation
+        self.token_count: Optional[int] = None  # Cached prompt token count, set by the context builder
     
     def to_dict(self) -> Dict:
         return {
@@ -37,22 +38,39 @@ class ConversationPair:
         pair.user_info = data.get("user_info", {})
         return pair
 
+class HistoryVersionConflict(Exception):
+    """Raised when a client's history version does not match the stored one."""
+    
+    def __init__(self, user_id: str, expected_version: int, current_version: int):
+        self.user_id = user_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"History version conflict for user {user_id}: "
+            f"expected {expected_version}, current {current_version}"
+        )
+
 class EnhancedMessageStore:
     """
     Improved message store that tracks conversation pairs (Q&A) with limited history.
     This approach is simpler and more efficient than storing individual messages.
     """
     
-    def __init__(self, max_pairs: int = 3, expiry_seconds: int = 1800):
+    def __init__(self, max_pairs: int = 3, expiry_seconds: int = 1800, keep_evicted_pairs: bool = False):
         """
         Initialize the enhanced message store.
         
         Args:
             max_pairs: Maximum number of Q&A pairs to store per user (default: 3)
             expiry_seconds: Time in seconds after which conversation expires (default: 30 min)
+            keep_evicted_pairs: Keep pairs pushed out by max_pairs until a summarizer collects them
         """
         self.conversations: Dict[str, List[ConversationPair]] = {}
         self.user_info: Dict[str, Dict[str, str]] = {}  # Persistent user information
+        self.history_versions: Dict[str, int] = {}  # Incremented on every change to the history, never reset
+        self.summaries: Dict[str, str] = {}  # Rolling summary of pairs evicted from the history
+        self.evicted_pairs: Dict[str, List[ConversationPair]] = {}  # Evicted pairs awaiting summarization
+        self.keep_evicted_pairs = keep_evicted_pairs
         self.max_pairs = max_pairs
         self.expiry_seconds = expiry_seconds
         self.lock = threading.RLock()
@@ -63,7 +81,14 @@ class EnhancedMessageStore:
         
         logger.info(f"Enhanced message store initialized with {max_pairs} max conversation pairs and {expiry_seconds}s expiry")
     
-    def add_qa_pair(self, user_id: str, question: str, answer: str, detected_user_info: Dict[str, str] = None) -> None:
+    def add_qa_pair(
+        self,
+        user_id: str,
+        question: str,
+        answer: str,
+        detected_user_info: Dict[str, str] = None,
+        expected_version: Optional[int] = None
+    ) -> int:
         """
         Add a question-answer pair to the store.
         
@@ -72,8 +97,19 @@ class EnhancedMessageStore:
             question: The user's question
             answer: The assistant's answer
             detected_user_info: Any user information detected in this conversation
+            expected_version: History version the caller based this turn on (optional)
+            
+        Returns:
+            The new history version for the user
+            
+        Raises:
+            HistoryVersionConflict: If expected_version no longer matches the stored version
         """
         with self.lock:
+            current_version = self.history_versions.get(user_id, 0)
+            if expected_version is not None and expected_version != current_version:
+                raise HistoryVersionConflict(user_id, expected_version, current_version)
+            
             # Create new conversation pair
             pair = ConversationPair(question, answer, datetime.now())
             
@@ -93,9 +129,15 @@ class EnhancedMessageStore:
             
             # Keep only the last max_pairs conversations
             if len(self.conversations[user_id]) > self.max_pairs:
+                if self.keep_evicted_pairs:
+                    evicted = self.conversations[user_id][:-self.max_pairs]
+                    self.evicted_pairs.setdefault(user_id, []).extend(evicted)
                 self.conversations[user_id] = self.conversations[user_id][-self.max_pairs:]
             
+            self.history_versions[user_id] = current_version + 1
+            
             logger.debug(f"Added Q&A pair for user {user_id}. Total pairs: {len(self.conversations[user_id])}")
+            return self.history_versions[user_id]
     
     def get_recent_conversations(self, user_id: str) -> List[ConversationPair]:
         """
@@ -130,6 +172,75 @@ class EnhancedMessageStore:
         with self.lock:
             return self.user_info.get(user_id, {})
     
+    def get_history_version(self, user_id: str) -> int:
+        """
+        Get the current history version for a user.
+        
+        Args:
+            user_id: Unique identifier for the user
+            
+        Returns:
+            Count of changes to the history: stored pairs, clears and expiries
+        """
+        with self.lock:
+            return self.history_versions.get(user_id, 0)
+    
+    def _bump_history_version(self, user_id: str) -> None:
+        """Mark a user's history as changed; versions only ever increase, even across clears."""
+        self.history_versions[user_id] = self.history_versions.get(user_id, 0) + 1
+    
+    def pop_evicted_pairs(self, user_id: str) -> List[ConversationPair]:
+        """
+        Take the pairs evicted from a user's history since the last call.
+        
+        Args:
+            user_id: Unique identifier for the user
+            
+        Returns:
+            Evicted ConversationPair objects, oldest first
+        """
+        with self.lock:
+            return self.evicted_pairs.pop(user_id, [])
+    
+    def restore_evicted_pairs(self, user_id: str, pairs: List[ConversationPair]) -> None:
+        """
+        Put back pairs taken with pop_evicted_pairs whose summarization failed.
+        
+        They go ahead of pairs evicted since, and are discarded if the user's
+        history has been cleared or has expired in the meantime.
+        
+        Args:
+            user_id: Unique identifier for the user
+            pairs: Pairs returned by pop_evicted_pairs, oldest first
+        """
+        with self.lock:
+            if pairs and user_id in self.conversations:
+                self.evicted_pairs[user_id] = list(pairs) + self.evicted_pairs.get(user_id, [])
+    
+    def get_conversation_summary(self, user_id: str) -> Optional[str]:
+        """
+        Get the rolling summary of a user's earlier conversation.
+        
+        Args:
+            user_id: Unique identifier for the user
+            
+        Returns:
+            Conversation summary if available, None otherwise
+        """
+        with self.lock:
+            return self.summaries.get(user_id)
+    
+    def set_conversation_summary(self, user_id: str, summary: str) -> None:
+        """
+        Store the rolling summary of a user's earlier conversation.
+        
+        Args:
+            user_id: Unique identifier for the user
+            summary: Summary of the evicted conversation pairs
+        """
+        with self.lock:
+            self.summaries[user_id] = summary
+    
     def clear_user_data(self, user_id: str) -> None:
         """
         Clear all data for a user.
@@ -142,6 +253,10 @@ class EnhancedMessageStore:
                 del self.conversations[user_id]
             if user_id in self.user_info:
                 del self.user_info[user_id]
+            # Bumped rather than reset, so a version issued before the clear never matches again
+            self._bump_history_version(user_id)
+            self.summaries.pop(user_id, None)
+            self.evicted_pairs.pop(user_id, None)
             logger.info(f"Cleared all data for user {user_id}")
     
     def _cleanup_expired(self) -> None:
@@ -169,13 +284,17 @@ class EnhancedMessageStore:
                 if not valid_pairs:
                     users_to_remove.append(user_id)
                     expired_count += len(pairs)
-                else:
+                elif len(valid_pairs) < len(pairs):
                     self.conversations[user_id] = valid_pairs
                     expired_count += len(pairs) - len(valid_pairs)
+                    self._bump_history_version(user_id)
             
-            # Remove completely expired users
+            # Remove completely expired users, along with their summaries
             for user_id in users_to_remove:
                 del self.conversations[user_id]
+                self._bump_history_version(user_id)
+                self.summaries.pop(user_id, None)
+                self.evicted_pairs.pop(user_id, None)
             
             if expired_count > 0 or users_to_remove:
                 logger.debug(f"Removed {expired_count} expired conversation pairs for {len(users_to_remove)} users")
@@ -0,0 +1,377 @@
+"""
+Incremental document ingestion support for the Bank of Kigali AI Assistant.
+A manifest records size, mtime, content hash and chunk ids per PDF so only
+added, changed or deleted files are re-processed; extracted page text is cached
+by content hash so re-chunking never re-parses a PDF.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.logging_config import logger
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = "ingest_manifest.json"
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Hash a file's contents without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+@dataclass
+class ManifestEntry:
+    """What was ingested for one PDF."""
+
+    category: str
+    size: int
+    mtime: float
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+    merged_into: List[str] = field(default_factory=list)  # Files holding the kept copies of this file's duplicate chunks
+
+@dataclass
+class SourceFile:
+    """A PDF found on disk."""
+
+    path: str           # Path relative to the documents base path, with forward slashes
+    absolute_path: str
+    category: str
+    size: int
+    mtime: float
+    sha256: Optional[str] = None
+
+@dataclass
+class IngestionPlan:
+    """Files to add, re-ingest or remove, compared with the manifest."""
+
+    added: List[SourceFile] = field(default_factory=list)
+    changed: List[SourceFile] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.deleted)
+
+@dataclass
+class IngestionReport:
+    """Summary of an ingestion run."""
+
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    failed: List[str] = field(default_factory=list)
+    chunks_added: int = 0
+    chunks_deleted: int = 0
+    full_rebuild: bool = False
+    seconds: float = 0.0
+    embedding: Dict[str, Any] = field(default_factory=dict)  # Bulk embedder statistics
+    dedup: Dict[str, Any] = field(default_factory=dict)  # Near-duplicate elimination statistics
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.changed)} changed, {len(self.deleted)} deleted, "
+            f"{self.unchanged} unchanged, {len(self.failed)} failed files; "
+            f"+{self.chunks_added}/-{self.chunks_deleted} chunks in {self.seconds:.1f}s"
+            + (" (full rebuild)" if self.full_rebuild else "")
+            + (
+                f"; dropped {self.dedup['duplicates']} near-duplicate chunks ({self.dedup['shrink_percent']}%)"
+                if self.dedup.get("duplicates") else ""
+            )
+        )
+
+class IngestionManifest:
+    """Per-file ingestion state persisted as JSON next to the vector store."""
+
+    def __init__(self, path: str):
+        """
+        Load the manifest if it exists.
+
+        Args:
+            path: Manifest file
+        """
+        self.path = path
+        self.entries: Dict[str, ManifestEntry] = {}
+        self.chunking: Dict[str, Any] = {}
+        self.exists = False
+
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.entries = {name: ManifestEntry(**entry) for name, entry in data["files"].items()}
+                    self.chunking = data.get("chunking", {})
+                    self.exists = True
+                else:
+                    logger.warning(f"Ignoring ingestion manifest with unsupported version: {path}")
+            except Exception as e:
+                logger.error(f"Error reading ingestion manifest {path}: {e}")
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "chunking": self.chunking,
+            "files": {name: asdict(entry) for name, entry in sorted(self.entries.items())}
+        }
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(self.path + ".tmp", self.path)
+        self.exists = True
+
+    def plan(self, files: List[SourceFile], rechunk: bool = False) -> IngestionPlan:
+        """
+        Compare files on disk with the manifest.
+
+        Files whose size and mtime match are trusted without hashing; otherwise the
+        content hash decides, so a touched but identical file is not re-ingested.
+
+        Args:
+            files: PDFs currently on disk
+            rechunk: Treat every known file as changed (chunking settings differ)
+
+        Returns:
+            IngestionPlan; hashes are filled in on the returned source files
+        """
+        plan = IngestionPlan()
+        seen = set()
+        sources = {source.path: source for source in files}
+
+        for source in files:
+            seen.add(source.path)
+            entry = self.entries.get(source.path)
+
+            if entry is None:
+                source.sha256 = file_sha256(source.absolute_path)
+                plan.added.append(source)
+                continue
+
+            if rechunk:
+                source.sha256 = file_sha256(source.absolute_path)
+                plan.changed.append(source)
+                continue
+
+            if entry.size == source.size and entry.mtime == source.mtime and entry.category == source.category:
+                plan.unchanged.append(source.path)
+                continue
+
+            source.sha256 = file_sha256(source.absolute_path)
+            if source.sha256 == entry.sha256 and entry.category == source.category:
+                # Same content: refresh the stat fields only
+                entry.size, entry.mtime = source.size, source.mtime
+                plan.unchanged.append(source.path)
+            else:
+                plan.changed.append(source)
+
+        plan.deleted = [name for name in self.entries if name not in seen]
+
+        # A file whose duplicate chunks were dropped in favour of another file's copy is
+        # re-ingested when that file changes or goes away, so the content stays indexed
+        gone = set(plan.deleted) | {source.path for source in plan.changed}
+        while True:
+            dependents = [name for name in plan.unchanged if gone.intersection(self.entries[name].merged_into)]
+            if not dependents:
+                break
+            for name in dependents:
+                source = sources[name]
+                source.sha256 = source.sha256 or file_sha256(source.absolute_path)
+                plan.unchanged.remove(name)
+                plan.changed.append(source)
+                gone.add(name)
+        return plan
+
+    def chunk_ids(self, name: str) -> List[str]:
+        entry = self.entries.get(name)
+        return list(entry.chunk_ids) if entry else []
+
+    def record(self, source: SourceFile, chunk_ids: List[str], merged_into: Optional[List[str]] = None) -> None:
+        """Record a successfully ingested file."""
+        self.entries[source.path] = ManifestEntry(
+            category=source.category,
+            size=source.size,
+            mtime=source.mtime,
+            sha256=source.sha256 or file_sha256(source.absolute_path),
+            chunk_ids=chunk_ids,
+            merged_into=merged_into or []
+        )
+
+    def remove(self, name: str) -> None:
+        self.entries.pop(name, None)
+
+class ExtractedTextCache:
+    """Gzipped JSON page texts per PDF, keyed by content hash, so re-chunking never re-parses."""
+
+    def __init__(self, directory: str):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Cache directory (created on first write)
+        """
+        self.directory = directory
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.directory, sha256[:2], f"{sha256}.json.gz")
+
+    def get(self, sha256: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the extracted pages of a file, or None if not cached."""
+        path = self._path(sha256)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable extracted-text cache entry {path}: {e}")
+            return None
+
+    def put(self, sha256: str, pages: List[Dict[str, Any]]) -> None:
+        """Store the extracted pages of a file."""
+        path = self._path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+            json.dump(pages, f)
+        os.replace(path + ".tmp", path)
+
+    def prune(self, keep: Iterable[str]) -> int:
+        """Remove entries whose hash is not in keep; returns the number removed."""
+        keep = set(keep)
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return removed
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json.gz") and name[:-len(".json.gz")] not in keep:
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+        return removed
+
+def parse_pdf(path: str) -> List[Dict[str, Any]]:
+    """
+    Extract the text of each page of a PDF. Runs in worker processes, so it only takes
+    and returns plain data.
+
+    Args:
+        path: PDF file
+
+    Returns:
+        List of {"page", "text"} dictionaries
+    """
+    from langchain_community.document_loaders import PyPDFLoader
+
+    return [
+        {"page": doc.metadata.get("page", i), "text": doc.page_content}
+        for i, doc in enumerate(PyPDFLoader(path).load())
+    ]
+
+def extract_pages(
+    sources: List[SourceFile],
+    cache: Optional[ExtractedTextCache] = None,
+    workers: int = 1
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    """
+    Get page texts for PDFs, parsing cache misses across a process pool.
+
+    Args:
+        sources: Files to extract (hashes are computed if missing)
+        cache: Extracted-text cache
+        workers: Maximum worker processes (1 parses in this process)
+
+    Returns:
+        Pages keyed by relative path, and error messages keyed by relative path
+    """
+    pages_by_path: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, str] = {}
+    misses: List[SourceFile] = []
+
+    for source in sources:
+        if source.sha256 is None:
+            source.sha256 = file_sha256(source.absolute_path)
+        cached = cache.get(source.sha256) if cache else None
+        if cached is not None:
+            pages_by_path[source.path] = cached
+        else:
+            misses.append(source)
+
+    def store(source: SourceFile, pages: List[Dict[str, Any]]) -> None:
+        pages_by_path[source.path] = pages
+        if cache:
+            cache.put(source.sha256, pages)
+
+    if workers > 1 and len(misses) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(misses))) as pool:
+            futures = {pool.submit(parse_pdf, source.absolute_path): source for source in misses}
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    store(source, future.result())
+                except Exception as e:
+                    errors[source.path] = str(e)
+    else:
+        for source in misses:
+            try:
+                store(source, parse_pdf(source.absolute_path))
+            except Exception as e:
+                errors[source.path] = str(e)
+
+    if misses:
+        logger.info(f"Parsed {len(misses) - len(errors)}/{len(misses)} PDFs with {min(workers, len(misses))} workers, "
+                    f"{len(sources) - len(misses)} served from the extracted-text cache")
+    return pages_by_path, errors
+
+def chunk_ids_for(source: SourceFile, count: int) -> List[str]:
+    """Stable chunk ids derived from the file's path and content hash."""
+    prefix = hashlib.sha1(f"{source.path}:{source.sha256}".encode("utf-8")).hexdigest()[:16]
+    return [f"{prefix}-{i}" for i in range(count)]
+
+def scan_source_files(base_path: str, categories: List[str]) -> Tuple[List[SourceFile], List[str]]:
+    """
+    List the PDFs under each category folder.
+
+    Args:
+        base_path: Documents base path
+        categories: Category folder names
+
+    Returns:
+        Source files found, and the categories whose folder is missing
+    """
+    files: List[SourceFile] = []
+    missing: List[str] = []
+
+    for category in categories:
+        category_path = os.path.join(base_path, category)
+        if not os.path.isdir(category_path):
+            missing.append(category)
+            continue
+
+        for root, _, names in os.walk(category_path):
+            for name in sorted(names):
+                if not name.lower().endswith(".pdf"):
+                    continue
+                absolute_path = os.path.join(root, name)
+                stat = os.stat(absolute_path)
+                files.append(SourceFile(
+                    path=os.path.relpath(absolute_path, base_path).replace(os.sep, "/"),
+                    absolute_path=absolute_path,
+                    category=category,
+                    size=stat.st_size,
+                    mtime=stat.st_mtime
+                ))
+
+    return files, missing
@@ -0,0 +1,211 @@
+"""
+Compiled intent router for the Bank of Kigali AI Assistant.
+Classifies a message as a product question in a single regex pass with word boundaries
+and reports which customer segments it mentions.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from utils.logging_config import logger
+
+# General product vocabulary; plurals ("loans", "fees") are matched automatically
+PRODUCT_TERMS = [
+    "product", "service", "account", "loan", "credit", "card", "mortgage",
+    "interest", "rate", "fee", "charge", "term", "deposit", "savings",
+    "checking", "investment", "insurance", "banking", "offer",
+    "application", "apply", "applying", "eligibility", "eligible", "requirement",
+    "qualify", "benefit", "feature", "package", "plan", "program", "promotion",
+    "special", "discount", "financing", "finance", "fund", "money", "payment",
+    "transaction", "transfer", "borrow", "borrowing", "overdraft", "lending",
+    # Customer words too generic to pick a segment on their own
+    "business", "enterprise", "personal", "individual", "company", "companies", "institution", "government"
+]
+
+# Segment vocabulary, keyed by the document categories used for retrieval. A match restricts
+# retrieval to that segment, so only terms that name one segment unambiguously belong here.
+SEGMENT_TERMS = {
+    "sme": ["sme", "semi", "small business", "small and medium"],
+    "retail": ["retail", "personal loan", "personal account", "personal banking"],
+    "corporate": ["corporate", "corporation"],
+    "institutional": ["institutional", "ngo", "government agency", "government agencies", "embassy", "embassies"],
+    "agribusiness": ["agribusiness", "agri", "agriculture", "agricultural", "farm", "farmer", "farming"]
+}
+
+@dataclass
+class IntentMatch:
+    """Result of routing a message."""
+
+    is_product: bool
+    categories: List[str] = field(default_factory=list)
+    terms: List[str] = field(default_factory=list)
+    centroid_scores: Dict[str, float] = field(default_factory=dict)
+
+class CentroidRouter:
+    """Scores query embeddings against the mean embedding of each document category."""
+
+    def __init__(self, vectors: Sequence[Sequence[float]], labels: Sequence[str]):
+        """
+        Build unit-length centroids from labelled chunk embeddings.
+
+        Args:
+            vectors: Chunk embeddings
+            labels: Category of each chunk
+        """
+        self._set_centroids(self._category_sums([(vectors, labels)]))
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[Tuple[Sequence[Sequence[float]], Sequence[str]]]) -> Optional["CentroidRouter"]:
+        """
+        Build centroids from blocks of labelled embeddings, holding one block and the running sums at a time.
+
+        Args:
+            blocks: (embeddings, categories) pairs, for example pages of a vector store
+
+        Returns:
+            The router, or None if the blocks hold no embeddings
+        """
+        sums = cls._category_sums(blocks)
+        if not sums:
+            return None
+        router = cls.__new__(cls)
+        router._set_centroids(sums)
+        return router
+
+    @staticmethod
+    def _category_sums(blocks: Iterable[Tuple[Sequence[Sequence[float]], Sequence[str]]]) -> Dict[str, Tuple[np.ndarray, int]]:
+        sums: Dict[str, Tuple[np.ndarray, int]] = {}
+        for vectors, labels in blocks:
+            matrix = np.asarray(vectors, dtype=np.float32)
+            labels = np.asarray(labels)
+            for category in set(labels.tolist()):
+                rows = matrix[labels == category]
+                total, count = sums.get(category, (0.0, 0))
+                sums[category] = (total + rows.sum(axis=0, dtype=np.float64), count + len(rows))
+        return sums
+
+    def _set_centroids(self, sums: Dict[str, Tuple[np.ndarray, int]]) -> None:
+        self.categories: List[str] = sorted(sums)
+        centroids = np.stack([sums[category][0] / sums[category][1] for category in self.categories]).astype(np.float32)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = centroids / np.where(norms == 0, 1, norms)
+
+    def score(self, query_vector: Sequence[float]) -> Dict[str, float]:
+        """
+        Cosine similarity of a query to every category centroid.
+
+        Args:
+            query_vector: Query embedding
+
+        Returns:
+            Scores keyed by category, best first
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = self.centroids @ (query / norm if norm else query)
+        order = np.argsort(-scores)
+        return {self.categories[i]: round(float(scores[i]), 4) for i in order}
+
+class IntentRouter:
+    """
+    Routes messages with one compiled alternation over all product and segment terms.
+    Messages are lowercased and matches are anchored on word boundaries, so "plan" does not
+    match inside "explain" and "fee" does not match inside "feedback".
+    """
+
+    def __init__(
+        self,
+        product_terms: Iterable[str] = PRODUCT_TERMS,
+        segment_terms: Optional[Dict[str, Iterable[str]]] = None
+    ):
+        """
+        Compile the router.
+
+        Args:
+            product_terms: Terms that mark a product question
+            segment_terms: Terms per customer segment (also product terms)
+        """
+        segment_terms = SEGMENT_TERMS if segment_terms is None else segment_terms
+
+        self._segment_by_term: Dict[str, str] = {}
+        terms = {term.lower() for term in product_terms}
+        for segment, words in segment_terms.items():
+            for word in words:
+                self._segment_by_term[word.lower()] = segment
+                terms.add(word.lower())
+
+        # Longest first so multi-word terms win over their prefixes
+        alternation = "|".join(
+            re.escape(term).replace(r"\ ", r"\s+")
+            for term in sorted(terms, key=len, reverse=True)
+        )
+        self._pattern = re.compile(rf"\b({alternation})(?:s|es)?\b")
+
+        logger.info(f"Intent router compiled with {len(terms)} terms")
+
+    def classify(
+        self,
+        message: str,
+        query_vector: Optional[Sequence[float]] = None,
+        centroid_router: Optional[CentroidRouter] = None,
+        centroid_threshold: float = settings.INTENT_CENTROID_THRESHOLD,
+        centroid_margin: float = settings.SEGMENT_CENTROID_MARGIN
+    ) -> IntentMatch:
+        """
+        Classify a message by keywords; for product questions that name no segment, a query
+        embedding close to one category centroid picks the segment.
+
+        Only keywords mark a message as a product question: cosine similarities between
+        unrelated short texts run high with OpenAI embeddings, so a fixed centroid threshold
+        would also route greetings and small talk to product QA.
+
+        Args:
+            message: User message
+            query_vector: Embedding of the message, computed once per turn
+            centroid_router: Category centroids of the current index
+            centroid_threshold: Minimum centroid similarity for the closest category to be used
+            centroid_margin: Lead over the runner-up category needed to report the closest category
+
+        Returns:
+            IntentMatch with the product flag, matched segment categories, matched terms and centroid scores
+        """
+        terms: List[str] = []
+        categories: List[str] = []
+
+        for term in self._pattern.findall((message or "").lower()):
+            if not term.isalpha():
+                # Collapse whitespace inside multi-word terms
+                term = " ".join(term.split())
+            if term not in terms:
+                terms.append(term)
+            segment = self._segment_by_term.get(term)
+            if segment and segment not in categories:
+                categories.append(segment)
+
+        centroid_scores: Dict[str, float] = {}
+        if terms and query_vector is not None and centroid_router is not None:
+            centroid_scores = centroid_router.score(query_vector)
+            ranked = list(centroid_scores.items())
+            best_category, best_score = ranked[0]
+            runner_up = ranked[1][1] if len(ranked) > 1 else -1.0
+            # Keywords name segments explicitly; otherwise use the closest category if it is a clear winner
+            if not categories and best_score >= centroid_threshold and best_score - runner_up >= centroid_margin:
+                categories.append(best_category)
+
+        return IntentMatch(
+            is_product=bool(terms),
+            categories=categories,
+            terms=terms,
+            centroid_scores=centroid_scores
+        )
+
+    def is_product_question(self, message: str) -> bool:
+        """Check whether a message is about bank products."""
+        return self._pattern.search((message or "").lower()) is not None
+
+# Shared router compiled once at import
+intent_router = IntentRouter()
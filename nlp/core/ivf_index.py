@@ -0,0 +1,132 @@
+"""
+Inverted-file (IVF) partitioning of the NumPy vector index for the Bank of Kigali AI Assistant.
+Vectors are grouped around spherical k-means centroids; a query only scores the rows in
+the few partitions whose centroids are closest to it.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from utils.logging_config import logger
+
+TRAINING_SAMPLE_PER_LIST = 256  # k-means trains on at most this many vectors per partition
+ASSIGN_BLOCK_ROWS = 4096
+
+def assign_partitions(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid (by cosine similarity) for each unit-length row."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+def train_centroids(vectors: np.ndarray, n_lists: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means on a sample of unit-length rows.
+
+    Args:
+        vectors: Rows to partition
+        n_lists: Number of partitions
+        iterations: Lloyd iterations
+        seed: Random seed for sampling and initialization
+
+    Returns:
+        Unit-length centroids, one row per partition
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * TRAINING_SAMPLE_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=n_lists)
+        # Re-seed empty partitions with random sample rows
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1, norms)
+
+    return centroids.astype(np.float32)
+
+class IVFIndex:
+    """Partition centroids plus the partition of every row; rows are listed per partition for probing."""
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray, trained_size: int):
+        """
+        Initialize from trained centroids.
+
+        Args:
+            centroids: Unit-length centroid rows
+            assignments: Partition of every stored row
+            trained_size: Row count when the centroids were trained (drives retraining)
+        """
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.assignments = np.asarray(assignments, dtype=np.int32)
+        self.trained_size = trained_size
+        # Rows grouped by partition: rows of partition p are order[offsets[p]:offsets[p + 1]]
+        self._order = np.argsort(self.assignments, kind="stable")
+        self._offsets = np.searchsorted(self.assignments[self._order], np.arange(self.n_lists + 1))
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, n_lists: int) -> "IVFIndex":
+        """Train centroids on the vectors and assign every row."""
+        n_lists = max(1, min(n_lists, len(vectors)))
+        centroids = train_centroids(vectors, n_lists)
+        index = cls(centroids, assign_partitions(vectors, centroids), len(vectors))
+        logger.info(f"Trained IVF index with {n_lists} partitions over {len(vectors)} vectors")
+        return index
+
+    def with_rows(self, assignments: np.ndarray) -> "IVFIndex":
+        """A copy with new row assignments and the same centroids (readers keep the old object)."""
+        return IVFIndex(self.centroids, assignments, self.trained_size)
+
+    def add(self, vectors: np.ndarray) -> "IVFIndex":
+        """A copy with rows appended to their closest partitions."""
+        return self.with_rows(np.concatenate([self.assignments, assign_partitions(vectors, self.centroids)]))
+
+    def keep(self, rows: np.ndarray) -> "IVFIndex":
+        """A copy restricted to the given rows, renumbered in order."""
+        return self.with_rows(self.assignments[rows])
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """
+        Rows in the partitions closest to a query.
+
+        Args:
+            query: Unit-length query vector
+            nprobe: Number of partitions to search
+
+        Returns:
+            Sorted row indexes
+        """
+        nprobe = min(max(1, nprobe), self.n_lists)
+        similarities = self.centroids @ query
+        if nprobe < self.n_lists:
+            lists = np.argpartition(-similarities, nprobe - 1)[:nprobe]
+        else:
+            lists = np.arange(self.n_lists)
+        rows = [self._order[self._offsets[p]:self._offsets[p + 1]] for p in lists]
+        return np.sort(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64)
+
+    def save(self, path: str) -> None:
+        """Write the centroids and assignments to an .npz file."""
+        with open(path, "wb") as f:
+            np.savez(f, centroids=self.centroids, assignments=self.assignments, trained_size=self.trained_size)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IVFIndex"]:
+        """Read an index written by save(), or None if it cannot be read."""
+        try:
+            with np.load(path) as data:
+                return cls(data["centroids"], data["assignments"], int(data["trained_size"]))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable IVF index {path}: {e}")
+            return None
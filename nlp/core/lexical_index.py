@@ -0,0 +1,139 @@
+"""
+In-process BM25 index over product document chunks for the Bank of Kigali AI Assistant.
+Catches exact product names and acronyms ("SME", "agri") that dense vectors handle poorly.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.logging_config import logger
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset([
+    "a", "about", "am", "an", "and", "any", "are", "as", "at", "be", "by", "can", "could", "do",
+    "does", "for", "from", "get", "have", "how", "i", "in", "is", "it", "know", "like", "me", "my",
+    "need", "of", "on", "or", "our", "please", "tell", "that", "the", "there", "this", "to", "want",
+    "we", "what", "when", "where", "which", "who", "why", "with", "would", "you", "your"
+])
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, with simple plurals folded ("loans" -> "loan")."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall((text or "").lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+@dataclass
+class LexicalResult:
+    """Ranked BM25 hits with a confidence estimate for the top hit."""
+
+    hits: List[Tuple[Any, float]] = field(default_factory=list)
+    coverage: float = 0.0  # Share of the query's IDF weight matched by the top hit
+    margin: float = 0.0    # Top score divided by the runner-up score
+
+    @property
+    def documents(self) -> List[Any]:
+        return [doc for doc, _ in self.hits]
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents, with per-term weights precomputed at build time."""
+
+    def __init__(self, documents: Sequence[Any], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the index.
+
+        Args:
+            documents: LangChain documents (page_content and metadata)
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.documents = list(documents)
+        tokenized = [tokenize(doc.page_content) for doc in self.documents]
+        lengths = np.array([len(tokens) for tokens in tokenized], dtype=np.float32)
+        average_length = float(lengths.mean()) if len(lengths) else 0.0
+        count = len(self.documents)
+
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for doc_id, tokens in enumerate(tokenized):
+            for term, frequency in Counter(tokens).items():
+                postings[term].append((doc_id, frequency))
+
+        self.idf: Dict[str, float] = {}
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, entries in postings.items():
+            ids = np.array([doc_id for doc_id, _ in entries], dtype=np.int32)
+            frequencies = np.array([frequency for _, frequency in entries], dtype=np.float32)
+            idf = math.log(1 + (count - len(entries) + 0.5) / (len(entries) + 0.5))
+            norm = k1 * (1 - b + b * lengths[ids] / (average_length or 1))
+            self.idf[term] = idf
+            self._postings[term] = (ids, idf * frequencies * (k1 + 1) / (frequencies + norm))
+
+        # Unknown query terms count as the rarest term when judging coverage
+        self._max_idf = max(self.idf.values(), default=1.0)
+
+        logger.info(f"BM25 index built over {count} chunks with {len(self.idf)} terms")
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> LexicalResult:
+        """
+        Rank documents for a query.
+
+        Args:
+            query: Search query
+            k: Number of hits to return
+            predicate: Optional metadata filter applied before ranking
+
+        Returns:
+            LexicalResult with the top hits, best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.documents:
+            return LexicalResult()
+
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                ids, weights = posting
+                scores[ids] += weights
+
+        candidates = np.flatnonzero(scores)
+        if predicate is not None:
+            candidates = np.array(
+                [i for i in candidates if predicate(self.documents[i].metadata)], dtype=np.int64
+            )
+        if not len(candidates):
+            return LexicalResult()
+
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        hits = [(self.documents[i], float(scores[i])) for i in ranked]
+
+        top_terms = set(tokenize(hits[0][0].page_content))
+        total_weight = sum(self.idf.get(term, self._max_idf) for term in terms)
+        matched_weight = sum(self.idf[term] for term in terms if term in top_terms and term in self.idf)
+        runner_up = hits[1][1] if len(hits) > 1 else 0.0
+
+        return LexicalResult(
+            hits=hits,
+            coverage=matched_weight / total_weight if total_weight else 0.0,
+            margin=hits[0][1] / runner_up if runner_up else math.inf
+        )
@@ -0,0 +1,518 @@
+"""
+In-process NumPy vector store for the Bank of Kigali AI Assistant.
+Unit-normalized float32 embeddings live in a memory-mapped .npy file next to a JSON
+metadata table; search is one matrix-vector product plus argpartition. Optionally the
+scan runs over a float16 or int8 copy and only the top candidates are re-scored in float32,
+and large indexes are partitioned (IVF) so a query scans only the closest partitions.
+"""
+
+import json
+import os
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from config.settings import settings
+from core.ivf_index import IVFIndex
+from core.retrieval import metadata_matches
+from utils.logging_config import logger
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.json"
+SCALES_FILE = "scales.npy"
+IVF_FILE = "ivf.npz"
+QUANTIZATIONS = ("float32", "float16", "int8")
+SCORE_BLOCK_ROWS = 256  # Quantized rows widened to float32 at a time; small blocks stay in CPU cache
+
+def normalize_rows(vectors: Any) -> np.ndarray:
+    """Convert vectors to a float32 matrix with unit-length rows."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def quantize(vectors: np.ndarray, quantization: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Compact copy of unit-length rows for scanning.
+
+    Args:
+        vectors: float32 matrix
+        quantization: "float32" (no copy), "float16" or "int8" (symmetric, one scale per row)
+
+    Returns:
+        Codes and per-row scales (None where not applicable)
+    """
+    if quantization == "float16":
+        return np.asarray(vectors, dtype=np.float16), None
+    if quantization == "int8":
+        matrix = np.asarray(vectors, dtype=np.float32)
+        scales = np.abs(matrix).max(axis=1) / 127 if len(matrix) else np.zeros(0, dtype=np.float32)
+        scales = np.where(scales == 0, 1, scales).astype(np.float32)
+        codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+    return None, None
+
+def approximate_scores(codes: np.ndarray, scales: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+    """Dot products of a float32 query with quantized rows, widening one cache-sized block at a time."""
+    scores = np.empty(len(codes), dtype=np.float32)
+    buffer = np.empty((min(SCORE_BLOCK_ROWS, len(codes)), codes.shape[1]), dtype=np.float32)
+    for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+        block = codes[start:start + SCORE_BLOCK_ROWS]
+        widened = buffer[:len(block)]
+        np.copyto(widened, block, casting="unsafe")
+        scores[start:start + len(block)] = widened @ query
+    if scales is not None:
+        scores *= scales
+    return scores
+
+class NumpyVectorStore(VectorStore):
+    """
+    LangChain vector store backed by a NumPy matrix.
+
+    Scores are cosine similarities. Writes rebuild the matrix in memory and replace the
+    files atomically; reads use the memory-mapped copy so the OS page cache is shared
+    across worker processes. With quantization only the compact copy is scanned, so the
+    float32 pages of non-candidates are never touched.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        persist_directory: Optional[str] = None,
+        quantization: str = settings.VECTOR_QUANTIZATION,
+        rescore_factor: int = settings.VECTOR_RESCORE_FACTOR,
+        ivf_enabled: bool = settings.VECTOR_IVF_ENABLED,
+        nprobe: int = settings.IVF_NPROBE
+    ):
+        """
+        Open a store, loading persisted vectors if present.
+
+        Args:
+            embedding_function: Embeddings used for queries and added texts
+            persist_directory: Directory holding the vector and metadata files (None for in-memory only)
+            quantization: "float32", "float16" or "int8" copy scanned at query time
+            rescore_factor: With quantization, k * rescore_factor candidates are re-scored in float32
+            ivf_enabled: Partition the index once it holds IVF_MIN_VECTORS vectors
+            nprobe: Partitions searched per query by default
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unsupported quantization {quantization!r}, expected one of {QUANTIZATIONS}")
+        self._embedding = embedding_function
+        self.persist_directory = persist_directory
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self.ivf_enabled = ivf_enabled
+        self.nprobe = nprobe
+        self._ivf: Optional[IVFIndex] = None
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._mask_cache: Dict[str, np.ndarray] = {}
+
+        if persist_directory and os.path.exists(os.path.join(persist_directory, VECTORS_FILE)):
+            self._load()
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def _codes_file(self) -> str:
+        return f"vectors.{self.quantization}.npy"
+
+    def scan_bytes(self) -> int:
+        """Bytes of vector data read by a full scan (the working set each process keeps hot)."""
+        if self._codes is None:
+            return int(np.asarray(self._vectors).nbytes) if len(self._ids) else 0
+        return int(self._codes.nbytes) + (int(self._scales.nbytes) if self._scales is not None else 0)
+
+    def _load(self) -> None:
+        """Memory-map the vectors and read the metadata table."""
+        with open(os.path.join(self.persist_directory, METADATA_FILE), encoding="utf-8") as f:
+            table = json.load(f)
+
+        self._vectors = np.load(os.path.join(self.persist_directory, VECTORS_FILE), mmap_mode="r")
+        self._ids = table["ids"]
+        self._texts = table["texts"]
+        self._metadatas = table["metadatas"]
+        self._row_by_id = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._mask_cache.clear()
+
+        if self.quantization != "float32":
+            codes_path = os.path.join(self.persist_directory, self._codes_file)
+            scales_path = os.path.join(self.persist_directory, SCALES_FILE)
+            if os.path.exists(codes_path) and (self.quantization != "int8" or os.path.exists(scales_path)):
+                self._codes = np.load(codes_path, mmap_mode="r")
+                self._scales = np.load(scales_path) if self.quantization == "int8" else None
+            if self._codes is None or len(self._codes) != len(self._ids):
+                # First start with this quantization (or a stale copy): derive it from the float32 vectors
+                self._codes, self._scales = quantize(self._vectors, self.quantization)
+                self._save()
+
+        ivf_path = os.path.join(self.persist_directory, IVF_FILE)
+        if self.ivf_enabled:
+            self._ivf = IVFIndex.load(ivf_path) if os.path.exists(ivf_path) else None
+            if self._ivf is not None and len(self._ivf.assignments) != len(self._ids):
+                self._ivf = None
+            if self._refresh_ivf():
+                self._save()
+
+        logger.info(f"Loaded NumPy vector index with {len(self._ids)} vectors from {self.persist_directory}")
+
+    def _refresh_ivf(self) -> bool:
+        """Train or drop the IVF partitioning as the index crosses size thresholds; True if it was retrained."""
+        if not self.ivf_enabled or len(self._ids) < settings.IVF_MIN_VECTORS:
+            self._ivf = None
+            return False
+        if self._ivf is not None and len(self._ids) < self._ivf.trained_size * settings.IVF_RETRAIN_GROWTH:
+            return False
+        # Untrained, or grown enough that the centroids no longer reflect the corpus
+        n_lists = settings.IVF_LISTS or int(np.sqrt(len(self._ids)))
+        self._ivf = IVFIndex.train(self._vectors, n_lists)
+        return True
+
+    def _save(self) -> None:
+        """Write the vectors and metadata to temporary files, then swap them in."""
+        if not self.persist_directory:
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+
+        vectors_path = os.path.join(self.persist_directory, VECTORS_FILE)
+        metadata_path = os.path.join(self.persist_directory, METADATA_FILE)
+        codes_path = os.path.join(self.persist_directory, self._codes_file)
+        scales_path = os.path.join(self.persist_directory, SCALES_FILE)
+
+        with open(vectors_path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(self._vectors, dtype=np.float32))
+        with open(metadata_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}, f)
+
+        if self._codes is not None:
+            with open(codes_path + ".tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(self._codes))
+            if self._scales is not None:
+                with open(scales_path + ".tmp", "wb") as f:
+                    np.save(f, self._scales)
+
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(metadata_path + ".tmp", metadata_path)
+        if self._codes is not None:
+            os.replace(codes_path + ".tmp", codes_path)
+            if self._scales is not None:
+                os.replace(scales_path + ".tmp", scales_path)
+
+        # Serve reads from the page cache rather than the private in-memory copy
+        self._vectors = np.load(vectors_path, mmap_mode="r")
+        if self._codes is not None:
+            self._codes = np.load(codes_path, mmap_mode="r")
+        ivf_path = os.path.join(self.persist_directory, IVF_FILE)
+        if self._ivf is not None:
+            self._ivf.save(ivf_path + ".tmp")
+            os.replace(ivf_path + ".tmp", ivf_path)
+        elif os.path.exists(ivf_path):
+            os.remove(ivf_path)
+
+        # Copies for other quantizations no longer match the vectors; the next open with one re-derives it
+        for quantization in QUANTIZATIONS[1:]:
+            path = os.path.join(self.persist_directory, f"vectors.{quantization}.npy")
+            if (quantization != self.quantization or self._codes is None) and os.path.exists(path):
+                os.remove(path)
+        if self._scales is None and os.path.exists(scales_path):
+            os.remove(scales_path)
+
+    def add_embeddings(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """
+        Add precomputed embeddings; existing ids are replaced.
+
+        Args:
+            texts: Chunk texts
+            embeddings: One vector per text
+            metadatas: Optional metadata per text
+            ids: Optional ids per text (generated if omitted)
+
+        Returns:
+            Ids of the added entries
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = [dict(m or {}) for m in metadatas] if metadatas is not None else [{} for _ in texts]
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        new_vectors = normalize_rows(embeddings)
+
+        with self._lock:
+            replaced = [doc_id for doc_id in ids if doc_id in self._row_by_id]
+            if replaced:
+                self._delete_rows(replaced)
+
+            if len(self._ids):
+                self._vectors = np.concatenate([np.asarray(self._vectors), new_vectors])
+            else:
+                self._vectors = new_vectors
+            if self._ivf is not None:
+                # Incremental insert: new rows join their closest existing partitions
+                self._ivf = self._ivf.add(new_vectors)
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(metadatas)
+            self._row_by_id = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._mask_cache.clear()
+            self._codes, self._scales = quantize(self._vectors, self.quantization)
+            self._refresh_ivf()
+            self._save()
+
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Embed and add texts."""
+        texts = list(texts)
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas, ids)
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Embed texts asynchronously and add them."""
+        texts = list(texts)
+        return self.add_embeddings(texts, await self._embedding.aembed_documents(texts), metadatas, ids)
+
+    def _delete_rows(self, ids: Sequence[str]) -> None:
+        rows = {self._row_by_id[doc_id] for doc_id in ids if doc_id in self._row_by_id}
+        keep = [row for row in range(len(self._ids)) if row not in rows]
+        self._vectors = np.asarray(self._vectors)[keep]
+        if self._ivf is not None:
+            self._ivf = self._ivf.keep(np.asarray(keep, dtype=np.int64))
+        self._ids = [self._ids[row] for row in keep]
+        self._texts = [self._texts[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._row_by_id = {doc_id: row for row, doc_id in enumerate(self._ids)}
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete entries by id."""
+        if not ids:
+            return False
+        with self._lock:
+            self._delete_rows(ids)
+            self._mask_cache.clear()
+            self._codes, self._scales = quantize(self._vectors, self.quantization)
+            self._refresh_ivf()
+            self._save()
+        return True
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Read stored entries, mirroring Chroma's get().
+
+        Args:
+            ids: Restrict to these ids
+            where: Metadata filter
+            include: Any of "documents", "metadatas", "embeddings"
+            limit: Most entries to return, for reading the store in pages
+            offset: Matching entries to skip
+
+        Returns:
+            Dictionary with "ids" and the requested fields
+        """
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_by_id[doc_id] for doc_id in ids if doc_id in self._row_by_id]
+            else:
+                rows = list(range(len(self._ids)))
+            if where:
+                rows = [row for row in rows if metadata_matches(self._metadatas[row], where)]
+            rows = rows[offset:offset + limit if limit is not None else None]
+
+            result: Dict[str, Any] = {"ids": [self._ids[row] for row in rows]}
+            if "documents" in include:
+                result["documents"] = [self._texts[row] for row in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [self._metadatas[row] for row in rows]
+            if "embeddings" in include:
+                result["embeddings"] = np.asarray(self._vectors)[rows] if rows else np.zeros((0, 0), dtype=np.float32)
+            return result
+
+    def _filter_mask(self, search_filter: Dict[str, Any]) -> np.ndarray:
+        """Boolean row mask for a metadata filter, cached until the next write."""
+        key = json.dumps(search_filter, sort_keys=True, default=str)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (metadata_matches(metadata, search_filter) for metadata in self._metadatas),
+                dtype=bool, count=len(self._metadatas)
+            )
+            self._mask_cache[key] = mask
+        return mask
+
+    def _probe(self, ivf: IVFIndex, query: np.ndarray, k: int, nprobe: int, mask: Optional[np.ndarray]) -> np.ndarray:
+        """Candidate rows from the closest partitions, probing wider until a filter leaves at least k."""
+        while True:
+            candidates = ivf.probe(query, nprobe)
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            if len(candidates) >= k or nprobe >= ivf.n_lists:
+                return candidates
+            nprobe *= 2
+
+    def _top_k(
+        self,
+        query_vector: Sequence[float],
+        k: int,
+        search_filter: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None
+    ) -> List[Tuple[Document, float]]:
+        """The k best matches with cosine scores."""
+        # Writes replace the matrix and only append to or replace the lists, so this snapshot stays consistent
+        with self._lock:
+            vectors, codes, scales, ivf = self._vectors, self._codes, self._scales, self._ivf
+            texts, metadatas = self._texts, self._metadatas
+            mask = self._filter_mask(search_filter) if search_filter else None
+        if not len(vectors) or k <= 0:
+            return []
+
+        query = normalize_rows(query_vector)[0]
+        if ivf is not None:
+            # Score only the rows in the partitions closest to the query
+            candidates = self._probe(ivf, query, k, nprobe or self.nprobe, mask)
+            if not len(candidates):
+                return []
+            if codes is None:
+                scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+            else:
+                scores = approximate_scores(codes[candidates], scales[candidates] if scales is not None else None, query)
+        else:
+            if codes is None:
+                scores = vectors @ query
+            else:
+                scores = approximate_scores(codes, scales, query)
+            candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(scores))
+            if not len(candidates):
+                return []
+            scores = scores[candidates]
+
+        # With quantization, shortlist more rows and order them by their exact float32 scores
+        shortlist = min(len(scores), k if codes is None else k * self.rescore_factor)
+        top = np.argpartition(-scores, shortlist - 1)[:shortlist]
+        rows = candidates[top]
+        if codes is not None:
+            rows = np.sort(rows)  # Sequential reads from the memory map
+            exact = np.asarray(vectors[rows], dtype=np.float32) @ query
+        else:
+            exact = scores[top]
+        order = np.argsort(-exact)[:min(k, shortlist)]
+        return [
+            (Document(page_content=texts[rows[i]], metadata=dict(metadatas[rows[i]])), float(exact[i]))
+            for i in order
+        ]
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Documents most similar to a vector, with cosine similarity scores; nprobe overrides the IVF probe count."""
+        return self._top_k(embedding, k, filter, kwargs.get("nprobe"))
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        """Documents most similar to a vector."""
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter, **kwargs)]
+
+    async def asimilarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        """Search inline: a single matrix product is cheaper than an executor hop."""
+        return self.similarity_search_by_vector(embedding, k, filter, **kwargs)
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Documents most similar to a query, with cosine similarity scores."""
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k, filter, **kwargs)
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        """Documents most similar to a query."""
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k, filter, **kwargs)
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] mapped to [0, 1]
+        return lambda score: (score + 1) / 2
+
+    def persist(self) -> None:
+        """Writes are persisted immediately; kept for compatibility with Chroma callers."""
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        persist_directory: Optional[str] = None,
+        **kwargs: Any
+    ) -> "NumpyVectorStore":
+        """Create a store from texts, replacing any index already in persist_directory."""
+        options = {key: kwargs[key] for key in ("quantization", "rescore_factor", "ivf_enabled", "nprobe") if key in kwargs}
+        store = cls(embedding_function=embedding, **options)
+        store.persist_directory = persist_directory
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -0,0 +1,127 @@
+"""
+Prompt assembly with a stable, cacheable prefix for the Bank of Kigali AI Assistant.
+Content is ordered from most static to most dynamic so OpenAI's automatic prefix caching applies.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from utils.logging_config import logger
+
+class PromptAssembler:
+    """
+    Collects prompt blocks tagged with a stability level and renders them
+    ordered from most static to most dynamic.
+    """
+
+    STATIC = 0  # Identical for every request
+    USER = 1    # Stable across a single customer's turns
+
+    def __init__(self, separator: str = "\n\n"):
+        """
+        Initialize the assembler.
+
+        Args:
+            separator: Text placed between rendered blocks
+        """
+        self.separator = separator
+        self._blocks: List[Tuple[int, int, str]] = []
+
+    def add(self, stability: int, text: str) -> "PromptAssembler":
+        """
+        Add a block of prompt text.
+
+        Args:
+            stability: One of the stability levels defined on this class
+            text: Block content; empty blocks are skipped
+
+        Returns:
+            The assembler, for chaining
+        """
+        if text:
+            self._blocks.append((stability, len(self._blocks), text.strip("\n")))
+        return self
+
+    def render(self) -> str:
+        """Render all blocks, most static first, keeping insertion order within a level."""
+        return self.separator.join(text for _, _, text in sorted(self._blocks))
+
+class PromptCacheTracker:
+    """Aggregates provider-reported prompt and cached-prompt token counts per service category."""
+
+    def __init__(self):
+        """Initialize the tracker."""
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        )
+        self._handlers: Dict[str, "PromptCacheCallbackHandler"] = {}
+        self._lock = threading.Lock()
+
+    def handler(self, service_category: str) -> "PromptCacheCallbackHandler":
+        """Get the callback handler that records usage for a service category."""
+        with self._lock:
+            if service_category not in self._handlers:
+                self._handlers[service_category] = PromptCacheCallbackHandler(self, service_category)
+            return self._handlers[service_category]
+
+    def record(self, service_category: str, token_usage: Dict[str, Any]) -> None:
+        """
+        Record token usage returned by the provider for one LLM call.
+
+        Args:
+            service_category: Service category the call was made for
+            token_usage: OpenAI "usage" block (prompt_tokens, prompt_tokens_details, ...)
+        """
+        prompt_tokens = token_usage.get("prompt_tokens", 0) or 0
+        details = token_usage.get("prompt_tokens_details") or {}
+        cached_tokens = details.get("cached_tokens", 0) or 0
+
+        with self._lock:
+            stats = self._stats[service_category]
+            stats["requests"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["cached_tokens"] += cached_tokens
+
+        logger.debug(f"Prompt usage for {service_category}: {cached_tokens}/{prompt_tokens} tokens cached")
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get cached-token statistics per service category.
+
+        Returns:
+            Dictionary keyed by service category with totals and cached_ratio
+        """
+        with self._lock:
+            report = {}
+            for service_category, stats in self._stats.items():
+                prompt_tokens = stats["prompt_tokens"]
+                report[service_category] = {
+                    **stats,
+                    "cached_ratio": round(stats["cached_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0
+                }
+            return report
+
+    def reset(self) -> None:
+        """Clear all recorded statistics."""
+        with self._lock:
+            self._stats.clear()
+
+class PromptCacheCallbackHandler(BaseCallbackHandler):
+    """LangChain callback that forwards LLM token usage to a PromptCacheTracker."""
+
+    def __init__(self, tracker: PromptCacheTracker, service_category: str):
+        self.tracker = tracker
+        self.service_category = service_category
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        """Record token usage once the LLM call completes."""
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        if token_usage:
+            self.tracker.record(self.service_category, token_usage)
+
+# Process-wide tracker shared by all chat services
+prompt_cache_tracker = PromptCacheTracker()
@@ -0,0 +1,202 @@
+"""
+Zero-downtime re-indexing of product documents for the Bank of Kigali AI Assistant.
+A new index version is seeded from the live one and synced in its own directory while
+the live one keeps serving, then swapped in atomically; the old version is removed once
+its queries have drained.
+"""
+
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from utils.logging_config import logger
+
+ACTIVE_INDEX_SUFFIX = ".active"
+
+def active_index_directory(default_directory: str) -> str:
+    """The index directory currently in use: the one named by the pointer file, else the default."""
+    pointer = default_directory + ACTIVE_INDEX_SUFFIX
+    if os.path.exists(pointer):
+        with open(pointer, encoding="utf-8") as f:
+            directory = f.read().strip()
+        if directory and os.path.isdir(directory):
+            return directory
+        logger.warning(f"Active index pointer {pointer} names a missing directory, using {default_directory}")
+    return default_directory
+
+def set_active_index_directory(default_directory: str, directory: str) -> None:
+    """Point future startups at an index directory (written atomically)."""
+    pointer = default_directory + ACTIVE_INDEX_SUFFIX
+    parent = os.path.dirname(pointer)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(directory)
+    os.replace(pointer + ".tmp", pointer)
+
+class ReindexManager:
+    """Runs one background rebuild at a time and swaps the result into a DocumentBasedAIService."""
+
+    def __init__(self, service: Any, drain_timeout_seconds: float = settings.REINDEX_DRAIN_TIMEOUT_SECONDS):
+        """
+        Initialize the manager.
+
+        Args:
+            service: Service exposing document_processor and swap_document_processor()
+            drain_timeout_seconds: Longest wait for queries on the old version before removing it
+        """
+        self.service = service
+        self.drain_timeout_seconds = drain_timeout_seconds
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._building = None
+        self._undrained: List[Any] = []  # Swapped-out processors whose queries outlived the drain timeout
+        self.full = False
+        self.state = "idle"
+        self.stage: Optional[str] = None
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.error: Optional[str] = None
+        self.report: Optional[Dict[str, Any]] = None
+        self.swaps = 0
+
+    @property
+    def running(self) -> bool:
+        return self.state == "running"
+
+    def start(self, full: bool = False) -> bool:
+        """
+        Start a rebuild in a background thread.
+
+        Args:
+            full: Re-parse, re-chunk and re-embed every file instead of syncing a copy of the live index
+
+        Returns:
+            False if a rebuild is already running
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self.state = "running"
+            self.stage = "starting"
+            self.full = full
+            self.started_at = datetime.now().isoformat()
+            self.finished_at = None
+            self.error = None
+            self.report = None
+            self._thread = threading.Thread(target=self._run, name="reindex", daemon=True)
+            self._thread.start()
+        return True
+
+    def _run(self) -> None:
+        # Imported here: document_qa imports this module
+        from core.document_qa import DocumentProcessor
+
+        old = self.service.document_processor
+        directory = None
+        swapped = False
+        try:
+            _, default_directory = old._vector_store_backend()
+            directory = f"{default_directory}_v{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            self._remove_stale_versions(default_directory, old.persist_directory)
+
+            # A copy of the live vectors and manifest lets the sync below touch only changed files;
+            # extracted page text is cached beside the PDFs, so it is shared by every version
+            if not self.full and os.path.isdir(old.persist_directory):
+                self.stage = "seeding"
+                shutil.copytree(old.persist_directory, directory)
+
+            self.stage = "building"
+            logger.info(f"Building new document index in {directory}")
+            processor = DocumentProcessor(old.documents_base_path, persist_directory=directory)
+            # Continue the live version numbering so caches keyed by it never see a repeat
+            processor.index_version = old.index_version
+            self._building = processor
+            processor.setup()
+            report = processor.last_ingestion_report
+            self.report = report.to_dict() if report else None
+            if report and report.failed:
+                logger.warning(f"New index is missing {len(report.failed)} files that failed to ingest")
+
+            self.stage = "swapping"
+            self.service.swap_document_processor(processor)
+            swapped = True
+            set_active_index_directory(default_directory, directory)
+            self.swaps += 1
+            logger.info(f"Swapped in document index {os.path.basename(directory)}")
+
+            self.stage = "draining"
+            if old.drain(self.drain_timeout_seconds):
+                old_directory = old.persist_directory
+                if old_directory != directory:
+                    shutil.rmtree(old_directory, ignore_errors=True)
+                    logger.info(f"Removed previous document index {old_directory}")
+            else:
+                logger.error(
+                    f"{old.active_queries} queries still use the previous index after {self.drain_timeout_seconds}s; "
+                    f"{old.persist_directory} will be removed by the next re-index"
+                )
+                self._undrained.append(old)
+
+            self.state = "succeeded"
+        except Exception as e:
+            logger.error(f"Background re-index failed, keeping the current index: {e}")
+            self.error = str(e)
+            self.state = "failed"
+            if directory and not swapped:
+                shutil.rmtree(directory, ignore_errors=True)
+        finally:
+            self.stage = None
+            self._building = None
+            self.finished_at = datetime.now().isoformat()
+
+    def _remove_stale_versions(self, default_directory: str, live_directory: str) -> None:
+        """
+        Delete index versions left behind by earlier rebuilds.
+
+        These are versions whose queries outlived the drain timeout and have since finished,
+        and sibling version directories from rebuilds interrupted by a restart.
+
+        Args:
+            default_directory: Configured index directory that versions are named after
+            live_directory: Directory of the version currently serving queries
+        """
+        still_used = [processor for processor in self._undrained if processor.active_queries]
+        self._undrained = still_used
+        keep = {os.path.abspath(live_directory)} | {os.path.abspath(p.persist_directory) for p in still_used}
+
+        parent = os.path.dirname(os.path.abspath(default_directory))
+        base = os.path.basename(os.path.abspath(default_directory))
+        if not os.path.isdir(parent):
+            return
+        for name in sorted(os.listdir(parent)):
+            path = os.path.join(parent, name)
+            if (name == base or name.startswith(f"{base}_v")) and os.path.isdir(path) and path not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+                logger.info(f"Removed stale document index {path}")
+
+    def status(self) -> Dict[str, Any]:
+        """Progress of the current or last rebuild and the live index version."""
+        live = self.service.document_processor
+        building = self._building
+        progress = None
+        if building is not None:
+            progress = {"ingestion_stage": building.ingestion_stage, **building.bulk_embedder.progress}
+        return {
+            "state": self.state,
+            "stage": self.stage,
+            "full": self.full,
+            "progress": progress,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "report": self.report,
+            "swaps": self.swaps,
+            "active_index": os.path.basename(live.persist_directory),
+            "index_version": live.index_version,
+            "active_queries": live.active_queries,
+            "undrained_indexes": [os.path.basename(p.persist_directory) for p in self._undrained]
+        }
@@ -0,0 +1,153 @@
+"""
+Local reranking of retrieved chunks for the Bank of Kigali AI Assistant.
+Over-fetched candidates are re-scored on the CPU (query term coverage with fuzzy matching,
+plus cosine similarity when chunk vectors are cached) and only the best few are kept.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from config.settings import settings
+from core.lexical_index import tokenize
+from core.retrieval import adaptive_k
+from utils.logging_config import logger
+
+@dataclass
+class RerankResult:
+    """Kept chunks with their scores (empty when they were not scored), plus how many candidates were dropped."""
+
+    documents: List[Any]
+    scores: List[float]
+    dropped: int
+
+class LocalReranker:
+    """Scores candidate chunks against a question without any model call."""
+
+    def __init__(
+        self,
+        embeddings: Any = None,
+        top_n: int = settings.RERANK_TOP_N,
+        min_score: float = settings.RERANK_MIN_SCORE,
+        min_keep: int = settings.RERANK_MIN_KEEP,
+        term_weight: float = settings.RERANK_TERM_WEIGHT,
+        fuzzy_cutoff: float = 85.0
+    ):
+        """
+        Initialize the reranker.
+
+        Args:
+            embeddings: Embeddings with get_cached(texts) (CachedEmbeddings), used for the cosine score
+            top_n: Maximum chunks kept
+            min_score: Chunks scoring below this are dropped
+            min_keep: Chunks kept regardless of score, so the prompt always has context
+            term_weight: Weight of term coverage; cosine similarity gets the rest
+            fuzzy_cutoff: RapidFuzz ratio (0-100) at which a misspelled term counts as matched
+        """
+        self.embeddings = embeddings
+        self.top_n = top_n
+        self.min_score = min_score
+        self.min_keep = min_keep
+        self.term_weight = term_weight
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.reranked = 0
+        self.unscored = 0  # Reranks that kept retrieval order for lack of cosine scores
+        self.candidates_seen = 0
+        self.kept = 0
+
+    def term_coverage(self, query_terms: Sequence[str], text: str) -> float:
+        """Share of query terms found in the text, exactly or as a close misspelling."""
+        if not query_terms:
+            return 0.0
+        doc_terms = set(tokenize(text))
+        matched = 0.0
+        for term in query_terms:
+            if term in doc_terms:
+                matched += 1.0
+            elif len(term) > 3 and doc_terms:
+                best = process.extractOne(term, doc_terms, scorer=fuzz.ratio, score_cutoff=self.fuzzy_cutoff)
+                if best is not None:
+                    matched += best[1] / 100
+        return matched / len(query_terms)
+
+    def cosine_scores(self, query_vector: Optional[Sequence[float]], docs: Sequence[Any]) -> Optional[np.ndarray]:
+        """Cosine similarity of each chunk to the query from cached chunk vectors; None if any is missing."""
+        if query_vector is None or self.embeddings is None or not hasattr(self.embeddings, "get_cached"):
+            return None
+        vectors = self.embeddings.get_cached([doc.page_content for doc in docs])
+        if any(vector is None for vector in vectors):
+            return None
+        matrix = np.asarray(vectors, dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+        return (matrix @ query) / np.where(norms == 0, 1, norms)
+
+    def score(self, question: str, docs: Sequence[Any], query_vector: Optional[Sequence[float]] = None) -> List[float]:
+        """Relevance of each chunk to the question in [0, 1]; term coverage alone without cached vectors."""
+        return self._blend(question, docs, self.cosine_scores(query_vector, docs)).tolist()
+
+    def _blend(self, question: str, docs: Sequence[Any], cosines: Optional[np.ndarray]) -> np.ndarray:
+        query_terms = list(dict.fromkeys(tokenize(question)))
+        terms = np.array([self.term_coverage(query_terms, doc.page_content) for doc in docs], dtype=np.float32)
+        if cosines is None:
+            return terms
+        return self.term_weight * terms + (1 - self.term_weight) * np.clip(cosines, 0, 1)
+
+    def rerank(self, question: str, docs: Sequence[Any], query_vector: Optional[Sequence[float]] = None) -> RerankResult:
+        """
+        Keep the best chunks for a question.
+
+        Without the query vector or a cached vector for every chunk there is no cosine
+        score; the thresholds are tuned for the blended score, so the first top_n chunks
+        are then kept in retrieval order rather than re-ranked on term coverage alone.
+
+        Args:
+            question: User question
+            docs: Candidate chunks, best first by retrieval rank
+            query_vector: Question embedding, if computed earlier in the turn
+
+        Returns:
+            RerankResult with at most top_n chunks, best first
+        """
+        docs = list(docs)
+        if not docs:
+            return RerankResult([], [], 0)
+
+        self.reranked += 1
+        self.candidates_seen += len(docs)
+        cosines = self.cosine_scores(query_vector, docs)
+        if cosines is None:
+            self.unscored += 1
+            self.kept += min(len(docs), self.top_n)
+            logger.debug(f"No cosine scores for {len(docs)} chunks, keeping retrieval order")
+            return RerankResult(documents=docs[:self.top_n], scores=[], dropped=max(len(docs) - self.top_n, 0))
+
+        scores = self._blend(question, docs, cosines).tolist()
+        # Stable sort keeps retrieval order between equal scores
+        ranked: List[Tuple[float, Any]] = sorted(zip(scores, docs), key=lambda pair: -pair[0])
+        kept = [
+            (score, doc) for i, (score, doc) in enumerate(ranked[:self.top_n])
+            if score >= self.min_score or i < self.min_keep
+        ]
+        if settings.ADAPTIVE_K_ENABLED:
+            # Fewer chunks when one or two clearly stand out
+            kept = kept[:adaptive_k([score for score, _ in kept], self.min_keep)]
+
+        self.kept += len(kept)
+        logger.debug(f"Reranked {len(docs)} chunks, kept {len(kept)} (top score {ranked[0][0]:.2f})")
+        return RerankResult(
+            documents=[doc for _, doc in kept],
+            scores=[score for score, _ in kept],
+            dropped=len(docs) - len(kept)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Average candidates seen and chunks kept per question."""
+        return {
+            "reranked": self.reranked,
+            "unscored": self.unscored,
+            "avg_candidates": round(self.candidates_seen / self.reranked, 2) if self.reranked else 0.0,
+            "avg_kept": round(self.kept / self.reranked, 2) if self.reranked else 0.0
+        }
@@ -0,0 +1,228 @@
+"""
+Memoizing retrieval layer over the product vector store for the Bank of Kigali AI Assistant.
+Search results are cached by normalized query and search parameters until the index is rebuilt.
+"""
+
+import json
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from config.settings import settings
+from core.intent_router import SEGMENT_TERMS
+from utils.logging_config import logger
+from utils.lru_cache import LRUCache
+from utils.text_utils import normalize_question
+
+# Document segments implied by a service category when the question names none
+SERVICE_CATEGORY_SEGMENTS: Dict[str, List[str]] = {
+    "personalized_banking": ["retail"],
+    "executive_services": ["corporate", "institutional"]
+}
+
+def choose_segments(detected: Sequence[str], service_category: str) -> List[str]:
+    """
+    Pick the document segments to search.
+
+    Args:
+        detected: Segments detected in the question (keywords or a decisive centroid match)
+        service_category: Service category of the request
+
+    Returns:
+        Segments to restrict retrieval to; empty for a global search
+    """
+    if detected:
+        return list(detected)
+    if service_category in SERVICE_CATEGORY_SEGMENTS:
+        return list(SERVICE_CATEGORY_SEGMENTS[service_category])
+    # Service categories may also name a segment directly (e.g. "sme")
+    if service_category in SEGMENT_TERMS:
+        return [service_category]
+    return []
+
+def segment_filter(segments: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """Metadata filter restricting retrieval to the given segments (None for all)."""
+    if not segments:
+        return None
+    if len(segments) == 1:
+        return {"category": segments[0]}
+    return {"category": {"$in": list(segments)}}
+
+def adaptive_k(
+    scores: Sequence[float],
+    min_keep: int = 1,
+    relative_score: float = settings.ADAPTIVE_K_RELATIVE_SCORE,
+    min_gap: float = settings.ADAPTIVE_K_MIN_GAP
+) -> int:
+    """
+    Number of best-first results worth keeping, from the shape of their scores.
+
+    Results below relative_score times the best score are cut, and the list is also
+    cut at its largest score drop when that drop is at least min_gap.
+
+    Args:
+        scores: Scores sorted best first
+        min_keep: Results always kept
+        relative_score: Share of the best score a result needs
+        min_gap: Smallest score drop treated as the edge of the relevant results
+
+    Returns:
+        How many of the leading results to keep
+    """
+    if not scores:
+        return 0
+    floor = min(max(min_keep, 1), len(scores))
+
+    keep = len(scores)
+    for i in range(floor, len(scores)):
+        if scores[i] < scores[0] * relative_score:
+            keep = i
+            break
+
+    gaps = [scores[i - 1] - scores[i] for i in range(floor, keep)]
+    if gaps:
+        largest = max(range(len(gaps)), key=gaps.__getitem__)
+        if gaps[largest] >= min_gap:
+            keep = floor + largest
+    return keep
+
+def document_key(doc: Document) -> Hashable:
+    """Identity of a chunk across result lists (vector and lexical hits are distinct objects)."""
+    metadata = doc.metadata or {}
+    return (metadata.get("source"), metadata.get("page"), doc.page_content)
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = settings.RRF_K, limit: Optional[int] = None) -> List[Document]:
+    """
+    Merge ranked result lists with reciprocal rank fusion (score = sum of 1 / (k + rank)).
+
+    Args:
+        rankings: Result lists, each best first
+        k: Rank damping constant
+        limit: Maximum number of documents to return
+
+    Returns:
+        Fused documents, best first
+    """
+    scores: Dict[Hashable, float] = {}
+    documents: Dict[Hashable, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = document_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, doc)
+
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ordered[:limit]]
+
+def metadata_matches(metadata: Dict[str, Any], search_filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style metadata filter (equality, $eq, $ne, $in, $nin, $and, $or) in process."""
+    if not search_filter:
+        return True
+
+    for field_name, condition in search_filter.items():
+        if field_name == "$and":
+            if not all(metadata_matches(metadata, clause) for clause in condition):
+                return False
+        elif field_name == "$or":
+            if not any(metadata_matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(field_name)
+            for operator, operand in condition.items():
+                if operator == "$eq" and value != operand:
+                    return False
+                if operator == "$ne" and value == operand:
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+        elif metadata.get(field_name) != condition:
+            return False
+
+    return True
+
+class RetrievalCache:
+    """LRU cache of vector search results, keyed by index version, normalized query and search parameters."""
+
+    def __init__(
+        self,
+        max_entries: int = settings.RETRIEVAL_CACHE_MAX_ENTRIES,
+        ttl_seconds: Optional[int] = settings.RETRIEVAL_CACHE_TTL_SECONDS
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached searches
+            ttl_seconds: Lifetime of a cached search (None for no expiry)
+        """
+        self._results = LRUCache(max_entries, ttl_seconds)
+        self.index_version: Optional[int] = None
+
+    @staticmethod
+    def make_key(query: str, k: int, search_filter: Optional[Dict[str, Any]] = None) -> Hashable:
+        """Build the cache key for a search."""
+        filter_key = json.dumps(search_filter, sort_keys=True, default=str) if search_filter else None
+        return (normalize_question(query), k, filter_key)
+
+    def check_index_version(self, index_version: int) -> None:
+        """Drop all results if the document index has been rebuilt."""
+        if self.index_version != index_version:
+            if self.index_version is not None:
+                logger.info(f"Document index changed ({self.index_version} -> {index_version}), clearing retrieval cache")
+            self._results.clear()
+            self.index_version = index_version
+
+    def get(self, key: Hashable) -> Optional[List[Document]]:
+        """Get cached results; a new list is returned so callers cannot alter the cache."""
+        docs = self._results.get(key)
+        return list(docs) if docs is not None else None
+
+    def put(self, key: Hashable, docs: List[Document]) -> None:
+        """Store search results."""
+        self._results.set(key, list(docs))
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        self._results.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {"index_version": self.index_version, **self._results.stats()}
+
+class CachedRetriever(BaseRetriever):
+    """Retriever that delegates to DocumentProcessor.search so results go through the retrieval cache."""
+
+    document_processor: Any
+    k: int = settings.RETRIEVAL_K
+    search_filter: Optional[Dict[str, Any]] = None
+    rerank: bool = False  # Over-fetch and keep at most k chunks chosen by the local reranker
+
+    @property
+    def fetch_k(self) -> int:
+        return max(self.k, settings.RERANK_CANDIDATES) if self.rerank else self.k
+
+    def _rerank(self, query: str, docs: List[Document], query_vector: Optional[List[float]]) -> List[Document]:
+        if not self.rerank:
+            return docs
+        return self.document_processor.reranker.rerank(query, docs, query_vector).documents[:self.k]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        # The reranker's cosine score needs the query vector (usually an embedding cache hit)
+        query_vector = self.document_processor.query_embeddings.embed_query(query) if self.rerank else None
+        docs = self.document_processor.search(query, k=self.fetch_k, search_filter=self.search_filter)
+        return self._rerank(query, docs, query_vector)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        query_vector = await self.document_processor.query_embeddings.aembed_query(query) if self.rerank else None
+        docs = await self.document_processor.asearch(
+            query, k=self.fetch_k, search_filter=self.search_filter, query_vector=query_vector
+        )
+        return self._rerank(query, docs, query_vector)
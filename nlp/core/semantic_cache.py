@@ -0,0 +1,177 @@
+"""
+Two-tier semantic answer cache for product questions in the Bank of Kigali AI Assistant.
+An exact tier matches normalized question text; a similarity tier matches question embeddings.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from utils.logging_config import logger
+from utils.lru_cache import LRUCache
+from utils.text_utils import normalize_question
+
+@dataclass
+class CachedAnswer:
+    """A cached, personalization-free answer with its sources."""
+
+    answer: str
+    sources: List[Dict[str, Any]] = field(default_factory=list)
+    question: str = ""
+
+class SemanticAnswerCache:
+    """
+    Caches personalization-free product answers per service category.
+
+    Entries expire after a TTL, each tier is size-bounded with LRU eviction, and
+    the whole cache is dropped when the document index version changes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = settings.SEMANTIC_CACHE_TTL_SECONDS,
+        similarity_threshold: float = settings.SEMANTIC_CACHE_SIMILARITY_THRESHOLD
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum entries in the exact tier and per category in the similarity tier
+            ttl_seconds: Lifetime of a cached answer
+            similarity_threshold: Minimum cosine similarity for a similarity-tier hit
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.index_version: Optional[int] = None
+
+        self._exact = LRUCache(max_entries, ttl_seconds)
+        self._similar: Dict[str, LRUCache] = {}
+        self._matrices: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        self._lock = threading.RLock()
+        self.similarity_hits = 0
+
+        logger.info(f"Semantic answer cache initialized: {max_entries} entries, {ttl_seconds}s TTL, "
+                    f"similarity threshold {similarity_threshold}")
+
+    def check_index_version(self, index_version: int) -> None:
+        """Invalidate all entries if the document index has been rebuilt."""
+        with self._lock:
+            if self.index_version != index_version:
+                if self.index_version is not None:
+                    logger.info(f"Document index changed ({self.index_version} -> {index_version}), clearing answer cache")
+                self.invalidate()
+                self.index_version = index_version
+
+    def invalidate(self) -> None:
+        """Remove all cached answers."""
+        with self._lock:
+            self._exact.clear()
+            self._similar.clear()
+            self._matrices.clear()
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def get_exact(self, service_category: str, question: str) -> Optional[CachedAnswer]:
+        """
+        Look up an answer by normalized question text.
+
+        Args:
+            service_category: Service category partition
+            question: Raw question text
+
+        Returns:
+            Cached answer or None
+        """
+        return self._exact.get((service_category, normalize_question(question)))
+
+    def get_similar(self, service_category: str, query_vector: Sequence[float]) -> Optional[CachedAnswer]:
+        """
+        Look up the most similar cached question within a service category.
+
+        Args:
+            service_category: Service category partition
+            query_vector: Embedding of the question
+
+        Returns:
+            Cached answer if the best match reaches the similarity threshold, else None
+        """
+        with self._lock:
+            tier = self._similar.get(service_category)
+        if tier is None:
+            return None
+
+        # A second pass covers a best match that expired after the matrix was built
+        for _ in range(2):
+            with self._lock:
+                cached = self._matrices.get(service_category)
+                if cached is None:
+                    entries = list(tier.items())
+                    if not entries:
+                        return None
+                    keys = [key for key, _ in entries]
+                    matrix = np.stack([vector for _, (vector, _) in entries])
+                    cached = self._matrices[service_category] = (keys, matrix)
+            keys, matrix = cached
+
+            scores = matrix @ self._unit(query_vector)
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+
+            # Re-read through the LRU so expiry and recency are honoured
+            entry = tier.get(keys[best])
+            if entry is not None:
+                self.similarity_hits += 1
+                logger.debug(f"Semantic cache hit for {service_category} (similarity {scores[best]:.3f})")
+                return entry[1]
+
+            with self._lock:
+                if self._matrices.get(service_category) is cached:
+                    del self._matrices[service_category]
+        return None
+
+    def put(
+        self,
+        service_category: str,
+        question: str,
+        answer: CachedAnswer,
+        query_vector: Optional[Sequence[float]] = None
+    ) -> None:
+        """
+        Store a personalization-free answer in both tiers.
+
+        Args:
+            service_category: Service category partition
+            question: Raw question text
+            answer: Answer to cache
+            query_vector: Embedding of the question (similarity tier is skipped without it)
+        """
+        normalized = normalize_question(question)
+        self._exact.set((service_category, normalized), answer)
+
+        if query_vector is None:
+            return
+
+        with self._lock:
+            tier = self._similar.setdefault(service_category, LRUCache(self.max_entries, self.ttl_seconds))
+            tier.set(normalized, (self._unit(query_vector), answer))
+            self._matrices.pop(service_category, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            return {
+                "index_version": self.index_version,
+                "exact": self._exact.stats(),
+                "similarity_entries": {category: len(tier) for category, tier in self._similar.items()},
+                "similarity_hits": self.similarity_hits
+            }
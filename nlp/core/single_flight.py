@@ -0,0 +1,55 @@
+"""
+Single-flight coalescing of identical concurrent requests for the Bank of Kigali AI Assistant.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from utils.logging_config import logger
+
+class SingleFlight:
+    """
+    Runs at most one in-flight computation per key; concurrent callers with the
+    same key await the shared result instead of starting their own.
+    """
+    
+    def __init__(self):
+        """Initialize the single-flight group."""
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func for key, or join the computation already running for key.
+        
+        The computation runs as its own task, so a caller that disconnects
+        does not cancel it for the others waiting on the same key.
+        
+        Args:
+            key: Hashable key identifying identical requests
+            func: Zero-argument coroutine function computing the result
+            
+        Returns:
+            The shared result
+        """
+        task = self._inflight.get(key)
+        
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalesced request onto in-flight computation for key {key}")
+        
+        return await asyncio.shield(task)
+    
+    def stats(self) -> Dict[str, int]:
+        """Get counts of started and coalesced computations."""
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced
+        }
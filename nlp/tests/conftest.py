@@ -0,0 +1,38 @@
+"""
+Shared fixtures for ingestion tests: PDFs are plain-text files under a temporary base path.
+File: nlp/tests/conftest.py
+"""
+
+import os
+
+import pytest
+from langchain_core.embeddings import FakeEmbeddings
+
+import core.document_qa as document_qa
+import core.ingestion as ingestion
+from config.settings import settings
+
+@pytest.fixture
+def write_pdf(tmp_path):
+    """Write a "PDF" (read back as one page of plain text) into a category folder under tmp_path."""
+    def write(category, name, text):
+        os.makedirs(tmp_path / category, exist_ok=True)
+        with open(tmp_path / category / name, "w", encoding="utf-8") as f:
+            f.write(text)
+    return write
+
+@pytest.fixture
+def make_processor(tmp_path, monkeypatch):
+    """Factory for set-up DocumentProcessors over tmp_path: numpy store, inline parsing, fake embeddings."""
+    monkeypatch.setattr(settings, "VECTOR_STORE_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "INGEST_WORKERS", 1)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "DEDUP_ENABLED", True)
+    monkeypatch.setattr(ingestion, "parse_pdf", lambda path: [{"page": 0, "text": open(path, encoding="utf-8").read()}])
+    monkeypatch.setattr(document_qa, "OpenAIEmbeddings", lambda **kwargs: FakeEmbeddings(size=8))
+
+    def make():
+        processor = document_qa.DocumentProcessor(str(tmp_path))
+        processor.setup()
+        return processor
+    return make
@@ -0,0 +1,86 @@
+"""
+Tests for the API routes.
+File: nlp/tests/test_api.py
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import routes
+from config.settings import settings
+from core.enhanced_message_store import EnhancedMessageStore
+
+class FakeDocumentService:
+    """Answers every turn; optionally stores a competing turn while generating."""
+
+    def __init__(self, store=None, session_id=None):
+        self.store = store
+        self.session_id = session_id
+
+    async def generate_response(self, service_category, messages):
+        if self.store is not None:
+            self.store.add_qa_pair(self.session_id, "Concurrent question", "Concurrent answer")
+        return {"response": "Here are our loan products."}
+
+def make_client(document_service=None):
+    """Client for the router alone, without the app's startup hooks."""
+    app = FastAPI()
+    app.include_router(routes.router)
+    if document_service is not None:
+        app.dependency_overrides[routes.get_document_ai_service] = lambda: document_service
+    return TestClient(app)
+
+def turn(session_id, history_version):
+    return {
+        "message": "What loans do you offer?",
+        "session_id": session_id,
+        "history_version": history_version,
+        "service_category": "retail"
+    }
+
+def test_admin_endpoints_closed_without_key(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "")
+    client = make_client()
+
+    assert client.get("/admin/reindex").status_code == 403
+    assert client.get("/admin/reindex", headers={"X-Admin-Key": ""}).status_code == 403
+    assert client.post("/admin/reindex").status_code == 403
+
+def test_admin_endpoints_require_matching_key(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "secret")
+    monkeypatch.setattr(routes, "document_ai_service_instance", None)
+    client = make_client()
+
+    assert client.get("/admin/reindex", headers={"X-Admin-Key": "wrong"}).status_code == 403
+    response = client.get("/admin/reindex", headers={"X-Admin-Key": "secret"})
+    assert response.status_code == 200
+    assert response.json()["state"] == "idle"
+
+def test_v2_chat_rejects_stale_history_version(monkeypatch):
+    store = EnhancedMessageStore()
+    monkeypatch.setattr(routes, "message_store", store)
+    monkeypatch.setattr(settings, "ENABLE_CONVERSATION_SUMMARY", False)
+    client = make_client(FakeDocumentService())
+
+    first = client.post("/v2/chat", json=turn("session-1", 0))
+    assert first.status_code == 200
+    version = first.json()["history_version"]
+    assert version == store.get_history_version("session-1")
+
+    stale = client.post("/v2/chat", json=turn("session-1", 0))
+    assert stale.status_code == 409
+    assert stale.json()["detail"]["expected_version"] == 0
+    assert stale.json()["detail"]["current_version"] == version
+
+def test_v2_chat_rejects_turn_overtaken_during_generation(monkeypatch):
+    store = EnhancedMessageStore()
+    monkeypatch.setattr(routes, "message_store", store)
+    monkeypatch.setattr(settings, "ENABLE_CONVERSATION_SUMMARY", False)
+    client = make_client(FakeDocumentService(store, "session-2"))
+
+    response = client.post("/v2/chat", json=turn("session-2", 0))
+
+    assert response.status_code == 409
+    assert response.json()["detail"]["current_version"] == store.get_history_version("session-2")
+    # Only the competing turn was stored
+    assert [pair.question for pair in store.get_recent_conversations("session-2")] == ["Concurrent question"]
@@ -0,0 +1,32 @@
+"""
+Tests for token-aware chunking of product pages.
+File: nlp/tests/test_chunking.py
+"""
+
+from langchain_core.documents import Document
+
+from core.chunking import make_text_splitter, split_pages
+
+SECTIONS = ["1. OVERVIEW", "2. ELIGIBILITY", "3. FEES AND CHARGES"]
+
+def make_page():
+    """One page with three numbered sections, each long enough to need several chunks."""
+    parts = []
+    for number, heading in enumerate(SECTIONS, 1):
+        sentences = " ".join(f"Clause {number}.{i} of the SME loan applies to every borrower." for i in range(40))
+        parts.append(f"{heading}\n{sentences}")
+    return Document(page_content="\n\n".join(parts), metadata={"category": "sme", "page": 0})
+
+def test_multi_chunk_page_records_section_and_start_index():
+    page = make_page()
+    chunks = split_pages([page], make_text_splitter(80, 30))
+
+    assert len(chunks) > len(SECTIONS)
+    starts = [chunk.metadata["start_index"] for chunk in chunks]
+    assert starts == sorted(starts)
+    for chunk in chunks:
+        start = chunk.metadata["start_index"]
+        assert page.page_content[start:start + len(chunk.page_content)] == chunk.page_content
+        # Every clause in a chunk is numbered after the section the chunk falls under
+        number = SECTIONS.index(chunk.metadata["section"]) + 1
+        assert f"Clause {number}." in chunk.page_content
@@ -0,0 +1,37 @@
+"""
+Tests for token-budgeted context packing.
+File: nlp/tests/test_context_builder.py
+"""
+
+from langchain_core.documents import Document
+
+from core.context_builder import ContextBuilder
+
+def test_long_sections_never_push_out_the_top_chunk():
+    """A conversation section larger than the budget is trimmed so the top chunk still fits."""
+    builder = ContextBuilder()
+    chunks = [Document(page_content="The SME loan rate is 16% per annum. " * 20, metadata={"token_count": 200})]
+    question = "What is the SME loan rate?"
+    customer = "CUSTOMER INFORMATION:\nThe customer's name is Aline."
+    conversation = "CONVERSATION CONTEXT:\n" + "Earlier we discussed savings accounts. " * 500
+
+    packed = builder.build(budget=1000, sections=[question, customer, conversation], chunks=chunks)
+
+    assert packed.chunks == chunks
+    assert packed.used_tokens <= 1000
+    assert packed.sections[:2] == [question, customer]
+    assert packed.sections[2].startswith("CONVERSATION CONTEXT:")
+    assert len(packed.sections[2]) < len(conversation)
+    assert packed.trimmed_sections == 1
+
+def test_short_sections_are_kept_whole():
+    """Sections within their share of the budget are passed through unchanged."""
+    builder = ContextBuilder()
+    sections = ["Question?", "", "CONVERSATION CONTEXT:\nHello"]
+    chunks = [Document(page_content="chunk", metadata={"token_count": 10}) for _ in range(3)]
+
+    packed = builder.build(budget=1000, sections=sections, chunks=chunks)
+
+    assert packed.sections == sections
+    assert packed.chunks == chunks
+    assert packed.trimmed_sections == 0
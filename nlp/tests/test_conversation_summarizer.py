@@ -0,0 +1,57 @@
+"""
+Tests for folding evicted conversation pairs into rolling summaries.
+File: nlp/tests/test_conversation_summarizer.py
+"""
+
+import asyncio
+
+from core.conversation_summarizer import ConversationSummarizer
+from core.enhanced_message_store import EnhancedMessageStore
+
+class FailingChain:
+    async def ainvoke(self, inputs):
+        raise RuntimeError("model unavailable")
+
+class EchoChain:
+    def __init__(self):
+        self.calls = []
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs["new_turns"])
+        return {"text": f"Summary of {inputs['new_turns'].count('User:')} turns"}
+
+def make_store():
+    """A store with two pairs evicted for one user."""
+    store = EnhancedMessageStore(max_pairs=1, keep_evicted_pairs=True)
+    for i in range(3):
+        store.add_qa_pair("user-1", f"question {i}", f"answer {i}", {})
+    return store
+
+def test_failed_summary_keeps_evicted_pairs():
+    """Pairs are put back when the model call fails, and summarized on the next run."""
+    store = make_store()
+    summarizer = ConversationSummarizer(store, api_key="sk-test")
+
+    summarizer.chain = FailingChain()
+    asyncio.run(summarizer.summarize_evicted("user-1"))
+    assert store.get_conversation_summary("user-1") is None
+
+    summarizer.chain = EchoChain()
+    asyncio.run(summarizer.summarize_evicted("user-1"))
+    assert store.get_conversation_summary("user-1") == "Summary of 2 turns"
+    assert "question 0" in summarizer.chain.calls[0]
+    assert store.pop_evicted_pairs("user-1") == []
+
+def test_user_locks_are_released():
+    """Per-user locks are dropped once no task holds or waits for them."""
+    store = make_store()
+    summarizer = ConversationSummarizer(store, api_key="sk-test")
+    summarizer.chain = EchoChain()
+
+    async def run_concurrently():
+        await asyncio.gather(*(summarizer.summarize_evicted("user-1") for _ in range(3)))
+
+    asyncio.run(run_concurrently())
+    assert len(summarizer.chain.calls) == 1
+    assert summarizer._user_locks == {}
+    assert summarizer._lock_users == {}
@@ -0,0 +1,75 @@
+"""
+Tests for incremental ingestion and near-duplicate elimination.
+File: nlp/tests/test_ingestion.py
+"""
+
+import os
+
+from core.ingestion import IngestionManifest, scan_source_files
+
+TERMS = "GENERAL TERMS\n" + " ".join(
+    f"Condition {i}: the bank may review charges and customers are notified in writing." for i in range(12)
+)
+
+def product_text(name):
+    return f"{name.upper()} OVERVIEW\n" + " ".join(f"The {name} offers benefit number {i} to holders." for i in range(12))
+
+def scan(base, categories=("sme", "retail")):
+    return scan_source_files(str(base), list(categories))[0]
+
+def test_dedup_keeps_one_copy_per_category(write_pdf, make_processor):
+    write_pdf("sme", "sme_loan.pdf", f"{product_text('sme loan')}\n\n{TERMS}")
+    write_pdf("retail", "savings.pdf", f"{product_text('savings account')}\n\n{TERMS}")
+    write_pdf("retail", "card.pdf", f"{product_text('debit card')}\n\n{TERMS}")
+    processor = make_processor()
+
+    # The two retail copies collapse into one; the SME copy stays separate
+    assert processor.last_ingestion_report.dedup["duplicates"] == 1
+    stored = processor.vector_store.get(include=["documents", "metadatas"])
+    terms_copies = [m["category"] for text, m in zip(stored["documents"], stored["metadatas"]) if "Condition 0" in text]
+    assert sorted(terms_copies) == ["retail", "sme"]
+
+    # A retail-only search still finds the shared terms
+    results = processor.vector_store.similarity_search("review charges", k=10, filter={"category": "retail"})
+    kept = [doc for doc in results if "Condition 0" in doc.page_content]
+    assert len(kept) == 1
+    assert kept[0].metadata["duplicate_count"] == 1
+    assert kept[0].metadata["duplicate_sources"] in ("savings.pdf", "card.pdf")
+
+def test_manifest_plan(tmp_path, write_pdf):
+    for name in ("unchanged", "touched", "changed", "deleted", "dependent", "chained"):
+        write_pdf("retail", f"{name}.pdf", f"{name} product sheet")
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    for source in scan(tmp_path):
+        # dependent.pdf's duplicates were kept in changed.pdf, and chained.pdf's in dependent.pdf
+        merged_into = {"retail/dependent.pdf": ["retail/changed.pdf"], "retail/chained.pdf": ["retail/dependent.pdf"]}
+        manifest.record(source, [f"{source.path}#0"], merged_into.get(source.path))
+    manifest.save()
+
+    touched = tmp_path / "retail" / "touched.pdf"
+    os.utime(touched, (touched.stat().st_atime, touched.stat().st_mtime + 60))
+    write_pdf("retail", "changed.pdf", "changed product sheet, new rates")
+    os.remove(tmp_path / "retail" / "deleted.pdf")
+    write_pdf("retail", "added.pdf", "added product sheet")
+
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    plan = manifest.plan(scan(tmp_path))
+
+    assert [source.path for source in plan.added] == ["retail/added.pdf"]
+    assert sorted(source.path for source in plan.changed) == ["retail/chained.pdf", "retail/changed.pdf", "retail/dependent.pdf"]
+    assert plan.deleted == ["retail/deleted.pdf"]
+    assert sorted(plan.unchanged) == ["retail/touched.pdf", "retail/unchanged.pdf"]
+    # Same content under a new mtime is trusted from now on without hashing
+    assert manifest.entries["retail/touched.pdf"].mtime == touched.stat().st_mtime
+    assert all(source.sha256 for source in plan.added + plan.changed)
+
+def test_manifest_plan_rechunk_marks_every_known_file_changed(tmp_path, write_pdf):
+    write_pdf("sme", "loan.pdf", "loan product sheet")
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    for source in scan(tmp_path):
+        manifest.record(source, ["sme/loan.pdf#0"])
+
+    plan = manifest.plan(scan(tmp_path), rechunk=True)
+
+    assert [source.path for source in plan.changed] == ["sme/loan.pdf"]
+    assert not plan.unchanged
@@ -0,0 +1,65 @@
+"""
+Regression tests for the compiled intent router against the labelled message set.
+File: nlp/tests/test_intent_router.py
+"""
+
+import json
+import os
+
+import numpy as np
+
+from core.intent_router import CentroidRouter, IntentRouter
+
+CASES_PATH = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "intent_cases.json")
+
+def load_cases():
+    """Load the labelled routing cases."""
+    with open(CASES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def test_intent_router_regression_set():
+    """Every labelled message is routed with the expected product flag and segments."""
+    router = IntentRouter()
+    failures = []
+
+    for case in load_cases():
+        intent = router.classify(case["message"])
+        if intent.is_product != case["is_product"] or sorted(intent.categories) != sorted(case["categories"]):
+            failures.append(f"{case['message']!r}: got {intent}")
+
+    assert not failures, "\n".join(failures)
+
+def test_intent_router_word_boundaries():
+    """Terms only match as whole words, with simple plurals."""
+    router = IntentRouter()
+
+    assert not router.is_product_question("Please explain")
+    assert not router.is_product_question("Thanks for the feedback")
+    assert router.is_product_question("What are your fees?")
+    assert router.classify("Small   business loans").categories == ["sme"]
+
+def test_centroids_only_pick_segments_of_product_questions():
+    """A message close to a category centroid but without product terms is not a product question."""
+    router = IntentRouter()
+    centroid_router = CentroidRouter(np.array([[1.0, 0.0], [0.0, 1.0]]), ["sme", "retail"])
+
+    greeting = router.classify("Good morning, how are you?", query_vector=[1.0, 0.05], centroid_router=centroid_router)
+    assert not greeting.is_product
+    assert greeting.categories == []
+
+    question = router.classify("What loans do you have?", query_vector=[1.0, 0.05], centroid_router=centroid_router)
+    assert question.is_product
+    assert question.categories == ["sme"]
+
+def test_centroids_from_blocks_match_a_single_pass():
+    """Centroids accumulated page by page equal those computed over all embeddings at once."""
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((500, 8)).astype(np.float32)
+    labels = [["sme", "retail", "corporate"][i % 3] for i in range(500)]
+
+    whole = CentroidRouter(vectors, labels)
+    paged = CentroidRouter.from_blocks((vectors[i:i + 64], labels[i:i + 64]) for i in range(0, 500, 64))
+
+    assert paged.categories == whole.categories
+    assert np.allclose(paged.centroids, whole.centroids, atol=1e-6)
+    assert CentroidRouter.from_blocks([]) is None
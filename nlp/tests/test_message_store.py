@@ -0,0 +1,41 @@
+"""
+Tests for the enhanced message store.
+File: nlp/tests/test_message_store.py
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.enhanced_message_store import EnhancedMessageStore, HistoryVersionConflict
+
+def test_version_stays_monotonic_across_clear():
+    store = EnhancedMessageStore()
+    store.add_qa_pair("user-1", "Hi", "Hello")
+    store.add_qa_pair("user-1", "Loans?", "We offer...")
+    stale_version = store.get_history_version("user-1")
+
+    store.clear_user_data("user-1")
+    assert store.get_history_version("user-1") > stale_version
+
+    # Even once the new history is as long as the old one, the stale version does not match
+    store.add_qa_pair("user-1", "Hi again", "Hello")
+    store.add_qa_pair("user-1", "Cards?", "We offer...")
+    with pytest.raises(HistoryVersionConflict):
+        store.add_qa_pair("user-1", "Rates?", "...", expected_version=stale_version)
+
+def test_expiry_bumps_the_version():
+    store = EnhancedMessageStore(expiry_seconds=60)
+    store.add_qa_pair("user-1", "Old question", "Old answer")
+    store.add_qa_pair("user-2", "Old question", "Old answer")
+    store.add_qa_pair("user-2", "New question", "New answer")
+    store.conversations["user-1"][0].timestamp = datetime.now() - timedelta(seconds=120)
+    store.conversations["user-2"][0].timestamp = datetime.now() - timedelta(seconds=120)
+    versions = {user_id: store.get_history_version(user_id) for user_id in ("user-1", "user-2")}
+
+    store._remove_expired()
+
+    assert "user-1" not in store.conversations
+    assert [pair.question for pair in store.conversations["user-2"]] == ["New question"]
+    for user_id, version in versions.items():
+        assert store.get_history_version(user_id) == version + 1
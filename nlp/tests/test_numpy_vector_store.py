@@ -0,0 +1,32 @@
+"""
+Tests for the NumPy vector index.
+File: nlp/tests/test_numpy_vector_store.py
+"""
+
+import os
+
+import numpy as np
+
+from core.numpy_vector_store import NumpyVectorStore
+
+def make_vectors(seed, count=50, dimensions=16):
+    return np.random.default_rng(seed).standard_normal((count, dimensions)).astype(np.float32)
+
+def test_quantized_copy_is_rederived_after_float32_writes(tmp_path):
+    directory = str(tmp_path)
+    ids = [f"chunk-{i}" for i in range(50)]
+    texts = [f"chunk {i}" for i in range(50)]
+    NumpyVectorStore(None, persist_directory=directory, quantization="int8").add_embeddings(texts, make_vectors(1), ids=ids)
+    assert os.path.exists(os.path.join(directory, "vectors.int8.npy"))
+
+    # Re-ingest every chunk with new vectors while running unquantized
+    store = NumpyVectorStore(None, persist_directory=directory, quantization="float32")
+    new_vectors = make_vectors(2)
+    store.add_embeddings(texts, new_vectors, ids=ids)
+    assert not os.path.exists(os.path.join(directory, "vectors.int8.npy"))
+    assert not os.path.exists(os.path.join(directory, "scales.npy"))
+
+    # Back on int8, searches see the new vectors rather than the old codes
+    store = NumpyVectorStore(None, persist_directory=directory, quantization="int8")
+    for row in (0, 17, 42):
+        assert store.similarity_search_by_vector(new_vectors[row].tolist(), k=1)[0].page_content == texts[row]
@@ -0,0 +1,68 @@
+"""
+Tests for background re-indexing.
+File: nlp/tests/test_reindex.py
+"""
+
+import os
+import time
+
+from core.reindex import ReindexManager
+
+class FakeService:
+    """The two members of DocumentBasedAIService a ReindexManager uses."""
+
+    def __init__(self, document_processor):
+        self.document_processor = document_processor
+
+    def swap_document_processor(self, document_processor):
+        previous, self.document_processor = self.document_processor, document_processor
+        return previous
+
+def wait_for(manager):
+    deadline = time.monotonic() + 30
+    while manager.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert manager.state == "succeeded", manager.error
+
+def make_service(write_pdf, make_processor):
+    """Service over a two-file corpus."""
+    write_pdf("sme", "sme_loan.pdf", "SME loan terms and repayment schedule. " * 40)
+    write_pdf("retail", "savings.pdf", "Savings account interest and fees. " * 40)
+    return FakeService(make_processor())
+
+def test_reindex_syncs_a_copy_of_the_live_index(write_pdf, make_processor):
+    service = make_service(write_pdf, make_processor)
+    old = service.document_processor
+    write_pdf("retail", "card.pdf", "Debit card limits and charges. " * 40)
+
+    manager = ReindexManager(service)
+    assert manager.start()
+    wait_for(manager)
+
+    report = manager.report
+    assert not report["full_rebuild"]
+    assert [os.path.basename(name) for name in report["added"]] == ["card.pdf"]
+    assert report["unchanged"] == 2
+    assert service.document_processor is not old
+    assert not os.path.isdir(old.persist_directory)
+
+def test_undrained_index_is_removed_by_next_reindex(tmp_path, write_pdf, make_processor):
+    service = make_service(write_pdf, make_processor)
+    first = service.document_processor
+    manager = ReindexManager(service, drain_timeout_seconds=0.05)
+
+    with first.lease():
+        assert manager.start()
+        wait_for(manager)
+        assert os.path.isdir(first.persist_directory)
+        assert manager.status()["undrained_indexes"] == [os.path.basename(first.persist_directory)]
+
+    time.sleep(1.1)  # Version directories are named by the second
+    assert manager.start(full=True)
+    wait_for(manager)
+
+    assert manager.report["full_rebuild"]
+    assert not os.path.isdir(first.persist_directory)
+    assert manager.status()["undrained_indexes"] == []
+    versions = [name for name in os.listdir(tmp_path) if name.startswith("numpy_index") and os.path.isdir(tmp_path / name)]
+    assert versions == [os.path.basename(service.document_processor.persist_directory)]
@@ -0,0 +1,70 @@
+"""
+Tests for local reranking of retrieved chunks.
+File: nlp/tests/test_reranker.py
+"""
+
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+from core.reranker import LocalReranker
+from core.retrieval import CachedRetriever
+
+CHUNKS = {
+    "Fees for transfers between accounts.": [0.0, 1.0],
+    "Home loan rates and repayment terms.": [1.0, 0.0],
+    "Loan fees: arrangement fee and early repayment fee.": [0.6, 0.8],
+}
+
+class LookupEmbeddings:
+    """Cached chunk vectors and fixed query vectors, like CachedEmbeddings without the API."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.queries = []
+
+    def get_cached(self, texts):
+        return [self.vectors.get(text) for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [1.0, 0.0]
+
+def retrieved():
+    return [Document(page_content=text) for text in CHUNKS]
+
+def test_rerank_blends_cosine_and_terms():
+    reranker = LocalReranker(LookupEmbeddings(CHUNKS), top_n=2, min_score=0.0, term_weight=0.2)
+
+    result = reranker.rerank("home loan rates", retrieved(), [1.0, 0.0])
+
+    assert [doc.page_content for doc in result.documents] == [
+        "Home loan rates and repayment terms.", "Loan fees: arrangement fee and early repayment fee."
+    ]
+    assert len(result.scores) == 2
+
+def test_rerank_without_cosine_scores_keeps_retrieval_order():
+    # One chunk vector missing from the cache, and no embeddings at all
+    for embeddings in (LookupEmbeddings({"Home loan rates and repayment terms.": [1.0, 0.0]}), None):
+        reranker = LocalReranker(embeddings, top_n=2, min_score=0.9)
+
+        result = reranker.rerank("loan fees", retrieved(), [1.0, 0.0])
+
+        assert [doc.page_content for doc in result.documents] == list(CHUNKS)[:2]
+        assert result.scores == []
+        assert reranker.stats()["unscored"] == 1
+
+def test_retriever_passes_the_query_vector_to_the_reranker():
+    embeddings = LookupEmbeddings(CHUNKS)
+    processor = SimpleNamespace(
+        query_embeddings=embeddings,
+        reranker=LocalReranker(embeddings, top_n=2, min_score=0.0, term_weight=0.2),
+        search=lambda query, k, search_filter=None: retrieved()
+    )
+    retriever = CachedRetriever(document_processor=processor, k=1, rerank=True)
+
+    docs = retriever.invoke("home loan rates")
+
+    assert embeddings.queries == ["home loan rates"]
+    assert [doc.page_content for doc in docs] == ["Home loan rates and repayment terms."]
+    assert processor.reranker.stats()["unscored"] == 0
@@ -0,0 +1,35 @@
+"""
+Tests for widening segment-restricted retrieval to a global search.
+File: nlp/tests/test_segment_fallback.py
+"""
+
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+from core.document_qa import ProductQAService
+from core.reranker import LocalReranker
+
+def make_service():
+    """ProductQAService with only the reranker its fallback check needs."""
+    service = ProductQAService.__new__(ProductQAService)
+    service.document_processor = SimpleNamespace(reranker=LocalReranker())
+    return service
+
+def test_fallback_on_too_few_chunks():
+    service = make_service()
+    docs = [Document(page_content="The SME overdraft rate is 17% per annum.")]
+
+    assert service._needs_global_fallback("SME overdraft rate", docs)
+
+def test_fallback_on_low_relevance():
+    """Enough chunks, but none about the question, still widens the search."""
+    service = make_service()
+    docs = [Document(page_content=text) for text in (
+        "Seasonal loans finance seeds and fertiliser.",
+        "Tractors are financed over five years.",
+        "Cooperatives can apply for guarantee cover."
+    )]
+
+    assert service._needs_global_fallback("What does a letter of credit cost?", docs)
+    assert not service._needs_global_fallback("How are tractors financed?", docs)
@@ -0,0 +1,47 @@
+"""
+Tests for the two-tier semantic answer cache.
+File: nlp/tests/test_semantic_cache.py
+"""
+
+from types import SimpleNamespace
+
+import utils.lru_cache as lru_cache
+from core.semantic_cache import CachedAnswer, SemanticAnswerCache
+
+def fake_clock(monkeypatch):
+    """Replace the LRU cache's clock with one the test advances."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(lru_cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+def test_similarity_hit_and_miss():
+    cache = SemanticAnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.9)
+    cache.put("retail", "What savings accounts do you offer?", CachedAnswer("Savings answer"), [1.0, 0.0])
+    cache.put("retail", "How do I get a debit card?", CachedAnswer("Card answer"), [0.0, 1.0])
+
+    assert cache.get_exact("retail", "what savings accounts do you offer").answer == "Savings answer"
+    assert cache.get_similar("retail", [0.99, 0.05]).answer == "Savings answer"
+    assert cache.get_similar("retail", [0.7, 0.7]) is None
+    assert cache.get_similar("sme", [1.0, 0.0]) is None
+    assert cache.similarity_hits == 1
+
+def test_expired_category_misses_instead_of_raising(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    cache = SemanticAnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.9)
+    cache.put("retail", "What savings accounts do you offer?", CachedAnswer("Savings answer"), [1.0, 0.0])
+
+    clock.now += 61
+    assert cache.get_similar("retail", [1.0, 0.0]) is None
+    assert cache.get_exact("retail", "What savings accounts do you offer?") is None
+
+def test_expired_best_match_rebuilds_the_matrix(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    cache = SemanticAnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.8)
+    cache.put("retail", "What savings accounts do you offer?", CachedAnswer("Old answer"), [1.0, 0.0])
+    clock.now += 30
+    cache.put("retail", "Which savings account pays the most interest?", CachedAnswer("Fresh answer"), [0.9, 0.3])
+    assert cache.get_similar("retail", [0.0, 1.0]) is None  # Builds the matrix with both entries
+
+    # The closest entry expires while the matrix still holds it; the next one is still a hit
+    clock.now += 31
+    assert cache.get_similar("retail", [1.0, 0.0]).answer == "Fresh answer"
@@ -0,0 +1,24 @@
+"""
+Text normalization helpers for the Bank of Kigali AI Assistant.
+"""
+
+import re
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_question(text: str) -> str:
+    """
+    Normalize a question for use as a cache or coalescing key.
+    
+    Lowercases, drops punctuation and collapses whitespace, so
+    "What are your interest rates?" and "what are your  interest rates" match.
+    
+    Args:
+        text: Raw question text
+        
+    Returns:
+        Normalized question text
+    """
+    text = _NON_WORD.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()